@@ -0,0 +1,265 @@
+"""
+Benchmark a escala de las operaciones principales sobre datos sintéticos.
+
+Para cada escala genera un dataset determinista (ver datos_sinteticos.py) en
+un directorio temporal junto con una copia del código, y mide cada operación
+en un proceso propio: tiempo, operaciones por segundo, pico de memoria (RSS)
+y archivos abiertos por operación. Los resultados se guardan en JSON para
+comparar entre versiones.
+
+Las rutas de datos de los servicios salen de la ubicación del código, por eso
+se copia el código al directorio temporal en lugar de usar el de este repo.
+
+Uso:
+    python benchmarks/bench_escala.py --escalas 10000,100000 --salida resultados.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from datos_sinteticos import generar_dataset
+
+RAIZ_CODIGO = Path(__file__).resolve().parent.parent
+CODIGO = ["main.py", "negocio", "utils", "repositorios", "presentation", "benchmarks"]
+
+# Operaciones en el orden en que se ejecutan (registrar_prestamo modifica los datos: va al final)
+OPERACIONES = [
+    "reconstruir_indice_isbn",
+    "busqueda_binaria_isbn",
+    "busqueda_recursiva_texto",
+    "reportes_carga_inicial",
+    "reportes",
+    "registrar_prestamo",
+]
+
+# Cantidad de repeticiones por defecto de cada operación
+REPETICIONES = {
+    "busqueda_binaria_isbn": 1000,
+    "busqueda_recursiva_texto": 20,
+    "registrar_prestamo": 200,
+}
+
+# Contador de archivos abiertos (evento de auditoría "open"), activo solo al medir
+_contando = False
+_archivos_abiertos = 0
+
+
+def _auditar(evento, args):
+    global _archivos_abiertos
+    if _contando and evento == "open":
+        _archivos_abiertos += 1
+
+
+# ---- Preparación de cada operación (en el proceso hijo) ----
+# Cada función hace lo que no se mide y devuelve la lista de llamadas a medir
+
+def _preparar_reconstruir(repeticiones, rnd):
+    from repositorios import json_libros
+    return [json_libros.reconstruir_indice_isbn]
+
+
+def _preparar_busqueda_isbn(repeticiones, rnd):
+    from negocio import buscador_service
+    from repositorios import json_libros
+    json_libros.asegurar_indice_isbn()
+    isbns = [entrada["isbn"] for entrada in json_libros.cargar_indice_isbn()]
+    elegidos = [rnd.choice(isbns) for _ in range(repeticiones)]
+    return [lambda isbn=isbn: buscador_service.busqueda_binaria_isbn(isbn) for isbn in elegidos]
+
+
+def _preparar_busqueda_texto(repeticiones, rnd):
+    from negocio import buscador_service
+    from repositorios import json_libros
+    json_libros.asegurar_indice_isbn()
+    consultas = [rnd.choice(["Libro", "Autor"]) + f" {rnd.randrange(1000)}" for _ in range(repeticiones)]
+    return [lambda texto=texto: buscador_service.busqueda_recursiva_texto(texto) for texto in consultas]
+
+
+def _preparar_reportes_carga(repeticiones, rnd):
+    from repositorios import json_libros
+    from utils.reportes import ReportGenerator
+    json_libros.asegurar_indice_isbn()
+    return [ReportGenerator().refresh]
+
+
+def _preparar_reportes(repeticiones, rnd):
+    from repositorios import json_libros
+    from utils.reportes import ReportGenerator
+    json_libros.asegurar_indice_isbn()
+    generador = ReportGenerator()
+    generador.refresh()
+    return [
+        generador.report_totals,
+        generador.report_most_borrowed_books,
+        generador.report_top_users,
+        generador.report_estadisticas_por_genero,
+    ]
+
+
+def _preparar_prestamos(repeticiones, rnd):
+    from negocio import prestamos_service, usuario_service
+    from repositorios import json_libros
+    json_libros.asegurar_indice_isbn()
+    disponibles = [
+        (entrada["genero"], ejemplar["libro_id"])
+        for entrada in json_libros.cargar_indice_isbn()
+        for ejemplar in entrada["ejemplares"]
+        if ejemplar.get("disponible", True)
+    ]
+    usuarios = sorted(usuario_service.cargar_usuarios())
+    elegidos = rnd.sample(disponibles, min(repeticiones, len(disponibles)))
+    return [
+        lambda genero=genero, libro_id=libro_id: prestamos_service.registrar_prestamo(
+            genero, libro_id, rnd.choice(usuarios))
+        for genero, libro_id in elegidos
+    ]
+
+
+PREPARAR = {
+    "reconstruir_indice_isbn": _preparar_reconstruir,
+    "busqueda_binaria_isbn": _preparar_busqueda_isbn,
+    "busqueda_recursiva_texto": _preparar_busqueda_texto,
+    "reportes_carga_inicial": _preparar_reportes_carga,
+    "reportes": _preparar_reportes,
+    "registrar_prestamo": _preparar_prestamos,
+}
+
+
+def medir_operacion(operacion, repeticiones, semilla=42):
+    """
+    Mide una operación sobre los datos de la copia donde está este archivo.
+    La salida de los servicios se descarta.
+
+    Returns:
+        dict: segundos, ops, ops_por_segundo, archivos_abiertos_por_op, rss_pico_kb
+    """
+    global _contando, _archivos_abiertos
+
+    sys.addaudithook(_auditar)
+    rnd = random.Random(semilla)
+    with contextlib.redirect_stdout(io.StringIO()):
+        llamadas = PREPARAR[operacion](repeticiones, rnd)
+
+        _archivos_abiertos = 0
+        _contando = True
+        inicio = time.perf_counter()
+        for llamada in llamadas:
+            llamada()
+        segundos = time.perf_counter() - inicio
+        _contando = False
+
+    ops = len(llamadas)
+    return {
+        "operacion": operacion,
+        "segundos": round(segundos, 6),
+        "ops": ops,
+        "ops_por_segundo": round(ops / segundos, 2) if segundos > 0 else None,
+        "archivos_abiertos_por_op": round(_archivos_abiertos / ops, 2) if ops else 0,
+        # ru_maxrss está en KB en Linux (en bytes en macOS); incluye la preparación
+        "rss_pico_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+# ---- Proceso principal ----
+
+def _copiar_codigo(raiz):
+    ignorar = shutil.ignore_patterns("__pycache__", "*.pyc")
+    for nombre in CODIGO:
+        origen = RAIZ_CODIGO / nombre
+        if origen.is_dir():
+            shutil.copytree(origen, Path(raiz) / nombre, ignore=ignorar)
+        else:
+            shutil.copy2(origen, Path(raiz) / nombre)
+
+
+def _commit_actual():
+    try:
+        resultado = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ_CODIGO,
+                                   capture_output=True, text=True, check=True)
+        return resultado.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar_escala(escala, operaciones, semilla):
+    """Genera el dataset de una escala y mide cada operación en un proceso aparte."""
+    resultados = []
+    with tempfile.TemporaryDirectory() as raiz:
+        _copiar_codigo(raiz)
+        inicio = time.perf_counter()
+        cantidades = generar_dataset(raiz, escala, semilla=semilla)
+        print(f"\n== {escala} ejemplares ({cantidades['isbns']} ISBN, {cantidades['usuarios']} usuarios, "
+              f"{cantidades['prestamos']} préstamos) - generado en {time.perf_counter() - inicio:.1f} s")
+
+        for operacion in operaciones:
+            proceso = subprocess.run(
+                [sys.executable, str(Path(raiz) / "benchmarks" / "bench_escala.py"),
+                 "--operacion", operacion, "--semilla", str(semilla)],
+                cwd=raiz, capture_output=True, text=True
+            )
+            if proceso.returncode != 0:
+                print(f"❌ {operacion}: falló\n{proceso.stderr}")
+                continue
+            resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+            resultado["escala"] = escala
+            resultados.append(resultado)
+            print(f"  {operacion:<26} {resultado['segundos']:10.3f} s  {resultado['ops']:6d} ops  "
+                  f"{resultado['ops_por_segundo'] or 0:12.1f} ops/s  "
+                  f"{resultado['archivos_abiertos_por_op']:8.2f} arch/op  "
+                  f"{resultado['rss_pico_kb'] / 1024:8.1f} MB")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--escalas", default="10000,100000",
+                        help="cantidades de ejemplares separadas por coma")
+    parser.add_argument("--operaciones", default=",".join(OPERACIONES),
+                        help="operaciones a medir separadas por coma")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--semilla", type=int, default=42)
+    # Uso interno: medir una sola operación sobre la copia actual
+    parser.add_argument("--operacion", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.operacion:
+        resultado = medir_operacion(args.operacion, REPETICIONES.get(args.operacion, 1), args.semilla)
+        print(json.dumps(resultado))
+        return
+
+    operaciones = [operacion.strip() for operacion in args.operaciones.split(",") if operacion.strip()]
+    desconocidas = [operacion for operacion in operaciones if operacion not in PREPARAR]
+    if desconocidas:
+        parser.error(f"operaciones desconocidas: {', '.join(desconocidas)}")
+
+    resultados = []
+    for escala in (int(valor) for valor in args.escalas.split(",")):
+        resultados.extend(ejecutar_escala(escala, operaciones, args.semilla))
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": _commit_actual(),
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "resultados": resultados
+            }, f, indent=4, ensure_ascii=False)
+        print(f"\n✓ Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
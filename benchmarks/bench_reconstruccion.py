@@ -0,0 +1,91 @@
+"""
+Benchmark de la reconstrucción del índice ISBN: secuencial vs. en paralelo.
+
+Genera un catálogo sintético en un directorio temporal, reconstruye el índice
+de ambas formas, verifica que los archivos resultantes sean idénticos byte a
+byte y muestra el tiempo de cada modo.
+
+Uso:
+    python benchmarks/bench_reconstruccion.py --ejemplares 50000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from repositorios import json_libros
+from utils import rutas
+
+GENEROS = ["arte", "biografia", "ciencia", "ficcion", "filosofia", "historia", "otros", "tecnologia"]
+
+
+def generar_catalogo(raiz, cantidad, semilla=42):
+    """Crea <raiz>/data/libros/<genero>/<id>.json con 'cantidad' ejemplares."""
+    rnd = random.Random(semilla)
+    dir_libros = Path(raiz) / "data" / "libros"
+    for genero in GENEROS:
+        (dir_libros / genero).mkdir(parents=True, exist_ok=True)
+
+    # Aproximadamente 3 ejemplares por ISBN
+    cantidad_isbns = max(1, cantidad // 3)
+    for _ in range(cantidad):
+        n = rnd.randrange(cantidad_isbns)
+        genero = GENEROS[n % len(GENEROS)]
+        libro_id = str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+        libro = {
+            "libro_id": libro_id,
+            "isbn": f"978-{n:010d}",
+            "title": f"Libro {n}",
+            "autor": f"Autor {n % 997}",
+            "genero": genero,
+            "disponible": True,
+            "prestamo_actual": None,
+            "historial_prestamos": []
+        }
+        with open(dir_libros / genero / f"{libro_id}.json", "w", encoding="utf-8") as f:
+            json.dump(libro, f, indent=4, ensure_ascii=False)
+
+
+def medir(**kwargs):
+    inicio = time.perf_counter()
+    json_libros.reconstruir_indice_isbn(**kwargs)
+    duracion = time.perf_counter() - inicio
+    contenido = (rutas.obtener_directorio_libros() / "indice_isbn.json").read_bytes()
+    return duracion, contenido
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ejemplares", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as raiz:
+        print(f"Generando catálogo sintético de {args.ejemplares} ejemplares...")
+        generar_catalogo(raiz, args.ejemplares)
+        rutas.obtener_directorio_base = lambda: Path(raiz)
+
+        t_serial, serial = medir()
+        t_hilos, hilos = medir(workers=args.workers, usar_procesos=False)
+        t_procesos, procesos = medir(workers=args.workers, usar_procesos=True)
+
+    print(f"\nSecuencial:             {t_serial:8.3f} s")
+    print(f"Hilos ({args.workers} workers):     {t_hilos:8.3f} s  (x{t_serial / t_hilos:.2f})")
+    print(f"Procesos ({args.workers} workers):  {t_procesos:8.3f} s  (x{t_serial / t_procesos:.2f})")
+
+    if serial != hilos or serial != procesos:
+        print("❌ Los índices generados no son idénticos")
+        sys.exit(1)
+    print("✓ Los tres índices son idénticos byte a byte")
+
+
+if __name__ == "__main__":
+    main()
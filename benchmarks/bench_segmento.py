@@ -0,0 +1,61 @@
+"""
+Benchmark del catálogo empaquetado: un archivo JSON por libro vs. catalogo.seg.
+
+Genera un catálogo sintético, lista todos los libros leyendo los archivos y
+luego desde el segmento mapeado en memoria, y verifica que ambos recorridos
+devuelvan los mismos libros.
+
+Uso:
+    python benchmarks/bench_segmento.py --ejemplares 50000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_reconstruccion import generar_catalogo
+from negocio import libro_service
+from utils import rutas, segmento_catalogo
+
+
+def medir():
+    inicio = time.perf_counter()
+    libros = libro_service.listar_libros()
+    return time.perf_counter() - inicio, libros
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ejemplares", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as raiz:
+        print(f"Generando catálogo sintético de {args.ejemplares} ejemplares...")
+        generar_catalogo(raiz, args.ejemplares)
+        rutas.obtener_directorio_base = lambda: Path(raiz)
+
+        t_archivos, por_archivos = medir()
+
+        inicio = time.perf_counter()
+        segmento_catalogo.empaquetar_catalogo(rutas.obtener_directorio_libros())
+        t_empaquetar = time.perf_counter() - inicio
+
+        t_segmento, por_segmento = medir()
+
+    print(f"\nArchivos JSON:  {t_archivos:8.3f} s")
+    print(f"Empaquetado:    {t_empaquetar:8.3f} s")
+    print(f"Segmento mmap:  {t_segmento:8.3f} s  (x{t_archivos / t_segmento:.2f})")
+
+    clave = lambda libro: libro["libro_id"]
+    if sorted(por_archivos, key=clave) != sorted(por_segmento, key=clave):
+        print("❌ Los recorridos no devuelven los mismos libros")
+        sys.exit(1)
+    print(f"✓ Ambos recorridos devuelven los mismos {len(por_segmento)} libros")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Prueba de carga de la API HTTP (presentation/api_http.py).
+
+Abre N conexiones concurrentes (keep-alive) contra un servidor ya iniciado y
+reparte entre ellas los pedidos de lectura: búsquedas por ISBN, búsquedas
+por texto y reportes. Muestra pedidos por segundo y las latencias p50, p95 y
+p99 en total y por tipo de pedido. Los ISBN se obtienen de la propia API
+(listado de géneros).
+
+Uso:
+    python main.py http --puerto 8080 &
+    python benchmarks/carga_http.py --url http://127.0.0.1:8080 --concurrencia 200 --pedidos 20000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import quote, urlsplit
+
+# Proporción de cada tipo de pedido
+MEZCLA = [("isbn", 0.7), ("texto", 0.2), ("top-libros", 0.1)]
+
+
+class Conexion:
+    """Cliente HTTP/1.1 mínimo con keep-alive sobre asyncio."""
+
+    def __init__(self, host, puerto):
+        self.host = host
+        self.puerto = puerto
+        self._lector = None
+        self._escritor = None
+
+    async def get(self, ruta):
+        """Returns: (status, cuerpo decodificado)"""
+        if self._escritor is None:
+            self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+        self._escritor.write(f"GET {ruta} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode("latin-1"))
+        await self._escritor.drain()
+
+        estado = await self._lector.readline()
+        if not estado:
+            raise ConnectionError("el servidor cerró la conexión")
+        status = int(estado.split()[1])
+        largo = 0
+        cerrar = False
+        while True:
+            encabezado = await self._lector.readline()
+            if encabezado in (b"\r\n", b""):
+                break
+            nombre, _, valor = encabezado.decode("latin-1").partition(":")
+            if nombre.lower() == "content-length":
+                largo = int(valor)
+            elif nombre.lower() == "connection" and valor.strip().lower() == "close":
+                cerrar = True
+        cuerpo = json.loads(await self._lector.readexactly(largo)) if largo else None
+        if cerrar:
+            self.cerrar()
+        return status, cuerpo
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+
+def _percentil(valores, fraccion):
+    if not valores:
+        return None
+    return valores[min(len(valores) - 1, int(fraccion * len(valores)))]
+
+
+async def _obtener_isbns(host, puerto, cantidad):
+    conexion = Conexion(host, puerto)
+    try:
+        _, respuesta = await conexion.get("/generos")
+        isbns = []
+        for genero in respuesta["resultado"]:
+            _, respuesta = await conexion.get(f"/generos/{quote(genero)}/libros?limite={cantidad}")
+            isbns.extend(libro["isbn"] for libro in respuesta["resultado"]["libros"] if libro.get("isbn"))
+        return isbns
+    finally:
+        conexion.cerrar()
+
+
+def _pedido(tipo, rnd, isbns):
+    if tipo == "isbn":
+        return f"/libros/isbn/{quote(rnd.choice(isbns))}"
+    if tipo == "texto":
+        return f"/libros?q={quote(rnd.choice(['libro', 'book', 'historia', 'the', 'a']))}&limite=10"
+    return "/reportes/top-libros?n=10"
+
+
+async def ejecutar_carga(url, concurrencia, pedidos, semilla=42):
+    """
+    Returns:
+        dict: segundos, pedidos, errores, pedidos_por_segundo y latencias (ms) por tipo
+    """
+    partes = urlsplit(url)
+    host, puerto = partes.hostname, partes.port or 80
+    isbns = await _obtener_isbns(host, puerto, 200)
+    if not isbns:
+        raise RuntimeError("la API no devolvió ningún ISBN (¿catálogo vacío?)")
+
+    rnd = random.Random(semilla)
+    tipos = [tipo for tipo, _ in MEZCLA]
+    cola = [(tipo, _pedido(tipo, rnd, isbns))
+            for tipo in rnd.choices(tipos, weights=[peso for _, peso in MEZCLA], k=pedidos)]
+    latencias = {tipo: [] for tipo in tipos}
+    errores = 0
+
+    async def cliente():
+        nonlocal errores
+        conexion = Conexion(host, puerto)
+        try:
+            while cola:
+                tipo, ruta = cola.pop()
+                inicio = time.perf_counter()
+                try:
+                    status, _ = await conexion.get(ruta)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                    conexion.cerrar()
+                    errores += 1
+                    continue
+                latencias[tipo].append(time.perf_counter() - inicio)
+                # 404 es una respuesta válida (por ejemplo, una búsqueda sin resultados)
+                if status not in (200, 404):
+                    errores += 1
+        finally:
+            conexion.cerrar()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concurrencia)))
+    segundos = time.perf_counter() - inicio
+
+    def resumen(valores):
+        valores = sorted(valores)
+        return {"pedidos": len(valores),
+                **{f"p{p}_ms": round(_percentil(valores, p / 100) * 1000, 3) if valores else None
+                   for p in (50, 95, 99)}}
+
+    return {
+        "segundos": round(segundos, 3),
+        "pedidos": pedidos,
+        "errores": errores,
+        "pedidos_por_segundo": round(pedidos / segundos, 1),
+        "total": resumen([valor for valores in latencias.values() for valor in valores]),
+        "por_tipo": {tipo: resumen(valores) for tipo, valores in latencias.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--concurrencia", type=int, default=100, help="conexiones simultáneas")
+    parser.add_argument("--pedidos", type=int, default=10000, help="pedidos en total")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    try:
+        resultado = asyncio.run(ejecutar_carga(args.url, args.concurrencia, args.pedidos))
+    except (OSError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"{resultado['pedidos']} pedidos con {args.concurrencia} conexiones en {resultado['segundos']} s "
+          f"({resultado['pedidos_por_segundo']} pedidos/s, {resultado['errores']} errores)\n")
+    print(f"{'tipo':<12} {'pedidos':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for tipo, datos in [("total", resultado["total"]), *resultado["por_tipo"].items()]:
+        print(f"{tipo:<12} {datos['pedidos']:>8} {datos['p50_ms'] or 0:>9.2f} "
+              f"{datos['p95_ms'] or 0:>9.2f} {datos['p99_ms'] or 0:>9.2f}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=4, ensure_ascii=False)
+        print(f"\n✓ Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
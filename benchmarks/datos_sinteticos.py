@@ -0,0 +1,161 @@
+"""
+Generador determinista de datos sintéticos a escala.
+
+Crea, dentro de una raíz, la misma estructura que usa la aplicación:
+    data/libros/<genero>/<libro_id>.json
+    data/usuarios/usuarios.json
+    data/prestamos/prestamos.json
+
+Con la misma semilla y las mismas cantidades el resultado es idéntico byte
+a byte. Los datos son coherentes entre sí: los préstamos activos marcan el
+libro como no disponible y figuran en los libros_prestados del usuario.
+
+Uso:
+    python benchmarks/datos_sinteticos.py RAIZ --ejemplares 100000
+"""
+
+import argparse
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+GENEROS = ["arte", "biografia", "ciencia", "ficcion", "filosofia", "historia", "otros", "tecnologia"]
+
+# Relaciones por defecto respecto de la cantidad de ejemplares
+EJEMPLARES_POR_ISBN = 3
+EJEMPLARES_POR_USUARIO = 20
+PRESTAMOS_POR_EJEMPLAR = 0.6
+PROPORCION_ACTIVOS = 0.3
+
+_FECHA_INICIAL = datetime(2024, 1, 1)
+
+
+def _uuid(rnd):
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+
+def _isbn13(numero):
+    """ISBN-13 con guiones y dígito de control válido a partir de un número."""
+    cuerpo = f"978{numero:09d}"
+    suma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(cuerpo))
+    control = (10 - suma % 10) % 10
+    return f"{cuerpo[:3]}-{cuerpo[3]}-{cuerpo[4:8]}-{cuerpo[8:12]}-{control}"
+
+
+def generar_dataset(raiz, ejemplares, usuarios=None, prestamos=None, semilla=42):
+    """
+    Genera el dataset sintético en <raiz>/data.
+
+    Args:
+        raiz (str | Path): Directorio raíz (se crea data/ dentro)
+        ejemplares (int): Cantidad de ejemplares (archivos de libros)
+        usuarios (int, optional): Cantidad de usuarios (por defecto ejemplares / 20)
+        prestamos (int, optional): Préstamos del historial (por defecto 0,6 por ejemplar)
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        dict: Cantidades generadas (ejemplares, isbns, usuarios, prestamos, activos)
+    """
+    rnd = random.Random(semilla)
+    dir_data = Path(raiz) / "data"
+    dir_libros = dir_data / "libros"
+    for genero in GENEROS:
+        (dir_libros / genero).mkdir(parents=True, exist_ok=True)
+    (dir_data / "usuarios").mkdir(parents=True, exist_ok=True)
+    (dir_data / "prestamos").mkdir(parents=True, exist_ok=True)
+
+    if usuarios is None:
+        usuarios = max(1, ejemplares // EJEMPLARES_POR_USUARIO)
+    if prestamos is None:
+        prestamos = int(ejemplares * PRESTAMOS_POR_EJEMPLAR)
+
+    # Usuarios
+    lista_usuarios = [
+        {"user_id": uuid.UUID(int=rnd.getrandbits(128)).hex[:26].upper(),
+         "user": {"nombre": f"Usuario {i}", "libros_prestados": []}}
+        for i in range(usuarios)
+    ]
+
+    # Ejemplares (solo los datos necesarios; los archivos se escriben al final)
+    cantidad_isbns = max(1, ejemplares // EJEMPLARES_POR_ISBN)
+    libros = []
+    for _ in range(ejemplares):
+        n = rnd.randrange(cantidad_isbns)
+        libros.append((_uuid(rnd), n, GENEROS[n % len(GENEROS)]))
+
+    # Historial de préstamos: los últimos quedan activos (un préstamo activo
+    # por ejemplar). prestamos.json se escribe a medida que se generan.
+    historial = {}
+    prestamo_actual = {}
+    archivo_prestamos = open(dir_data / "prestamos" / "prestamos.json", "w", encoding="utf-8")
+    archivo_prestamos.write("[")
+    primer_activo = int(prestamos * (1 - PROPORCION_ACTIVOS))
+    for numero in range(1, prestamos + 1):
+        libro_id, _, genero = libros[rnd.randrange(ejemplares)]
+        usuario = lista_usuarios[rnd.randrange(usuarios)]
+        fecha = _FECHA_INICIAL + timedelta(minutes=numero * 7)
+        activo = numero > primer_activo and libro_id not in prestamo_actual
+        prestamo = {
+            "libro_id": libro_id,
+            "genero": genero,
+            "user_id": usuario["user_id"],
+            "fecha_prestamo": fecha.isoformat(timespec="seconds"),
+            "regresado": not activo,
+            "fecha_devolucion": None if activo else (fecha + timedelta(days=14)).isoformat(timespec="seconds")
+        }
+        archivo_prestamos.write(("\n    " if numero == 1 else ",\n    ") + json.dumps(
+            {"prestamo_numero": numero, "prestamo": prestamo}, ensure_ascii=False))
+        historial.setdefault(libro_id, []).append(
+            {"prestamo_numero": numero, "user_id": usuario["user_id"], "regresado": not activo})
+        if activo:
+            prestamo_actual[libro_id] = usuario["user_id"]
+            usuario["user"]["libros_prestados"].append(libro_id)
+    archivo_prestamos.write("\n]\n")
+    archivo_prestamos.close()
+
+    for libro_id, n, genero in libros:
+        libro = {
+            "libro_id": libro_id,
+            "isbn": _isbn13(n),
+            "title": f"Libro {n}",
+            "autor": f"Autor {n % 997}",
+            "genero": genero,
+            "disponible": libro_id not in prestamo_actual,
+            "prestamo_actual": prestamo_actual.get(libro_id),
+            "historial_prestamos": historial.get(libro_id, [])
+        }
+        with open(dir_libros / genero / f"{libro_id}.json", "w", encoding="utf-8") as f:
+            json.dump(libro, f, indent=4, ensure_ascii=False)
+
+    with open(dir_data / "usuarios" / "usuarios.json", "w", encoding="utf-8") as f:
+        json.dump(lista_usuarios, f, indent=4, ensure_ascii=False)
+
+    return {
+        "ejemplares": ejemplares,
+        "isbns": len({n for _, n, _ in libros}),
+        "usuarios": usuarios,
+        "prestamos": prestamos,
+        "activos": len(prestamo_actual)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("raiz", help="directorio donde se crea data/")
+    parser.add_argument("--ejemplares", type=int, default=10000)
+    parser.add_argument("--usuarios", type=int)
+    parser.add_argument("--prestamos", type=int)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    cantidades = generar_dataset(args.raiz, args.ejemplares, args.usuarios, args.prestamos, args.semilla)
+    print(f"✓ Dataset generado en {Path(args.raiz) / 'data'}: "
+          f"{cantidades['ejemplares']} ejemplares ({cantidades['isbns']} ISBN), "
+          f"{cantidades['usuarios']} usuarios, {cantidades['prestamos']} préstamos "
+          f"({cantidades['activos']} activos)")
+
+
+if __name__ == "__main__":
+    main()
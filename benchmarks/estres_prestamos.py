@@ -0,0 +1,317 @@
+"""
+Prueba de estrés de escrituras concurrentes entre procesos.
+
+Genera un dataset sintético chico en un directorio temporal (junto con una
+copia del código, como bench_escala.py) y lanza N procesos con fork que
+registran préstamos y devoluciones a la vez sobre pocos ISBN, para que
+compitan por los mismos ejemplares. Al terminar verifica que no se haya
+perdido ninguna actualización:
+- cada préstamo o devolución informado como hecho está en el diario, una vez,
+- los números de préstamo no se repiten,
+- ningún ejemplar tiene dos préstamos activos,
+- los archivos de los libros, los libros_prestados de cada usuario y el
+  índice ISBN coinciden con los préstamos activos,
+- los agregados coinciden con los recalculados desde el historial.
+
+Uso:
+    python benchmarks/estres_prestamos.py --trabajadores 8 --operaciones 60
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from datos_sinteticos import generar_dataset
+
+RAIZ_CODIGO = Path(__file__).resolve().parent.parent
+CODIGO = ["main.py", "negocio", "utils", "repositorios", "presentation", "benchmarks"]
+
+# Proporción de devoluciones (del resto de las operaciones son préstamos)
+PROPORCION_DEVOLUCIONES = 0.35
+
+
+# ---- Trabajadores (procesos hijos creados con fork) ----
+
+def _trabajador(numero, operaciones, isbns, usuarios, semilla, ruta_resultado):
+    """Registra préstamos y devoluciones al azar y guarda los que se hicieron."""
+    from negocio import prestamos_service
+
+    rnd = random.Random(semilla * 1000 + numero)
+    prestados = []
+    hechos = {"prestamos": [], "devoluciones": [], "errores": []}
+
+    for _ in range(operaciones):
+        try:
+            if prestados and rnd.random() < PROPORCION_DEVOLUCIONES:
+                libro_id = prestados.pop(rnd.randrange(len(prestados)))
+                resultado = prestamos_service.registrar_devoluciones_en_lote([libro_id])[0]
+                if resultado["ok"]:
+                    hechos["devoluciones"].append(libro_id)
+            else:
+                pedido = (rnd.choice(usuarios), rnd.choice(isbns))
+                resultado = prestamos_service.registrar_prestamos_en_lote([pedido])[0]
+                if resultado["ok"]:
+                    prestados.append(resultado["libro_id"])
+                    hechos["prestamos"].append([resultado["libro_id"], resultado["user_id"]])
+        except Exception as e:
+            hechos["errores"].append(f"{type(e).__name__}: {e}")
+
+    with open(ruta_resultado, "w", encoding="utf-8") as f:
+        json.dump(hechos, f)
+
+
+def _lanzar_trabajadores(cantidad, operaciones, isbns, usuarios, semilla, directorio):
+    """Crea los procesos con fork y espera a que terminen. Returns: resultados de cada uno"""
+    pids = []
+    for numero in range(cantidad):
+        ruta = Path(directorio) / f"trabajador_{numero}.json"
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                    _trabajador(numero, operaciones, isbns, usuarios, semilla, ruta)
+            except BaseException:
+                codigo = 1
+            finally:
+                os._exit(codigo)
+        pids.append((pid, ruta))
+
+    resultados = []
+    for pid, ruta in pids:
+        _, estado = os.waitpid(pid, 0)
+        if os.waitstatus_to_exitcode(estado) != 0 or not ruta.exists():
+            raise RuntimeError(f"el trabajador {pid} terminó con error")
+        with open(ruta, "r", encoding="utf-8") as f:
+            resultados.append(json.load(f))
+    return resultados
+
+
+# ---- Verificación (sobre los archivos, sin los cachés de los servicios) ----
+
+def _leer_eventos(dir_prestamos):
+    """Returns: (prestamos {numero: prestamo}, numeros repetidos, devoluciones)"""
+    prestamos, repetidos, devoluciones = {}, [], []
+    snapshot = dir_prestamos / "prestamos.json"
+    items = json.loads(snapshot.read_text(encoding="utf-8")) if snapshot.exists() else []
+    for item in items:
+        prestamo = item.get("prestamo") or {k: v for k, v in item.items() if k != "prestamo_numero"}
+        prestamos[item["prestamo_numero"]] = dict(prestamo)
+
+    diario = dir_prestamos / "prestamos.jsonl"
+    lineas = diario.read_text(encoding="utf-8").splitlines() if diario.exists() else []
+    for linea in lineas:
+        if not linea.strip():
+            continue
+        evento = json.loads(linea)
+        numero = evento["prestamo_numero"]
+        if evento["evento"] == "prestamo":
+            if numero in prestamos:
+                repetidos.append(numero)
+            prestamos[numero] = dict(evento["prestamo"])
+        else:
+            devoluciones.append(numero)
+            if numero in prestamos:
+                prestamos[numero]["regresado"] = True
+    return prestamos, repetidos, devoluciones
+
+
+def _contar_historial(raiz):
+    prestamos, _, _ = _leer_eventos(Path(raiz) / "data" / "prestamos")
+    regresados = sum(1 for p in prestamos.values() if p.get("regresado"))
+    return len(prestamos), regresados
+
+
+def verificar(raiz, resultados, iniciales, indice_en_memoria):
+    """
+    Verifica que los datos reflejen exactamente las operaciones informadas.
+    El índice ISBN se verifica como lo ven las búsquedas (índice más diario
+    de disponibilidad) y en el archivo, ya volcado el diario.
+
+    Returns:
+        list: Problemas encontrados (vacía si todo coincide)
+    """
+    problemas = []
+    data = Path(raiz) / "data"
+    prestamos, repetidos, _ = _leer_eventos(data / "prestamos")
+
+    hechos_prestamos = sum(len(r["prestamos"]) for r in resultados)
+    hechos_devoluciones = sum(len(r["devoluciones"]) for r in resultados)
+    total, regresados = len(prestamos), sum(1 for p in prestamos.values() if p.get("regresado"))
+    if repetidos:
+        problemas.append(f"números de préstamo repetidos: {sorted(set(repetidos))[:10]}")
+    if total - iniciales[0] != hechos_prestamos:
+        problemas.append(f"préstamos en el historial: {total - iniciales[0]}, informados: {hechos_prestamos}")
+    if regresados - iniciales[1] != hechos_devoluciones:
+        problemas.append(f"devoluciones en el historial: {regresados - iniciales[1]}, "
+                         f"informadas: {hechos_devoluciones}")
+
+    activos = {}
+    for numero, prestamo in prestamos.items():
+        if not prestamo.get("regresado"):
+            if prestamo["libro_id"] in activos:
+                problemas.append(f"el ejemplar {prestamo['libro_id']} tiene dos préstamos activos")
+            activos[prestamo["libro_id"]] = prestamo["user_id"]
+
+    # Libros
+    for archivo in (data / "libros").glob("*/*.json"):
+        libro = json.loads(archivo.read_text(encoding="utf-8"))
+        libro_id = libro["libro_id"]
+        if libro.get("disponible", True) == (libro_id in activos):
+            problemas.append(f"el libro {libro_id} figura disponible={libro.get('disponible')} "
+                             f"y {'tiene' if libro_id in activos else 'no tiene'} un préstamo activo")
+        elif libro_id in activos and libro.get("prestamo_actual") != activos[libro_id]:
+            problemas.append(f"el libro {libro_id} figura prestado a otro usuario")
+
+    # Usuarios
+    por_usuario = {}
+    for libro_id, user_id in activos.items():
+        por_usuario.setdefault(user_id, set()).add(libro_id)
+    for item in json.loads((data / "usuarios" / "usuarios.json").read_text(encoding="utf-8")):
+        if set(item["user"].get("libros_prestados", [])) != por_usuario.get(item["user_id"], set()):
+            problemas.append(f"los libros_prestados del usuario {item['user_id']} no coinciden")
+
+    # Índice ISBN
+    indice_en_disco = json.loads((data / "libros" / "indice_isbn.json").read_text(encoding="utf-8"))
+    for donde, indice in (("en memoria", indice_en_memoria), ("en disco", indice_en_disco)):
+        for entrada in indice:
+            disponibles = 0
+            for ejemplar in entrada["ejemplares"]:
+                disponible = ejemplar["libro_id"] not in activos
+                disponibles += disponible
+                if ejemplar.get("disponible", True) != disponible:
+                    problemas.append(f"el índice ISBN {donde} tiene mal la disponibilidad de {ejemplar['libro_id']}")
+            if entrada.get("disponibles") != disponibles:
+                problemas.append(f"el índice ISBN {donde} tiene mal los disponibles de {entrada['isbn']}")
+
+    return problemas
+
+
+# ---- Proceso dentro de la copia ----
+
+def ejecutar_en_copia(trabajadores, operaciones, cantidad_isbns, semilla):
+    from negocio import agregados_service
+    from repositorios import json_libros
+    from utils.transacciones import recuperar_transacciones
+
+    raiz = Path(__file__).resolve().parent.parent
+    with contextlib.redirect_stdout(sys.stderr):
+        recuperar_transacciones()
+        json_libros.asegurar_indice_isbn()
+    indice = json_libros.cargar_indice_isbn()
+
+    # Pocos ISBN para que los procesos compitan por los mismos ejemplares
+    rnd = random.Random(semilla)
+    isbns = [entrada["isbn"] for entrada in rnd.sample(indice, min(cantidad_isbns, len(indice)))]
+    usuarios = [item["user_id"] for item in
+                json.loads((raiz / "data" / "usuarios" / "usuarios.json").read_text(encoding="utf-8"))]
+    iniciales = _contar_historial(raiz)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        resultados = _lanzar_trabajadores(trabajadores, operaciones, isbns, usuarios, semilla, directorio)
+        segundos = time.perf_counter() - inicio
+
+    indice_en_memoria = json.loads(json.dumps(json_libros.cargar_indice_isbn()))
+    json_libros.volcar_disponibilidad()
+    problemas = verificar(raiz, resultados, iniciales, indice_en_memoria)
+    with contextlib.redirect_stdout(sys.stderr):
+        diferencias = agregados_service.verificar_agregados()
+    if diferencias:
+        problemas.append(f"los agregados no coinciden con el historial ({len(diferencias)} diferencias)")
+    for resultado in resultados:
+        problemas.extend(f"error en un trabajador: {error}" for error in resultado["errores"])
+
+    return {
+        "trabajadores": trabajadores,
+        "operaciones": trabajadores * operaciones,
+        "prestamos": sum(len(r["prestamos"]) for r in resultados),
+        "devoluciones": sum(len(r["devoluciones"]) for r in resultados),
+        "segundos": round(segundos, 3),
+        "problemas": problemas
+    }
+
+
+def _copiar_codigo(raiz):
+    ignorar = shutil.ignore_patterns("__pycache__", "*.pyc")
+    for nombre in CODIGO:
+        origen = RAIZ_CODIGO / nombre
+        if origen.is_dir():
+            shutil.copytree(origen, Path(raiz) / nombre, ignore=ignorar)
+        else:
+            shutil.copy2(origen, Path(raiz) / nombre)
+
+
+def ejecutar(trabajadores, operaciones, ejemplares, isbns, semilla):
+    """
+    Genera el dataset y una copia del código en un directorio temporal y
+    corre la prueba ahí, en otro proceso.
+
+    Returns:
+        dict: Resultado de ejecutar_en_copia (con la lista de problemas)
+
+    Raises:
+        RuntimeError: Si el proceso de la prueba termina con error
+    """
+    with tempfile.TemporaryDirectory() as raiz:
+        _copiar_codigo(raiz)
+        generar_dataset(raiz, ejemplares, semilla=semilla)
+        proceso = subprocess.run(
+            [sys.executable, str(Path(raiz) / "benchmarks" / "estres_prestamos.py"), "--en-copia",
+             "--trabajadores", str(trabajadores), "--operaciones", str(operaciones),
+             "--isbns", str(isbns), "--semilla", str(semilla)],
+            cwd=raiz, capture_output=True, text=True
+        )
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr)
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trabajadores", type=int, default=8, help="procesos concurrentes")
+    parser.add_argument("--operaciones", type=int, default=60, help="operaciones por proceso")
+    parser.add_argument("--ejemplares", type=int, default=600)
+    parser.add_argument("--isbns", type=int, default=15, help="ISBN distintos que se piden")
+    parser.add_argument("--semilla", type=int, default=42)
+    # Uso interno: ejecutar la prueba sobre la copia actual
+    parser.add_argument("--en-copia", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        print("❌ La prueba necesita os.fork (Linux o macOS)")
+        sys.exit(1)
+
+    if args.en_copia:
+        resultado = ejecutar_en_copia(args.trabajadores, args.operaciones, args.isbns, args.semilla)
+        print(json.dumps(resultado, ensure_ascii=False))
+        return
+
+    try:
+        resultado = ejecutar(args.trabajadores, args.operaciones, args.ejemplares, args.isbns, args.semilla)
+    except RuntimeError as e:
+        print(f"❌ La prueba falló\n{e}")
+        sys.exit(1)
+
+    print(f"{resultado['trabajadores']} procesos, {resultado['operaciones']} operaciones en "
+          f"{resultado['segundos']} s: {resultado['prestamos']} préstamos y "
+          f"{resultado['devoluciones']} devoluciones registrados")
+    if resultado["problemas"]:
+        for problema in resultado["problemas"][:20]:
+            print(f"❌ {problema}")
+        sys.exit(1)
+    print("✓ Sin actualizaciones perdidas: historial, libros, usuarios, índice ISBN y agregados coinciden")
+
+
+if __name__ == "__main__":
+    main()
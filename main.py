@@ -1,13 +1,113 @@
-from presentation.menu import menu_principal
-from negocio.buscador_service import reconstruir_indice_isbn
+import argparse
+import os
+import sys
+from presentation.cli import SUBCOMANDOS
+from repositorios import ALMACENAMIENTOS, configurar_almacenamiento, obtener_repositorios
+
+# Los servicios se importan dentro de main(): así los subcomandos de la línea
+# de comandos (presentation/cli.py) arrancan sin cargar lo que no usan
 
 def main():
-    # Reconstruir índice al inicio para garantizar sincronización
-    reconstruir_indice_isbn()
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMANDOS:
+        from presentation.cli import main as ejecutar_subcomando
+        sys.exit(ejecutar_subcomando(sys.argv[1:]))
+
+    from utils import instrumentacion
+
+    parser = argparse.ArgumentParser(description="Sistema de gestión bibliotecaria")
+    parser.add_argument("--reindex", action="store_true",
+                        help="reconstruye el índice ISBN completo antes de iniciar")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="hilos a usar si hay que reconstruir el índice completo")
+    parser.add_argument("--migrar-prestamos", action="store_true",
+                        help="migra prestamos.json al esquema snapshot + diario de eventos y termina")
+    parser.add_argument("--almacenamiento", choices=ALMACENAMIENTOS,
+                        help="almacenamiento de los datos (por defecto json, o BIBLIOTECA_ALMACENAMIENTO)")
+    parser.add_argument("--sqlite", metavar="RUTA",
+                        help="ruta de la base SQLite (con --almacenamiento sqlite)")
+    parser.add_argument("--importar", metavar="ARCHIVO",
+                        help="importa libros desde un archivo CSV o JSONL y termina")
+    parser.add_argument("--devoluciones", metavar="ARCHIVO",
+                        help="registra en lote las devoluciones de un archivo (un libro_id por línea) y termina")
+    parser.add_argument("--prestamos", metavar="ARCHIVO",
+                        help="registra en lote los préstamos de un archivo ('ID_USUARIO ISBN' por línea) y termina")
+    parser.add_argument("--exportar", nargs=2, metavar=("DATOS", "ARCHIVO"),
+                        help="exporta 'prestamos' o 'catalogo' a un archivo .csv o .jsonl (.gz para comprimir) y termina")
+    parser.add_argument("--columnas", metavar="C1,C2,...",
+                        help="columnas a exportar con --exportar (por defecto, todas)")
+    parser.add_argument("--instrumentar", metavar="ARCHIVO",
+                        help="mide las operaciones de los servicios y guarda las métricas en un JSON al salir")
+    args = parser.parse_args()
+
+    if args.instrumentar:
+        instrumentacion.activar_con_volcado(args.instrumentar)
+
+    if args.almacenamiento or args.sqlite:
+        configurar_almacenamiento(args.almacenamiento or "sqlite", args.sqlite)
+
+    # Cada almacenamiento se prepara a su manera: con archivos JSON se
+    # recupera el WAL y se valida el índice ISBN; SQLite maneja los suyos
+    repositorios = obtener_repositorios()
+    repositorios.preparar(forzar_indices=args.reindex, workers=args.workers,
+                          validar_indices=not args.migrar_prestamos)
+
+    if args.migrar_prestamos:
+        cantidad = repositorios.migrar_prestamos()
+        if cantidad is None:
+            print("El almacenamiento activo no usa el diario de préstamos: no hay nada que migrar")
+        else:
+            print(f"✓ Préstamos migrados: {cantidad}")
+        return
     print()  # Línea en blanco para separar del menú
 
+    if args.importar:
+        from negocio.importacion_service import importar_libros
+        from presentation.libros import mostrar_resumen_importacion
+        print(f"Importando libros desde {args.importar}...")
+        mostrar_resumen_importacion(importar_libros(args.importar))
+        return
+
+    if args.exportar:
+        from utils import exportacion
+        datos, archivo = args.exportar
+        columnas = [c.strip() for c in args.columnas.split(",") if c.strip()] if args.columnas else None
+        exportadores = {"prestamos": exportacion.exportar_prestamos, "catalogo": exportacion.exportar_catalogo}
+        if datos not in exportadores:
+            print(f"❌ Datos a exportar desconocidos: {datos} (se espera prestamos o catalogo)")
+            return
+        try:
+            cantidad = exportadores[datos](archivo, columnas=columnas)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        print(f"✓ Exportados {cantidad} registros a {archivo}")
+        return
+
+    if args.devoluciones or args.prestamos:
+        from negocio import prestamos_service
+        from presentation.prestamos import mostrar_resultados_lote, parsear_pedido_prestamo
+        with open(args.devoluciones or args.prestamos, "r", encoding="utf-8") as f:
+            lineas = [linea.strip() for linea in f if linea.strip()]
+        if args.devoluciones:
+            resultados = prestamos_service.registrar_devoluciones_en_lote(lineas)
+        else:
+            pedidos = []
+            for linea in lineas:
+                pedido = parsear_pedido_prestamo(linea)
+                if pedido is None:
+                    print(f"❌ Línea ignorada (formato inválido): {linea}")
+                else:
+                    pedidos.append(pedido)
+            resultados = prestamos_service.registrar_prestamos_en_lote(pedidos)
+        mostrar_resultados_lote(resultados)
+        return
+
+    # El menú se importa recién ahora, con el almacenamiento ya configurado
+    # (los reportes cargan sus datos en el primer uso)
+    from presentation.menu import menu_principal
+
     # Iniciar el menú principal
     menu_principal()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,101 @@
+"""
+Servicio de agregados de préstamos (ver utils/agregados.py).
+
+Cada almacenamiento los mantiene en cada préstamo y devolución (con archivos
+JSON en data/prestamos/agregados.json, con SQLite en sus tablas) y sirve
+los top-N de los reportes.
+
+Uso:
+    python -m negocio.agregados_service verificar [--reparar]
+"""
+
+import sys
+
+from repositorios import obtener_repositorios
+from utils import agregados as logica
+from utils.instrumentacion import instrumentar_modulo
+
+
+def calcular_agregados():
+    """Calcula los agregados desde cero a partir de todos los préstamos."""
+    repositorio = obtener_repositorios()
+
+    def genero_de_libro(libro_id):
+        ubicacion = repositorio.libros.ubicar(libro_id)
+        return ubicacion["genero"] if ubicacion else None
+
+    return logica.calcular_agregados((item["prestamo"] for item in repositorio.prestamos.iterar()), genero_de_libro)
+
+
+def cargar_agregados():
+    """
+    Devuelve los agregados actuales. No deben modificarse.
+
+    Returns:
+        dict: prestamos_por_libro, prestamos_por_usuario, por_genero y activos
+    """
+    return obtener_repositorios().prestamos.agregados()
+
+
+def top_libros(n):
+    """
+    Returns:
+        list: Tuplas (libro_id, préstamos) de los n libros más prestados
+    """
+    return obtener_repositorios().prestamos.top_libros(n)
+
+
+def top_usuarios(n):
+    """
+    Returns:
+        list: Tuplas (user_id, préstamos) de los n usuarios con más préstamos
+    """
+    return obtener_repositorios().prestamos.top_usuarios(n)
+
+
+def verificar_agregados(reparar=False):
+    """
+    Recalcula los agregados desde cero y los compara con los guardados.
+
+    Args:
+        reparar (bool): Si es True y hay diferencias, guarda los recalculados
+
+    Returns:
+        list: Diferencias encontradas (vacía si coinciden)
+    """
+    guardados = cargar_agregados()
+    calculados = calcular_agregados()
+    diferencias = logica.diferencias(guardados, calculados)
+
+    if diferencias and reparar:
+        obtener_repositorios().prestamos.guardar_agregados(calculados)
+
+    return diferencias
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "verificar":
+        print("Uso: python -m negocio.agregados_service verificar [--reparar]")
+        return
+
+    reparar = "--reparar" in sys.argv[2:]
+    diferencias = verificar_agregados(reparar=reparar)
+    if not diferencias:
+        print("✓ Los agregados coinciden con el historial de préstamos")
+        return
+
+    print(f"❌ {len(diferencias)} diferencias entre los agregados y el historial de préstamos:")
+    for diferencia in diferencias[:50]:
+        print(f"  {diferencia}")
+    if len(diferencias) > 50:
+        print(f"  ... y {len(diferencias) - 50} más")
+    if reparar:
+        print("✓ Agregados recalculados y guardados")
+
+
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Servicio de importación masiva de libros desde CSV o JSONL.
+
+Lee el archivo en streaming, valida y normaliza los registros por lotes y
+escribe los libros en el repositorio del almacenamiento activo a medida
+que se validan. Con archivos JSON los índices ISBN, de IDs y de texto se
+actualizan una única vez, después del último lote.
+
+Columnas / claves de cada registro: isbn, title, autor, genero.
+Si el ISBN ya existe en el catálogo, title, autor y genero pueden omitirse:
+se toman del libro existente (igual que el alta manual de un nuevo ejemplar).
+"""
+
+import csv
+import json
+import time
+import uuid
+from itertools import islice
+from pathlib import Path
+
+from repositorios import obtener_repositorios
+from utils.isbn import normalizar_isbn
+from utils.instrumentacion import instrumentar_modulo
+
+TAMANO_LOTE = 1000
+
+# Extensiones aceptadas para cada formato
+_EXTENSIONES_CSV = {".csv"}
+_EXTENSIONES_JSONL = {".jsonl", ".ndjson"}
+
+# Máximo de errores que se guardan para mostrar en el resumen
+_MAXIMO_ERRORES = 20
+
+
+def leer_registros(ruta):
+    """
+    Itera los registros del archivo sin cargarlo completo en memoria.
+
+    Yields:
+        tuple: (numero_linea, registro) donde registro es un dict, o None si
+               la línea no se pudo interpretar
+    """
+    ruta = Path(ruta)
+    extension = ruta.suffix.lower()
+
+    if extension in _EXTENSIONES_CSV:
+        with open(ruta, "r", encoding="utf-8-sig", newline="") as f:
+            lector = csv.DictReader(f)
+            for registro in lector:
+                yield lector.line_num, registro
+    elif extension in _EXTENSIONES_JSONL:
+        with open(ruta, "r", encoding="utf-8") as f:
+            for numero_linea, linea in enumerate(f, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    registro = None
+                yield numero_linea, registro if isinstance(registro, dict) else None
+    else:
+        raise ValueError(f"Formato no soportado: {ruta.suffix} (se espera .csv o .jsonl)")
+
+
+def validar_isbn(isbn):
+    """
+    Normaliza un ISBN y valida su formato: 13 dígitos, o 10 caracteres
+    (9 dígitos y un dígito o 'X' final). No se verifica el dígito de control.
+
+    Returns:
+        str: ISBN normalizado, o None si no es válido
+    """
+    isbn_normalizado = normalizar_isbn(isbn)
+    if len(isbn_normalizado) == 13 and isbn_normalizado.isdigit():
+        return isbn_normalizado
+    if len(isbn_normalizado) == 10 and isbn_normalizado[:9].isdigit() and \
+            (isbn_normalizado[9].isdigit() or isbn_normalizado[9] == "X"):
+        return isbn_normalizado
+    return None
+
+
+def _texto(registro, campo):
+    return str(registro.get(campo) or "").strip()
+
+
+def _datos_isbn_existente(isbn, repositorio, conocidos):
+    """
+    Devuelve (title, autor, genero) de un ISBN ya existente, consultando
+    primero los ISBN vistos en esta importación y luego el catálogo.
+    """
+    if isbn not in conocidos:
+        entrada = repositorio.libros.entrada_isbn(isbn)
+        conocidos[isbn] = (entrada["title"], entrada["autor"], entrada["genero"]) if entrada else None
+    return conocidos[isbn]
+
+
+def _armar_libro(registro, repositorio, conocidos):
+    """
+    Valida un registro y arma el libro completo a guardar.
+
+    Returns:
+        tuple: (libro, None) si es válido, o (None, motivo) si se rechaza
+    """
+    if registro is None:
+        return None, "registro con formato inválido"
+
+    isbn = validar_isbn(_texto(registro, "isbn"))
+    if isbn is None:
+        return None, f"ISBN inválido: {_texto(registro, 'isbn')!r}"
+
+    title = _texto(registro, "title")
+    autor = _texto(registro, "autor")
+    genero = _texto(registro, "genero").lower()
+
+    if not (title and autor and genero):
+        existente = _datos_isbn_existente(isbn, repositorio, conocidos)
+        if existente is None:
+            return None, "faltan title, autor o genero y el ISBN no existe en el catálogo"
+        title = title or existente[0]
+        autor = autor or existente[1]
+        genero = genero or existente[2]
+
+    conocidos.setdefault(isbn, (title, autor, genero))
+
+    return {
+        "libro_id": str(uuid.uuid4()),
+        "isbn": isbn,
+        "title": title,
+        "autor": autor,
+        "genero": genero,
+        "disponible": True,
+        "prestamo_actual": None,
+        "historial_prestamos": []
+    }, None
+
+
+def importar_libros(ruta, tamano_lote=TAMANO_LOTE, mostrar_progreso=True):
+    """
+    Importa libros desde un archivo CSV o JSONL.
+
+    Args:
+        ruta (str | Path): Archivo a importar (.csv, .jsonl o .ndjson)
+        tamano_lote (int): Registros que se validan y escriben por lote
+        mostrar_progreso (bool): Si es True, imprime el avance de cada lote
+
+    Returns:
+        dict: {'importados', 'rechazados', 'errores': [(linea, motivo)],
+               'segundos', 'registros_por_segundo'}
+    """
+    repositorio = obtener_repositorios()
+    conocidos = {}
+    cuentas = {"importados": 0, "rechazados": 0, "procesados": 0}
+    errores = []
+    inicio = time.perf_counter()
+
+    def lotes_validos():
+        """Valida cada lote leído y entrega al repositorio sus libros válidos."""
+        registros = leer_registros(ruta)
+        while True:
+            lote = list(islice(registros, tamano_lote))
+            if not lote:
+                return
+
+            libros = []
+            for numero_linea, registro in lote:
+                libro, motivo = _armar_libro(registro, repositorio, conocidos)
+                if libro is None:
+                    cuentas["rechazados"] += 1
+                    if len(errores) < _MAXIMO_ERRORES:
+                        errores.append((numero_linea, motivo))
+                else:
+                    libros.append(libro)
+
+            yield libros
+            cuentas["importados"] += len(libros)
+            cuentas["procesados"] += len(lote)
+
+            if mostrar_progreso:
+                procesados = cuentas["procesados"]
+                transcurrido = time.perf_counter() - inicio
+                print(f"  {procesados} registros procesados "
+                      f"({procesados / transcurrido if transcurrido else 0:.0f} reg/s)")
+
+    repositorio.libros.agregar_lotes(lotes_validos())
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "importados": cuentas["importados"],
+        "rechazados": cuentas["rechazados"],
+        "errores": errores,
+        "segundos": segundos,
+        "registros_por_segundo": cuentas["procesados"] / segundos if segundos else 0.0
+    }
+
+
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals())
@@ -2,33 +2,10 @@
 Servicio de libros.
 Funciones para agregar, modificar, eliminar o listar libros.
 """
-import json
-import os
 import uuid
 from utils.isbn import normalizar_isbn
-from negocio.buscador_service import reconstruir_indice_isbn
-
-# Carpeta base de todos los géneros
-RUTA_BASE = os.path.join("data", "libros")
-
-
-# Funciones AUXILIARES
-
-def guardar_json(ruta, datos):
-    """Guarda un archivo JSON en la ruta indicada."""
-    with open(ruta, "w", encoding="utf-8") as archivo:
-        json.dump(datos, archivo, indent=4, ensure_ascii=False)
-
-def cargar_json(ruta):
-    """Carga y devuelve los datos de un archivo JSON."""
-    if os.path.exists(ruta):
-        with open(ruta, "r", encoding="utf-8") as archivo:
-            return json.load(archivo)
-    return None
-
-def obtener_ruta_genero(genero):
-    """Devuelve la ruta completa para un género determinado."""
-    return os.path.join(RUTA_BASE, genero)
+from repositorios import obtener_repositorios
+from utils.instrumentacion import instrumentar_modulo
 
 
 # Funciones PRINCIPALES
@@ -44,10 +21,6 @@ def agregar_libro(datos):
         str: ID único del libro agregado
     """
     genero = datos.get("genero", "").lower()
-    carpeta_genero = obtener_ruta_genero(genero)
-
-    # Creamos la carpeta del género si no existe ya
-    os.makedirs(carpeta_genero, exist_ok=True)
 
     # Generamos el ID único para el nuevo libro
     libro_id = str(uuid.uuid4())
@@ -66,11 +39,8 @@ def agregar_libro(datos):
         "historial_prestamos": []
     }
 
-    ruta_archivo = os.path.join(carpeta_genero, f"{libro_id}.json")
-    guardar_json(ruta_archivo, libro)
-
-    # Reconstruir el índice ISBN para mantener sincronización
-    reconstruir_indice_isbn()
+    # El repositorio guarda el libro y lo agrega a sus índices
+    obtener_repositorios().libros.agregar(libro)
 
     return libro_id
 
@@ -86,28 +56,7 @@ def modificar_libro(libro_id, nuevos_datos):
     Returns:
         bool: True si se modificó correctamente, False si no se encontró
     """
-    # Buscar el archivo individual del libro
-    for genero in os.listdir(RUTA_BASE):
-        carpeta_genero = obtener_ruta_genero(genero)
-
-        # Saltar archivos que no son directorios
-        if not os.path.isdir(carpeta_genero):
-            continue
-
-        archivo = os.path.join(carpeta_genero, f"{libro_id}.json")
-
-        if os.path.exists(archivo):
-            libro = cargar_json(archivo)
-            libro.update(nuevos_datos)
-            guardar_json(archivo, libro)
-
-            # Reconstruir el índice ISBN para mantener sincronización
-            reconstruir_indice_isbn()
-
-            return True
-
-    # No se encontró el libro
-    return False
+    return obtener_repositorios().libros.modificar(libro_id, nuevos_datos)
 
 
 def eliminar_libro(libro_id):
@@ -120,50 +69,22 @@ def eliminar_libro(libro_id):
     Returns:
         bool: True si se eliminó correctamente, False si no se encontró
     """
-    # Buscar y eliminar el archivo del ejemplar
-    for genero in os.listdir(RUTA_BASE):
-        carpeta_genero = obtener_ruta_genero(genero)
-
-        # Saltar archivos que no son directorios
-        if not os.path.isdir(carpeta_genero):
-            continue
-
-        archivo = os.path.join(carpeta_genero, f"{libro_id}.json")
-
-        if os.path.exists(archivo):
-            os.remove(archivo)
-
-            # Reconstruir el índice ISBN para mantener sincronización
-            reconstruir_indice_isbn()
-
-            return True
-
-    # No se encontró el libro
-    return False
+    return obtener_repositorios().libros.eliminar(libro_id)
 
 
 def listar_libros() -> list[dict]:
     """
     Retorna una lista con todos los libros que haya registrados en la biblioteca.
 
-    Recorre las carpetas por género dentro de data/libros/
-    y carga la información de cada archivo JSON.
-
     Returns:
         list[dict]: lista de libros en formato diccionario
     """
-    libros = []
     try:
-        for genero in os.listdir(RUTA_BASE):
-            ruta_genero = os.path.join(RUTA_BASE, genero)
-            if os.path.isdir(ruta_genero):
-                for archivo in os.listdir(ruta_genero):
-                    if archivo.endswith(".json"):
-                        ruta_archivo = os.path.join(ruta_genero, archivo)
-                        with open(ruta_archivo, "r", encoding="utf-8") as f:
-                            libro = json.load(f)
-                            libros.append(libro)
-        return libros
+        return list(obtener_repositorios().libros.listar())
     except Exception as e:
         print(f"Error al listar libros: {e}")
         return []
+
+
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals())
@@ -1,111 +1,58 @@
 import json
-from pathlib import Path
-from datetime import datetime
-import os 
-
-DATA_DIR = Path(__file__).parent.parent / "data"
-LIBROS_DIR = DATA_DIR / "libros"
-PRESTAMOS_DIR = DATA_DIR / "prestamos"
-USUARIOS_DIR = DATA_DIR / "usuarios"
-PRESTAMOS_DIR.mkdir(parents=True, exist_ok=True)
-PRESTAMOS_FILE = PRESTAMOS_DIR / "prestamos.json"
-USUARIOS_FILE = USUARIOS_DIR / "usuarios.json"
-
-
-def _cargar_json(ruta: Path, por_defecto):
-    if not ruta.exists():
-        return por_defecto
-    try:
-        with open(ruta, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return por_defecto
-
-def _guardar_json(ruta: Path, datos):
-    with open(ruta, "w", encoding="utf-8") as f:
-        json.dump(datos, f, ensure_ascii=False, indent=4)
-
-
-def _obtener_metadata_libros():
-    metadata = {}
-    dir_libros = Path(__file__).parent.parent / "data" / "libros"
-
-    if dir_libros.exists():
-        for genero_dir in dir_libros.iterdir():
-            if genero_dir.is_dir():
-                genero = genero_dir.name
-                for archivo_libro in genero_dir.glob('*.json'):
-                    try:
-                        with open(archivo_libro, 'r', encoding='utf-8') as f:
-                            libro = json.load(f)
-                            if 'libro_id' in libro:
-                                metadata[libro['libro_id']] = {
-                                    'title': libro.get('title', 'Título Desconocido'),
-                                    'genero': genero
-                                }
-                    except (json.JSONDecodeError, KeyError, AttributeError, FileNotFoundError):
-                        pass
-    return metadata
-
-
-def _actualizar_usuario_agregar_libro(user_id: str, libro_id: str):
-    """Agrega un libro_id a la lista de libros_prestados del usuario"""
-    usuarios = _cargar_json(USUARIOS_FILE, [])
+from repositorios import obtener_repositorios
+from utils.instrumentacion import instrumentar_modulo
 
-    for i in range(len(usuarios)):
-        if usuarios[i].get('user_id') == user_id:
-            usuario = usuarios[i].get('user', {})
-            libros_prestados = usuario.get('libros_prestados', [])
-
-            # Solo agregar si no está ya en la lista
-            if libro_id not in libros_prestados:
-                libros_prestados.append(libro_id)
-                usuario['libros_prestados'] = libros_prestados
-                usuarios[i]['user'] = usuario
-                _guardar_json(USUARIOS_FILE, usuarios)
-            return True
-
-    return False
 
+def _obtener_metadata_libros(libro_ids):
+    """Obtiene título y género de los libros indicados."""
+    libros = obtener_repositorios().libros
+    metadata = {}
+    for libro_id in libro_ids:
+        if libro_id in metadata:
+            continue
+        try:
+            encontrado = libros.buscar_por_id(libro_id)
+        except (json.JSONDecodeError, AttributeError):
+            encontrado = None
+        if encontrado:
+            metadata[libro_id] = {
+                'title': encontrado['libro'].get('title', 'Título Desconocido'),
+                'genero': encontrado['genero']
+            }
+    return metadata
 
-def _actualizar_usuario_quitar_libro(user_id: str, libro_id: str):
-    """Quita un libro_id de la lista de libros_prestados del usuario"""
-    usuarios = _cargar_json(USUARIOS_FILE, [])
 
-    for i in range(len(usuarios)):
-        if usuarios[i].get('user_id') == user_id:
-            usuario = usuarios[i].get('user', {})
-            libros_prestados = usuario.get('libros_prestados', [])
+def cargar_prestamos():
+    """
+    Devuelve todos los préstamos (formato {"prestamo_numero", "prestamo"}).
+    Con archivos JSON es el estado materializado: no deben modificarse.
+    """
+    return obtener_repositorios().prestamos.listar()
 
-            # Quitar el libro si está en la lista
-            if libro_id in libros_prestados:
-                libros_prestados.remove(libro_id)
-                usuario['libros_prestados'] = libros_prestados
-                usuarios[i]['user'] = usuario
-                _guardar_json(USUARIOS_FILE, usuarios)
-            return True
 
-    return False
+def iterar_prestamos():
+    """
+    Genera los préstamos (mismo formato que cargar_prestamos) sin armar la
+    lista completa cuando el almacenamiento puede leerlos de a uno.
+    """
+    return obtener_repositorios().prestamos.iterar()
 
 
 def obtener_prestamos_usuario(user_id: str):
-    prestamos_lista = _cargar_json(PRESTAMOS_FILE, [])
-    # Se asegura de acceder a user_id dentro del diccionario 'prestamo'
-    return [
-        p for p in prestamos_lista 
-        if p.get("prestamo", {}).get("user_id", "").upper() == user_id.upper()
-    ]
-    
+    return obtener_repositorios().prestamos.de_usuario(user_id)
+
 def obtener_historial_prestamos_usuario_con_info(user_id: str):
-    prestamos_usuario_anidados = obtener_prestamos_usuario(user_id) 
-    metadata_libros = _obtener_metadata_libros()
+    prestamos_usuario_anidados = obtener_prestamos_usuario(user_id)
+    metadata_libros = _obtener_metadata_libros(
+        item.get('prestamo', {}).get('libro_id') for item in prestamos_usuario_anidados
+    )
     historial_con_info = []
     for item in prestamos_usuario_anidados:
         p = item.get('prestamo', {})
         libro_id = p.get('libro_id')
         if libro_id and libro_id in metadata_libros:
             libro_meta = metadata_libros[libro_id]
-            
+
             historial_con_info.append({
                 "prestamo_numero": item.get('prestamo_numero'),
                 "libro_id": libro_id,
@@ -116,7 +63,7 @@ def obtener_historial_prestamos_usuario_con_info(user_id: str):
                 "regresado": p.get('regresado', False),
                 "fecha_devolucion": p.get('fecha_devolucion')
             })
-            
+
     return historial_con_info
 
 def obtener_prestamos_activos_usuario_con_info(user_id: str):
@@ -126,83 +73,116 @@ def obtener_prestamos_activos_usuario_con_info(user_id: str):
 
 
 def registrar_prestamo(genero: str, libro_id: str, user_id: str) -> bool:
-    ruta_libro = LIBROS_DIR / genero / f"{libro_id}.json"
+    """
+    Registra un préstamo: marca el libro como prestado, registra el préstamo
+    y actualiza los libros_prestados del usuario, de forma atómica.
+    """
+    return obtener_repositorios().prestamos.registrar_prestamo(genero, libro_id, user_id)
 
-    if not ruta_libro.exists():
-        return False
 
-    libro = _cargar_json(ruta_libro, {})
+def registrar_prestamos_en_grupo(prestamos):
+    """
+    Registra varios préstamos en una sola transacción del almacenamiento
+    (con archivos JSON, un único commit de grupo y un solo fsync).
 
-    if not libro or not libro.get("disponible", True):
-        return False
+    Args:
+        prestamos (list): Tuplas (genero, libro_id, user_id)
 
-    # 1. Actualizar el libro (marcar como no disponible)
-    libro["disponible"] = False
-    libro["prestamo_actual"] = user_id
-    _guardar_json(ruta_libro, libro)
+    Returns:
+        list: bool por cada préstamo, en el mismo orden
+    """
+    repositorio = obtener_repositorios().prestamos
+    return repositorio.en_transaccion(lambda: [
+        repositorio.registrar_prestamo(genero, libro_id, user_id) for genero, libro_id, user_id in prestamos
+    ])
 
-    # 2. Registrar el préstamo
-    prestamos = _cargar_json(PRESTAMOS_FILE, [])
-    prestamos.append({
-        "prestamo_numero": len(prestamos) + 1, # Generar número de préstamo
-        "prestamo": {
-            "libro_id": libro_id,
-            "genero": genero,
-            "user_id": user_id,
-            "fecha_prestamo": datetime.now().isoformat(timespec="seconds"),
-            "regresado": False,
-            "fecha_devolucion": None
-        }
-    })
-    _guardar_json(PRESTAMOS_FILE, prestamos)
 
-    # 3. Actualizar el usuario (agregar libro a libros_prestados)
-    _actualizar_usuario_agregar_libro(user_id, libro_id)
+def registrar_devolucion(genero: str, libro_id: str) -> bool:
+    """Registra una devolución, marcando el libro como disponible."""
+    return obtener_repositorios().prestamos.registrar_devolucion(genero, libro_id)
 
-    return True
 
+def _devolucion_en_lote(libro_id, repositorio):
+    """Registra una devolución de un lote. Returns: (ok, detalle)"""
+    ubicacion = repositorio.libros.ubicar(libro_id)
+    if ubicacion is None:
+        return False, "no existe el ejemplar"
+    if not repositorio.prestamos.registrar_devolucion(ubicacion["genero"], libro_id):
+        return False, "el ejemplar no tiene un préstamo activo"
+    return True, "devuelto"
 
-def registrar_devolucion(genero: str, libro_id: str) -> bool:
-    """Registra una devolución, marcando el libro como disponible."""
-    ruta_libro = LIBROS_DIR / genero / f"{libro_id}.json"
-    if not ruta_libro.exists():
-        return False
 
-    # 1. Actualizar estado del préstamo
-    prestamos_lista = _cargar_json(PRESTAMOS_FILE, [])
-    encontrado = False
-    user_id_prestamo = None
+def _prestamo_en_lote(user_id, isbn, repositorio):
+    """Presta un ejemplar disponible de un ISBN. Returns: (ok, libro_id, detalle)"""
+    if repositorio.usuarios.obtener(user_id) is None:
+        return False, None, "no existe el usuario"
+
+    ejemplares = repositorio.libros.ejemplares_disponibles(isbn)
+    if ejemplares is None:
+        return False, None, "no existe el ISBN"
+
+    # El primer ejemplar que se pueda prestar (la transacción ve los préstamos
+    # anteriores del mismo lote, así dos pedidos no toman el mismo ejemplar)
+    for genero, libro_id in ejemplares:
+        if repositorio.prestamos.registrar_prestamo(genero, libro_id, user_id):
+            return True, libro_id, "prestado"
+
+    return False, None, "no hay ejemplares disponibles"
+
 
-    for item in prestamos_lista:
-        p = item.get("prestamo", {})
-        # Buscar el préstamo ACTIVO (regresado: false) con el ID del libro
-        if p.get("libro_id") == libro_id and not p.get("regresado", True):
-            p["regresado"] = True
-            p["fecha_devolucion"] = datetime.now().isoformat(timespec="seconds")
-            user_id_prestamo = p.get("user_id")
-            encontrado = True
-            break
+def registrar_devoluciones_en_lote(libro_ids):
+    """
+    Registra varias devoluciones en una sola transacción del almacenamiento:
+    con archivos JSON cada archivo afectado (cada libro, usuarios.json y el
+    diario) se escribe una única vez.
 
-    if not encontrado:
-        return False
+    Args:
+        libro_ids (list): IDs de los ejemplares devueltos
 
-    # 2. Actualizar el libro (marcar como disponible)
-    libro = _cargar_json(ruta_libro, {})
-    libro["disponible"] = True
-    libro["prestamo_actual"] = None
+    Returns:
+        list: Por cada ID, un dict {'libro_id', 'ok', 'detalle'}
+    """
+    repositorio = obtener_repositorios()
 
-    _guardar_json(ruta_libro, libro)
-    _guardar_json(PRESTAMOS_FILE, prestamos_lista)
+    def devolver():
+        resultados = []
+        for libro_id in libro_ids:
+            ok, detalle = _devolucion_en_lote(libro_id, repositorio)
+            resultados.append({"libro_id": libro_id, "ok": ok, "detalle": detalle})
+        return resultados
 
-    # 3. Actualizar el usuario (quitar libro de libros_prestados)
-    if user_id_prestamo:
-        _actualizar_usuario_quitar_libro(user_id_prestamo, libro_id)
+    return repositorio.prestamos.en_transaccion(devolver)
 
-    return True
+
+def registrar_prestamos_en_lote(pedidos):
+    """
+    Registra varios préstamos pedidos por (user_id, ISBN): para cada uno se
+    elige un ejemplar disponible del ISBN. Todo va en una sola transacción
+    del almacenamiento y cada archivo afectado se escribe una única vez.
+
+    Args:
+        pedidos (list): Tuplas (user_id, isbn)
+
+    Returns:
+        list: Por cada pedido, un dict {'user_id', 'isbn', 'ok', 'libro_id', 'detalle'}
+    """
+    repositorio = obtener_repositorios()
+
+    def prestar():
+        resultados = []
+        for user_id, isbn in pedidos:
+            user_id = user_id.strip().upper()
+            ok, libro_id, detalle = _prestamo_en_lote(user_id, isbn, repositorio)
+            resultados.append({"user_id": user_id, "isbn": isbn, "ok": ok, "libro_id": libro_id, "detalle": detalle})
+        return resultados
+
+    return repositorio.prestamos.en_transaccion(prestar)
 
 
 def obtener_prestamos_activos():
     """Retorna una lista de todos los préstamos vigentes (solo el diccionario interno)."""
-    prestamos = _cargar_json(PRESTAMOS_FILE, [])
-    return [p.get("prestamo") for p in prestamos if not p.get("prestamo", {}).get("regresado", False)]
+    return obtener_repositorios().prestamos.activos()
+
 
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals())
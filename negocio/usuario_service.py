@@ -3,36 +3,20 @@ Servicio de usuarios.
 Funciones para obtener información de usuarios.
 """
 
-import json
-from pathlib import Path
-
-
-def obtener_directorio_base():
-    """Obtiene el directorio base del proyecto"""
-    return Path(__file__).parent.parent
+from repositorios import obtener_repositorios
+from utils.instrumentacion import instrumentar_modulo
 
 
 def cargar_usuarios():
     """
-    Carga los usuarios desde usuarios.json.
-    Lee siempre desde disco para garantizar datos actualizados.
+    Carga los usuarios del almacenamiento activo. Con archivos JSON el
+    diccionario devuelto (y los de cada usuario) es el caché del
+    repositorio: no deben modificarse.
 
     Returns:
         dict: Diccionario con user_id como clave y datos del usuario como valor
     """
-    base_dir = obtener_directorio_base()
-    archivo_usuarios = base_dir / 'data' / 'usuarios' / 'usuarios.json'
-
-    usuarios_dict = {}
-
-    with open(archivo_usuarios, 'r', encoding='utf-8') as f:
-        usuarios = json.load(f)
-
-    for usuario_data in usuarios:
-        user_id = usuario_data['user_id']
-        usuarios_dict[user_id] = usuario_data['user']
-
-    return usuarios_dict
+    return obtener_repositorios().usuarios.listar()
 
 
 def obtener_nombre_usuario(user_id):
@@ -49,9 +33,9 @@ def obtener_nombre_usuario(user_id):
         return "N/A"
 
     try:
-        usuarios = cargar_usuarios()
-        if user_id in usuarios:
-            return usuarios[user_id]['nombre']
+        usuario = obtener_repositorios().usuarios.obtener(user_id)
+        if usuario is not None:
+            return usuario['nombre']
         return user_id
     except:
         return user_id
@@ -65,11 +49,11 @@ def obtener_usuario_completo(user_id):
         user_id (str): ID del usuario
 
     Returns:
-        dict: Datos completos del usuario o None si no se encuentra
+        dict: Datos completos del usuario (del caché, no deben modificarse)
+              o None si no se encuentra
     """
     try:
-        usuarios = cargar_usuarios()
-        return usuarios.get(user_id, None)
+        return obtener_repositorios().usuarios.obtener(user_id)
     except:
         return None
 
@@ -100,24 +84,13 @@ def agregar_usuario(datos: dict) -> bool:
         bool: True si se agregó correctamente, False en caso de error
     """
     try:
-        usuarios = cargar_usuarios()
-
         user_id = datos.get("user_id")
         user_data = datos.get("user")
 
         if not user_id or not user_data:
             return False
 
-        usuarios[user_id] = user_data
-
-        base_dir = obtener_directorio_base()
-        archivo_usuarios = base_dir / 'data' / 'usuarios' / 'usuarios.json'
-
-        lista_usuarios = [{"user_id": uid, "user": udata} for uid, udata in usuarios.items()]
-
-        with open(archivo_usuarios, 'w', encoding='utf-8') as f:
-            json.dump(lista_usuarios, f, ensure_ascii=False, indent=4)
-
+        obtener_repositorios().usuarios.guardar(user_id, user_data)
         return True
     except Exception as e:
         return False
@@ -135,22 +108,8 @@ def modificar_usuario(user_id: str, datos: dict) -> bool:
         bool: True si se modificó correctamente, False si no se encontró o hubo error.
     """
     try:
-        usuarios = cargar_usuarios()
-
-        if user_id not in usuarios:
-            return False
-
-        usuarios[user_id].update(datos)
-
-        base_dir = obtener_directorio_base()
-        archivo_usuarios = base_dir / 'data' / 'usuarios' / 'usuarios.json'
-
-        lista_usuarios = [{"user_id": uid, "user": udata} for uid, udata in usuarios.items()]
-
-        with open(archivo_usuarios, 'w', encoding='utf-8') as f:
-            json.dump(lista_usuarios, f, ensure_ascii=False, indent=4)
-
-        return True
+        # Se combina con los datos actuales dentro del repositorio, de forma atómica
+        return obtener_repositorios().usuarios.actualizar(user_id, datos)
     except Exception:
         return False
 
@@ -166,21 +125,10 @@ def eliminar_usuario(user_id: str) -> bool:
         bool: True si se eliminó correctamente, False si no existe o hubo error.
     """
     try:
-        usuarios = cargar_usuarios()
-
-        if user_id not in usuarios:
-            return False
-
-        usuarios.pop(user_id)
-
-        base_dir = obtener_directorio_base()
-        archivo_usuarios = base_dir / 'data' / 'usuarios' / 'usuarios.json'
-
-        lista_usuarios = [{"user_id": uid, "user": udata} for uid, udata in usuarios.items()]
+        return obtener_repositorios().usuarios.eliminar(user_id)
+    except Exception:
+        return False
 
-        with open(archivo_usuarios, 'w', encoding='utf-8') as f:
-            json.dump(lista_usuarios, f, ensure_ascii=False, indent=4)
 
-        return True
-    except Exception:
-        return False
\ No newline at end of file
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals())
@@ -0,0 +1,296 @@
+"""
+API HTTP con respuestas JSON sobre la capa de servicios (solo biblioteca
+estándar, con asyncio).
+
+Endpoints:
+    GET  /libros/isbn/<isbn>[?ejemplares=1]      búsqueda por ISBN
+    GET  /libros?q=<texto>[&limite=50]           búsqueda por título, autor o ISBN
+    GET  /generos                                géneros
+    GET  /generos/<genero>/libros[?desde=0&limite=50]
+    GET  /usuarios/<user_id>                     usuario y sus préstamos activos
+    POST /prestamos     {"user_id", "isbn"}      presta un ejemplar disponible del ISBN
+    POST /devoluciones  {"libro_id"}
+    GET  /reportes/top-libros[?n=5]
+    GET  /reportes/top-usuarios[?n=5]
+    GET  /salud
+
+Las respuestas son {"ok": true, "resultado": ...} o {"ok": false, "error": ...}
+con status 200, 400 (pedido inválido), 404 (no encontrado), 405, 409
+(préstamo o devolución rechazados), 413 o 500.
+
+Los servicios son bloqueantes y no son seguros entre hilos (cachés de los
+índices, de los libros, de los usuarios y de los préstamos): cada pedido se
+ejecuta en un pool de hilos acotado, pero de a uno, como en el servidor por
+socket. El loop sigue leyendo y respondiendo las demás conexiones mientras
+tanto.
+
+Uso:
+    python main.py http [--host 127.0.0.1] [--puerto 8080] [--workers 8]
+"""
+
+import asyncio
+import json
+import os
+import re
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Tamaño máximo del cuerpo de un pedido (bytes)
+MAXIMO_CUERPO = 64 * 1024
+
+_MOTIVOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErrorPedido(Exception):
+    """Pedido inválido: se responde con el status indicado."""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+# ---- Endpoints ----
+# Cada uno recibe (parámetros de la ruta, query, cuerpo JSON) y devuelve
+# (status, resultado); se ejecutan en el pool de hilos
+
+def _entero(query, nombre, por_defecto, minimo=0):
+    valor = query.get(nombre, [None])[0]
+    if valor is None:
+        return por_defecto
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ErrorPedido(f"'{nombre}' debe ser un número entero")
+    if numero < minimo:
+        raise ErrorPedido(f"'{nombre}' debe ser mayor o igual a {minimo}")
+    return numero
+
+
+def _comando(operacion, status_rechazo=404, **argumentos):
+    """Ejecuta una operación de presentation/cli.py (las mismas del servidor por socket)."""
+    from presentation.cli import COMANDOS, armar_argumentos
+
+    ok, resultado, texto = COMANDOS[operacion][0](armar_argumentos(operacion, argumentos))
+    if not ok and not resultado:
+        raise ErrorPedido(texto.removeprefix("❌ "), status_rechazo)
+    return (200 if ok else status_rechazo), resultado
+
+
+def _libro_por_isbn(parametros, query, cuerpo):
+    ejemplares = query.get("ejemplares", ["0"])[0].lower() in ("1", "true", "si", "sí")
+    return _comando("search isbn", valor=parametros["isbn"], ejemplares=ejemplares)
+
+
+def _buscar_libros(parametros, query, cuerpo):
+    texto = query.get("q", [""])[0].strip()
+    if not texto:
+        raise ErrorPedido("falta el parámetro 'q'")
+    try:
+        return _comando("search text", valor=texto, limite=_entero(query, "limite", 50, minimo=1))
+    except ErrorPedido as e:
+        if e.status != 404:
+            raise
+        # Sin coincidencias no es un error: la lista vacía es el resultado
+        return 200, []
+
+
+def _generos(parametros, query, cuerpo):
+    from negocio.buscador_service import listar_generos
+    return 200, listar_generos()
+
+
+def _libros_de_genero(parametros, query, cuerpo):
+    from negocio.buscador_service import buscar_por_genero, listar_generos
+
+    genero = parametros["genero"]
+    if genero not in listar_generos():
+        raise ErrorPedido(f"no existe el género {genero}", 404)
+    desde = _entero(query, "desde", 0)
+    limite = _entero(query, "limite", 50, minimo=1)
+    libros = buscar_por_genero(genero)
+    return 200, {"total": len(libros), "desde": desde, "libros": libros[desde:desde + limite]}
+
+
+def _usuario(parametros, query, cuerpo):
+    from negocio.prestamos_service import obtener_prestamos_activos_usuario_con_info
+    from negocio.usuario_service import obtener_usuario_completo
+
+    user_id = parametros["user_id"].upper()
+    usuario = obtener_usuario_completo(user_id)
+    if usuario is None:
+        raise ErrorPedido(f"no existe el usuario {user_id}", 404)
+    return 200, {"user_id": user_id, "nombre": usuario.get("nombre"),
+                 "prestamos_activos": obtener_prestamos_activos_usuario_con_info(user_id)}
+
+
+def _campo(cuerpo, nombre):
+    valor = cuerpo.get(nombre) if isinstance(cuerpo, dict) else None
+    if not isinstance(valor, str) or not valor.strip():
+        raise ErrorPedido(f"falta el campo '{nombre}' en el cuerpo JSON")
+    return valor.strip()
+
+
+def _prestamo(parametros, query, cuerpo):
+    return _comando("loan", 409, user_id=_campo(cuerpo, "user_id"), isbn=_campo(cuerpo, "isbn"))
+
+
+def _devolucion(parametros, query, cuerpo):
+    return _comando("return", 409, libro_id=_campo(cuerpo, "libro_id"))
+
+
+def _top_libros(parametros, query, cuerpo):
+    return _comando("report top-books", n=_entero(query, "n", 5, minimo=1))
+
+
+def _top_usuarios(parametros, query, cuerpo):
+    return _comando("report top-users", n=_entero(query, "n", 5, minimo=1))
+
+
+def _salud(parametros, query, cuerpo):
+    return 200, {"pid": os.getpid()}
+
+
+# (método, ruta, función)
+RUTAS = [
+    ("GET", r"/libros/isbn/(?P<isbn>[^/]+)", _libro_por_isbn),
+    ("GET", r"/libros", _buscar_libros),
+    ("GET", r"/generos", _generos),
+    ("GET", r"/generos/(?P<genero>[^/]+)/libros", _libros_de_genero),
+    ("GET", r"/usuarios/(?P<user_id>[^/]+)", _usuario),
+    ("POST", r"/prestamos", _prestamo),
+    ("POST", r"/devoluciones", _devolucion),
+    ("GET", r"/reportes/top-libros", _top_libros),
+    ("GET", r"/reportes/top-usuarios", _top_usuarios),
+    ("GET", r"/salud", _salud),
+]
+_RUTAS_COMPILADAS = [(metodo, re.compile(patron + r"/?"), funcion) for metodo, patron, funcion in RUTAS]
+
+
+def _resolver(metodo, camino):
+    """
+    Returns:
+        tuple: (funcion, parámetros)
+
+    Raises:
+        ErrorPedido: 404 si la ruta no existe, 405 si no admite el método
+    """
+    metodos = []
+    for metodo_ruta, patron, funcion in _RUTAS_COMPILADAS:
+        coincidencia = patron.fullmatch(camino)
+        if coincidencia is None:
+            continue
+        if metodo_ruta == metodo:
+            return funcion, {k: unquote(v) for k, v in coincidencia.groupdict().items()}
+        metodos.append(metodo_ruta)
+    if metodos:
+        raise ErrorPedido(f"método no permitido (se admite {', '.join(metodos)})", 405)
+    raise ErrorPedido(f"no existe la ruta {camino}", 404)
+
+
+# ---- HTTP ----
+
+class ServidorHTTP:
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        # Los pedidos se ejecutan de a uno
+        self._bloqueo = asyncio.Lock()
+
+    async def _despachar(self, metodo, destino, cuerpo):
+        """Returns: (status, respuesta)"""
+        partes = urlsplit(destino)
+        try:
+            funcion, parametros = _resolver(metodo, partes.path)
+            query = parse_qs(partes.query)
+            try:
+                datos = json.loads(cuerpo) if cuerpo else None
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                raise ErrorPedido("el cuerpo no es JSON válido")
+            async with self._bloqueo:
+                status, resultado = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, lambda: funcion(parametros, query, datos))
+            return status, {"ok": status == 200, "resultado": resultado}
+        except ErrorPedido as e:
+            return e.status, {"ok": False, "error": str(e)}
+        except Exception as e:
+            print(f"❌ Error en {metodo} {destino}: {type(e).__name__}: {e}", file=sys.stderr)
+            return 500, {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    async def atender_conexion(self, lector, escritor):
+        """Atiende los pedidos de una conexión (HTTP/1.1 con keep-alive)."""
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea.strip():
+                    break
+                try:
+                    metodo, destino, version = linea.decode("latin-1").split()
+                except ValueError:
+                    break
+                encabezados = {}
+                while True:
+                    encabezado = await lector.readline()
+                    if encabezado in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = encabezado.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+
+                largo = int(encabezados.get("content-length") or 0)
+                if largo > MAXIMO_CUERPO:
+                    status, respuesta = 413, {"ok": False, "error": "cuerpo demasiado grande"}
+                    mantener = False
+                else:
+                    cuerpo = await lector.readexactly(largo) if largo else b""
+                    status, respuesta = await self._despachar(metodo.upper(), destino, cuerpo)
+                    conexion = encabezados.get("connection", "").lower()
+                    mantener = conexion == "keep-alive" or (version == "HTTP/1.1" and conexion != "close")
+
+                contenido = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+                escritor.write(
+                    f"HTTP/1.1 {status} {_MOTIVOS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(contenido)}\r\n"
+                    f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode("latin-1") + contenido
+                )
+                await escritor.drain()
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    def cerrar(self):
+        self._executor.shutdown(wait=True)
+
+
+async def _servir(host, puerto, workers):
+    from presentation.servidor import calentar_datos
+
+    inicio = time.perf_counter()
+    calentar_datos()
+    print(f"✓ Datos cargados en memoria ({time.perf_counter() - inicio:.2f} s)", file=sys.stderr)
+
+    servidor_http = ServidorHTTP(workers)
+    servidor = await asyncio.start_server(servidor_http.atender_conexion, host, puerto, backlog=512)
+    detener = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(senal, detener.set)
+
+    print(f"✓ API HTTP escuchando en http://{host}:{puerto} ({workers} workers, pid {os.getpid()})",
+          file=sys.stderr)
+    async with servidor:
+        await detener.wait()
+    # Se espera a que terminen los pedidos que ya están en el pool
+    servidor_http.cerrar()
+    print("✓ Servidor detenido", file=sys.stderr)
+
+
+def servir_http(host="127.0.0.1", puerto=8080, workers=8):
+    """Carga los datos y atiende la API hasta recibir SIGINT o SIGTERM."""
+    asyncio.run(_servir(host, puerto, workers))
@@ -7,6 +7,7 @@ from utils.consola import limpiar_consola, pausar
 from utils.paginacion import mostrar_resultados_paginados, mostrar_item_libro
 from negocio.buscador_service import (
     busqueda_binaria_isbn,
+    obtener_entrada_isbn,
     busqueda_recursiva_texto,
     buscar_por_genero,
     listar_generos,
@@ -25,27 +26,29 @@ def ejecutar_busqueda_isbn():
         print("❌ Debe ingresar un ISBN")
         return
 
-    resultado = busqueda_binaria_isbn(isbn)
+    # El resumen sale de los contadores del índice, sin leer los ejemplares
+    entrada = obtener_entrada_isbn(isbn)
 
-    if resultado:
+    if entrada:
         print(f"\n✓ Libro encontrado:")
-        print(f"  ISBN: {resultado['isbn']}")
-        print(f"  Título: {resultado['title']}")
-        print(f"  Autor: {resultado['autor']}")
-        print(f"  Género: {resultado['genero']}")
-        print(f"  Total ejemplares: {len(resultado['ejemplares'])}")
+        print(f"  ISBN: {entrada['isbn']}")
+        print(f"  Título: {entrada['title']}")
+        print(f"  Autor: {entrada['autor']}")
+        print(f"  Género: {entrada['genero']}")
+        print(f"  Total ejemplares: {entrada['total']}")
 
         # Mostrar estado de ejemplares
-        disponibles = sum(1 for e in resultado['ejemplares'] if e['disponible'])
-        prestados = len(resultado['ejemplares']) - disponibles
+        disponibles = entrada['disponibles']
+        prestados = entrada['total'] - disponibles
 
         print(f"\n  Disponibilidad:")
         print(f"    Disponibles: {disponibles}")
         print(f"    Prestados: {prestados}")
 
-        # Preguntar si quiere ver detalles
+        # Preguntar si quiere ver detalles (recién ahí se cargan los ejemplares)
         ver_detalles = input("\n¿Desea ver detalles de los ejemplares? (s/n): ").strip().lower()
-        if ver_detalles == 's':
+        resultado = busqueda_binaria_isbn(isbn) if ver_detalles == 's' else None
+        if resultado:
             for i in range(len(resultado['ejemplares'])):
                 ejemplar = resultado['ejemplares'][i]
                 print(f"\n  Ejemplar {i + 1}:")
@@ -0,0 +1,340 @@
+"""
+Interfaz de línea de comandos no interactiva (para scripts y kioscos).
+
+Cada subcomando hace una sola operación y termina. Los servicios se importan
+recién dentro de cada subcomando, así una consulta no carga los módulos de
+préstamos, reportes ni el menú. Con --json la salida estándar tiene solo el
+resultado en JSON; los mensajes de los servicios van a la salida de errores.
+
+Uso:
+    python main.py search isbn 978-950-07-1234-5 [--json]
+    python main.py search text "borges" [--limite 20]
+    python main.py loan USER_ID ISBN
+    python main.py return LIBRO_ID
+    python main.py report top-books [-n 5]
+    python main.py report top-users [-n 5]
+    python main.py reindex [--workers 4]
+    python main.py export prestamos reports/prestamos.csv [--columnas c1,c2]
+    python main.py serve [--socket RUTA]
+    python main.py http [--host 127.0.0.1] [--puerto 8080] [--workers 8]
+
+Con --socket (o la variable de entorno BIBLIOTECA_SOCKET) la operación no se
+ejecuta en este proceso: se envía al servidor de presentation/servidor.py,
+que tiene los datos ya cargados en memoria.
+
+Códigos de salida: 0 si la operación se hizo, 1 si no (no encontrado,
+préstamo rechazado, etc.), 2 si los argumentos son inválidos.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from repositorios import ALMACENAMIENTOS, configurar_almacenamiento, obtener_repositorios
+
+SUBCOMANDOS = ("search", "loan", "return", "report", "reindex", "export", "serve", "http")
+
+
+
+# ---- Preparación ----
+
+def _preparar(args, validar_indice=True):
+    """Configura el almacenamiento y lo prepara (con archivos JSON, recupera el WAL y valida el índice)."""
+    if args.almacenamiento or args.sqlite:
+        configurar_almacenamiento(args.almacenamiento or "sqlite", args.sqlite)
+    obtener_repositorios().preparar(validar_indices=validar_indice)
+
+
+def _datos_libro(libro_id):
+    """Título, autor e ISBN de un ejemplar sin leer su archivo (si es posible)."""
+    from negocio.buscador_service import obtener_entrada_isbn, ubicar_libro
+    ubicacion = ubicar_libro(libro_id)
+    entrada = obtener_entrada_isbn(ubicacion["isbn"]) if ubicacion else None
+    return entrada or {}
+
+
+# ---- Subcomandos ----
+# Cada uno devuelve (ok, resultado, texto): el resultado se imprime en JSON con
+# --json y el texto en el resto de los casos
+
+def _search_isbn(args):
+    from negocio.buscador_service import busqueda_binaria_isbn, obtener_entrada_isbn
+
+    if args.ejemplares:
+        resultado = busqueda_binaria_isbn(args.valor)
+    else:
+        entrada = obtener_entrada_isbn(args.valor)
+        resultado = None if entrada is None else {
+            clave: entrada.get(clave) for clave in ("isbn", "title", "autor", "genero", "total", "disponibles")
+        }
+    if resultado is None:
+        return False, None, f"❌ No se encontró el ISBN {args.valor}"
+
+    texto = (f"{resultado['title']} - {resultado['autor']} ({resultado['genero']})\n"
+             f"ISBN {resultado['isbn']}: {resultado.get('disponibles', '?')} de "
+             f"{resultado.get('total', '?')} ejemplares disponibles")
+    if args.ejemplares:
+        texto += "".join(f"\n  {e.get('libro_id')}: {'disponible' if e.get('disponible', True) else 'prestado'}"
+                         for e in resultado.get("ejemplares", []))
+    return True, resultado, texto
+
+
+def _search_text(args):
+    from negocio.buscador_service import busqueda_recursiva_texto
+
+    libros = busqueda_recursiva_texto(args.valor)[:args.limite]
+    resultado = [
+        {clave: libro.get(clave) for clave in ("libro_id", "isbn", "title", "autor", "genero", "disponible")}
+        for libro in libros
+    ]
+    if not resultado:
+        return False, resultado, f"❌ No se encontraron libros para '{args.valor}'"
+    texto = "\n".join(f"{l['isbn']}  {l['title']} - {l['autor']} ({l['genero']}) "
+                      f"{'disponible' if l['disponible'] else 'prestado'}  [{l['libro_id']}]"
+                      for l in resultado)
+    return True, resultado, texto
+
+
+def _loan(args):
+    from negocio.prestamos_service import registrar_prestamos_en_lote
+
+    resultado = registrar_prestamos_en_lote([(args.user_id, args.isbn)])[0]
+    if not resultado["ok"]:
+        return False, resultado, f"❌ Préstamo rechazado: {resultado['detalle']}"
+    return True, resultado, f"✓ Préstamo registrado: ejemplar {resultado['libro_id']}"
+
+
+def _return(args):
+    from negocio.prestamos_service import registrar_devoluciones_en_lote
+
+    resultado = registrar_devoluciones_en_lote([args.libro_id])[0]
+    if not resultado["ok"]:
+        return False, resultado, f"❌ Devolución rechazada: {resultado['detalle']}"
+    return True, resultado, f"✓ Devolución registrada: ejemplar {args.libro_id}"
+
+
+def _report_top_books(args):
+    from negocio.agregados_service import top_libros
+
+    resultado = []
+    for libro_id, prestamos in top_libros(args.n):
+        libro = _datos_libro(libro_id)
+        resultado.append({"libro_id": libro_id, "title": libro.get("title"), "autor": libro.get("autor"),
+                          "isbn": libro.get("isbn"), "prestamos": prestamos})
+    texto = "\n".join(f"{i}. {r['title'] or 'Desconocido'} - {r['autor'] or 'Desconocido'}: {r['prestamos']}"
+                      for i, r in enumerate(resultado, 1))
+    return True, resultado, texto or "Sin préstamos registrados"
+
+
+def _report_top_users(args):
+    from negocio.agregados_service import top_usuarios
+    from negocio.usuario_service import obtener_nombre_usuario
+
+    resultado = [{"user_id": user_id, "nombre": obtener_nombre_usuario(user_id), "prestamos": prestamos}
+                 for user_id, prestamos in top_usuarios(args.n)]
+    texto = "\n".join(f"{i}. {r['nombre']} ({r['user_id']}): {r['prestamos']}"
+                      for i, r in enumerate(resultado, 1))
+    return True, resultado, texto or "Sin préstamos registrados"
+
+
+def _reindex(args):
+    cantidad = obtener_repositorios().reindexar(workers=args.workers)
+    if cantidad is None:
+        return True, {"reindexado": False}, "El almacenamiento mantiene sus propios índices: no hay nada que reindexar"
+    return True, {"reindexado": True, "isbns": cantidad}, f"✓ Índice reconstruido: {cantidad} ISBNs"
+
+
+def _export(args):
+    from utils import exportacion
+
+    exportadores = {"prestamos": exportacion.exportar_prestamos, "catalogo": exportacion.exportar_catalogo}
+    columnas = [c.strip() for c in args.columnas.split(",") if c.strip()] if args.columnas else None
+    try:
+        cantidad = exportadores[args.datos](args.archivo, columnas=columnas)
+    except ValueError as e:
+        return False, {"error": str(e)}, f"❌ {e}"
+    return True, {"archivo": args.archivo, "registros": cantidad}, f"✓ Exportados {cantidad} registros a {args.archivo}"
+
+
+# Operación -> (función, argumentos obligatorios, opcionales con su valor por
+# defecto); son también las operaciones que atiende el servidor
+COMANDOS = {
+    "search isbn": (_search_isbn, ("valor",), {"ejemplares": False}),
+    "search text": (_search_text, ("valor",), {"limite": 50}),
+    "loan": (_loan, ("user_id", "isbn"), {}),
+    "return": (_return, ("libro_id",), {}),
+    "report top-books": (_report_top_books, (), {"n": 5}),
+    "report top-users": (_report_top_users, (), {"n": 5}),
+    "reindex": (_reindex, (), {"workers": 1}),
+    "export": (_export, ("datos", "archivo"), {"columnas": None}),
+}
+
+
+def armar_argumentos(operacion, argumentos):
+    """
+    Completa los argumentos de una operación con los valores por defecto.
+
+    Returns:
+        argparse.Namespace
+
+    Raises:
+        ValueError: Si faltan argumentos obligatorios o sobran desconocidos
+    """
+    _, obligatorios, opcionales = COMANDOS[operacion]
+    faltantes = [nombre for nombre in obligatorios if nombre not in argumentos]
+    desconocidos = [nombre for nombre in argumentos if nombre not in obligatorios and nombre not in opcionales]
+    if faltantes:
+        raise ValueError(f"faltan argumentos: {', '.join(faltantes)}")
+    if desconocidos:
+        raise ValueError(f"argumentos desconocidos: {', '.join(desconocidos)}")
+    return argparse.Namespace(**{**opcionales, **argumentos})
+
+
+# ---- Argumentos ----
+
+def _definir_operacion(subparser, operacion):
+    # Los valores por defecto del parser (prioritarios sobre los de cada
+    # argumento) salen de COMANDOS, los mismos que usa el servidor
+    subparser.set_defaults(operacion=operacion, **COMANDOS[operacion][2])
+
+
+def _crear_parser():
+    comunes = argparse.ArgumentParser(add_help=False)
+    comunes.add_argument("--json", action="store_true", help="imprime el resultado en JSON")
+    comunes.add_argument("--almacenamiento", choices=ALMACENAMIENTOS,
+                         help="almacenamiento de los datos (por defecto json, o BIBLIOTECA_ALMACENAMIENTO)")
+    comunes.add_argument("--sqlite", metavar="RUTA", help="ruta de la base SQLite")
+    comunes.add_argument("--socket", metavar="RUTA", default=os.environ.get("BIBLIOTECA_SOCKET"),
+                         help="envía la operación al servidor que escucha en este socket")
+
+    parser = argparse.ArgumentParser(prog="main.py", description="Operaciones de la biblioteca sin menú interactivo")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    search = subcomandos.add_parser("search", help="busca libros")
+    tipos = search.add_subparsers(dest="tipo", required=True)
+    isbn = tipos.add_parser("isbn", parents=[comunes], help="búsqueda por ISBN")
+    isbn.add_argument("valor", metavar="ISBN")
+    isbn.add_argument("--ejemplares", action="store_true", help="incluye el detalle de cada ejemplar")
+    _definir_operacion(isbn, "search isbn")
+    texto = tipos.add_parser("text", parents=[comunes], help="búsqueda por título, autor o ISBN")
+    texto.add_argument("valor", metavar="TEXTO")
+    texto.add_argument("--limite", type=int, help="máximo de resultados (por defecto 50)")
+    _definir_operacion(texto, "search text")
+
+    loan = subcomandos.add_parser("loan", parents=[comunes], help="presta un ejemplar disponible de un ISBN")
+    loan.add_argument("user_id", metavar="USER_ID")
+    loan.add_argument("isbn", metavar="ISBN")
+    _definir_operacion(loan, "loan")
+
+    devolucion = subcomandos.add_parser("return", parents=[comunes], help="registra la devolución de un ejemplar")
+    devolucion.add_argument("libro_id", metavar="LIBRO_ID")
+    _definir_operacion(devolucion, "return")
+
+    report = subcomandos.add_parser("report", help="reportes")
+    reportes = report.add_subparsers(dest="reporte", required=True)
+    for nombre, ayuda in (("top-books", "libros más prestados"), ("top-users", "usuarios con más préstamos")):
+        reporte = reportes.add_parser(nombre, parents=[comunes], help=ayuda)
+        reporte.add_argument("-n", type=int, help="cantidad (por defecto 5)")
+        _definir_operacion(reporte, f"report {nombre}")
+
+    reindex = subcomandos.add_parser("reindex", parents=[comunes], help="reconstruye el índice ISBN completo")
+    reindex.add_argument("--workers", type=int, help="hilos a usar")
+    _definir_operacion(reindex, "reindex")
+    reindex.set_defaults(validar_indice=False)
+
+    export = subcomandos.add_parser("export", parents=[comunes], help="exporta préstamos o catálogo")
+    export.add_argument("datos", choices=("prestamos", "catalogo"))
+    export.add_argument("archivo", metavar="ARCHIVO", help=".csv o .jsonl (.gz para comprimir)")
+    export.add_argument("--columnas", metavar="C1,C2,...", help="columnas a exportar (por defecto, todas)")
+    _definir_operacion(export, "export")
+
+    serve = subcomandos.add_parser("serve", parents=[comunes],
+                                   help="atiende las operaciones en un socket Unix con los datos en memoria")
+    serve.set_defaults(operacion="serve")
+
+    http = subcomandos.add_parser("http", parents=[comunes], help="atiende la API HTTP JSON (presentation/api_http.py)")
+    http.add_argument("--host", default="127.0.0.1")
+    http.add_argument("--puerto", type=int, default=8080)
+    http.add_argument("--workers", type=int, default=8, help="hilos para ejecutar los servicios (por defecto 8)")
+    http.set_defaults(operacion="http")
+
+    return parser
+
+
+def _enviar_al_servidor(args):
+    """Envía la operación al servidor. Returns: (ok, resultado, texto)"""
+    from presentation.servidor import Cliente
+
+    _, obligatorios, opcionales = COMANDOS[args.operacion]
+    argumentos = {clave: getattr(args, clave) for clave in (*obligatorios, *opcionales)}
+    if "archivo" in argumentos:
+        # El servidor puede tener otro directorio de trabajo
+        argumentos["archivo"] = str(Path(argumentos["archivo"]).resolve())
+    try:
+        with Cliente(args.socket) as cliente:
+            respuesta = cliente.pedir(args.operacion, **argumentos)
+    except OSError as e:
+        return False, {"error": str(e)}, f"❌ No se pudo conectar con el servidor en {args.socket}: {e}"
+    if "error" in respuesta:
+        return False, {"error": respuesta["error"]}, f"❌ {respuesta['error']}"
+    return respuesta["ok"], respuesta["resultado"], respuesta["texto"]
+
+
+def _servir(args):
+    from presentation.servidor import RUTA_SOCKET_POR_DEFECTO, servir
+
+    with contextlib.redirect_stdout(sys.stderr):
+        _preparar(args)
+    try:
+        servir(args.socket or RUTA_SOCKET_POR_DEFECTO)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _servir_http(args):
+    from presentation.api_http import servir_http
+
+    with contextlib.redirect_stdout(sys.stderr):
+        _preparar(args)
+    servir_http(args.host, args.puerto, args.workers)
+    return 0
+
+
+def main(argv=None):
+    """
+    Ejecuta un subcomando.
+
+    Returns:
+        int: Código de salida
+    """
+    args = _crear_parser().parse_args(argv)
+    if args.operacion == "serve":
+        return _servir(args)
+    if args.operacion == "http":
+        return _servir_http(args)
+
+    if args.socket:
+        ok, resultado, texto = _enviar_al_servidor(args)
+    else:
+        # Los mensajes de la validación inicial van siempre a la salida de
+        # errores; con --json, también todo lo que impriman los servicios
+        with contextlib.redirect_stdout(sys.stderr):
+            _preparar(args, validar_indice=getattr(args, "validar_indice", True))
+        salida = contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext()
+        with salida:
+            ok, resultado, texto = COMANDOS[args.operacion][0](args)
+
+    if args.json:
+        print(json.dumps({"ok": ok, "resultado": resultado}, ensure_ascii=False))
+    else:
+        print(texto)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,8 @@ from negocio.libro_service import (
     eliminar_libro,
     listar_libros
 )
-from negocio.buscador_service import busqueda_binaria_isbn
+from negocio.buscador_service import obtener_entrada_isbn
+from negocio.importacion_service import importar_libros
 from utils.conjuntos import (
     obtener_generos_unicos, 
     obtener_autores_unicos
@@ -37,7 +38,7 @@ def ejecutar_agregar_libro():
         isbn = input("Ingrese el ISBN: ").strip()
 
     #Chequeamos si ya existe el ISBN
-    libro_existente = busqueda_binaria_isbn(isbn)
+    libro_existente = obtener_entrada_isbn(isbn)
 
     if libro_existente:
         # Ya existe asi que agregamos un nuevo ejemplar automáticamente
@@ -126,4 +127,28 @@ def ejecutar_listar_autores():
 
     print("\n---👤 Listado de autores 👤---")
     for a in sorted(autores):
-        print(f" - {a}")
\ No newline at end of file
+        print(f" - {a}")
+
+# IMPORTACIÓN MASIVA
+def mostrar_resumen_importacion(resumen):
+    """Muestra el resultado de una importación masiva"""
+    print(f"\n✅ Libros importados: {resumen['importados']}")
+    if resumen['rechazados']:
+        print(f"❌ Registros rechazados: {resumen['rechazados']}")
+        for numero_linea, motivo in resumen['errores']:
+            print(f"   - línea {numero_linea}: {motivo}")
+    print(f"⏱  {resumen['segundos']:.2f} s ({resumen['registros_por_segundo']:.0f} registros/s)")
+
+def ejecutar_importar_libros():
+    """Ejecuta la importación masiva de libros desde un archivo CSV o JSONL"""
+    print("\n--- Importar libros (CSV / JSONL) ---")
+
+    ruta = input("Ruta del archivo: ").strip()
+
+    try:
+        resumen = importar_libros(ruta)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo importar el archivo: {e}")
+        return
+
+    mostrar_resumen_importacion(resumen)
\ No newline at end of file
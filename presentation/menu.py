@@ -3,6 +3,7 @@ import sys
 from utils.input import input_numero
 from utils.consola import limpiar_consola, pausar
 from utils.reportes import ReportGenerator
+# Los datos de los reportes se cargan recién en el primer reporte
 reportes = ReportGenerator()
 from presentation.busquedas import (
     ejecutar_busqueda_isbn,
@@ -22,13 +23,16 @@ from presentation.libros import (
     ejecutar_eliminar_libro,
     ejecutar_listar_libros,
     ejecutar_listar_generos,
-    ejecutar_listar_autores
+    ejecutar_listar_autores,
+    ejecutar_importar_libros
 )
 
 from presentation.prestamos import (
     ejecutar_registrar_prestamo,
     ejecutar_registrar_devolucion,
-    ejecutar_listar_prestamos_vigentes
+    ejecutar_listar_prestamos_vigentes,
+    ejecutar_devoluciones_en_lote,
+    ejecutar_prestamos_en_lote
 )
 
 
@@ -107,9 +111,10 @@ def menu_libros():
         print("4. Listar libros")
         print("5. Listar géneros")
         print("6. Listar autores")
+        print("7. Importar libros (CSV / JSONL)")
         print("0. Volver al menú principal")
 
-        opcion = input_numero("Seleccione una opción: ", minimo=0, maximo=6)
+        opcion = input_numero("Seleccione una opción: ", minimo=0, maximo=7)
 
         if opcion == 1:
             limpiar_consola()
@@ -135,6 +140,10 @@ def menu_libros():
             limpiar_consola()
             ejecutar_listar_autores()
             pausar()
+        elif opcion == 7:
+            limpiar_consola()
+            ejecutar_importar_libros()
+            pausar()
         elif opcion == 0:
             return
 
@@ -146,9 +155,11 @@ def menu_prestamos():
         print("1. Registrar préstamo")
         print("2. Registrar devolución")
         print("3. Listar préstamos vigentes")
+        print("4. Préstamos en lote")
+        print("5. Devoluciones en lote")
         print("0. Volver al menú principal")
 
-        opcion = input_numero("Seleccione una opción: ", minimo=0, maximo=3)
+        opcion = input_numero("Seleccione una opción: ", minimo=0, maximo=5)
 
         if opcion == 1:
             limpiar_consola()
@@ -162,6 +173,12 @@ def menu_prestamos():
             limpiar_consola()
             ejecutar_listar_prestamos_vigentes()
             pausar()
+        elif opcion == 4:
+            limpiar_consola()
+            ejecutar_prestamos_en_lote()
+        elif opcion == 5:
+            limpiar_consola()
+            ejecutar_devoluciones_en_lote()
         elif opcion == 0:
             return
 
@@ -177,9 +194,11 @@ def menu_reportes():
         print("5. Búsqueda por texto libre")
         print("6. Búsqueda por género")
         print("7. Búsqueda por ID de ejemplar")
+        print("8. Ejemplares por género, disponibilidad y mes")
+        print("9. Préstamos por género")
         print("0. Volver al menú principal")
 
-        opcion = input_numero("Seleccione una opción: ", minimo=0, maximo=7)
+        opcion = input_numero("Seleccione una opción: ", minimo=0, maximo=9)
 
         if opcion == 1:
             limpiar_consola()
@@ -209,6 +228,14 @@ def menu_reportes():
             limpiar_consola()
             ejecutar_busqueda_por_id()
             pausar()
+        elif opcion == 8:
+            limpiar_consola()
+            reportes.report_pivot_genero_disponibilidad_mes()
+            pausar()
+        elif opcion == 9:
+            limpiar_consola()
+            reportes.report_prestamos_por_genero()
+            pausar()
         elif opcion == 0:
             return
 
@@ -1,7 +1,8 @@
+import re
 from utils.consola import pausar, limpiar_consola
 from utils.input import input_numero
 from negocio import prestamos_service as svc
-from negocio.buscador_service import busqueda_binaria_isbn
+from negocio.buscador_service import obtener_entrada_isbn, ubicar_libro
 from negocio.usuario_service import obtener_nombre_usuario, obtener_usuario_completo
 
 
@@ -42,25 +43,24 @@ def ejecutar_registrar_prestamo():
     # Solicita ISBN
     isbn = input("ISBN del libro: ").strip()
 
-    # Busca por ISBN (usa busqueda_binaria_isbn del servicio de búsqueda)
-    resultado_busqueda = busqueda_binaria_isbn(isbn)
+    # Busca por ISBN en el índice: los contadores y la disponibilidad de cada
+    # ejemplar están en la entrada, sin leer los archivos de los libros
+    resultado_busqueda = obtener_entrada_isbn(isbn)
 
     if not resultado_busqueda:
         print(f"❌ No se encontró ningún libro con ISBN: {isbn}")
         pausar()
         return
     
-    # Filtra ejemplares disponibles
-    ejemplares_disponibles = [
-        ejemplar for ejemplar in resultado_busqueda['ejemplares'] if ejemplar.get('disponible', False)
-    ]
-    
     # Si no hay disponibles, informa y sale
-    if not ejemplares_disponibles:
+    if resultado_busqueda['disponibles'] == 0:
         print(f"❌ El libro '{resultado_busqueda['title']}' no tiene ejemplares disponibles para préstamo.")
         
+        # A quién está prestado cada ejemplar sale de los préstamos vigentes
+        prestatarios = {p['libro_id']: p['user_id'] for p in svc.obtener_prestamos_activos()}
         ejemplares_prestados = [
-             ejemplar for ejemplar in resultado_busqueda['ejemplares'] if not ejemplar.get('disponible', True)
+             dict(ejemplar, prestamo_actual=ejemplar.get('prestamo_actual') or prestatarios.get(ejemplar['libro_id']))
+             for ejemplar in resultado_busqueda['ejemplares'] if not ejemplar.get('disponible', True)
         ]
         if ejemplares_prestados:
              print("\nEjemplares prestados actualmente:")
@@ -68,6 +68,11 @@ def ejecutar_registrar_prestamo():
                 _mostrar_item_ejemplar_disponible(ejemplar, i, False)
         pausar()
         return
+
+    # Filtra ejemplares disponibles
+    ejemplares_disponibles = [
+        ejemplar for ejemplar in resultado_busqueda['ejemplares'] if ejemplar.get('disponible', True)
+    ]
         
     # Muestra y selecciona ejemplar
     print(f"\n--- Ejemplares disponibles para '{resultado_busqueda['title']}' (Género: {resultado_busqueda['genero']}) ---")
@@ -84,7 +89,15 @@ def ejecutar_registrar_prestamo():
     # Obtener datos del ejemplar seleccionado
     ejemplar_seleccionado = ejemplares_disponibles[seleccion - 1]
     libro_id = ejemplar_seleccionado['libro_id']
-    genero = resultado_busqueda['genero']
+
+    # El género sale de la ubicación del ejemplar: los ejemplares de un mismo
+    # ISBN pueden estar guardados en géneros distintos
+    ubicacion = ubicar_libro(libro_id)
+    if ubicacion is None:
+        print(f"❌ El ejemplar {libro_id} ya no existe.")
+        pausar()
+        return
+    genero = ubicacion['genero']
     
     print(f"\nIntentando prestar el libro ID {libro_id} ('{resultado_busqueda['title']}') al usuario {nombre_usuario}...")
 
@@ -208,3 +221,78 @@ def ejecutar_listar_prestamos_activos_usuario():
     pausar()
 
 
+# PROCESAMIENTO EN LOTE
+def parsear_pedido_prestamo(linea):
+    """Convierte una línea 'USER_ID ISBN' (o 'USER_ID,ISBN') en (user_id, isbn), o None"""
+    partes = re.split(r"[,;\s]+", linea.strip(), maxsplit=1)
+    if len(partes) != 2 or not partes[0] or not partes[1]:
+        return None
+    return partes[0].upper(), partes[1].strip()
+
+
+def _leer_lineas(mensaje):
+    """Lee líneas de la consola hasta una línea vacía"""
+    print(mensaje)
+    lineas = []
+    while True:
+        linea = input("> ").strip()
+        if not linea:
+            return lineas
+        lineas.append(linea)
+
+
+def mostrar_resultados_lote(resultados):
+    """Muestra el resultado de cada ítem de un lote y el total"""
+    for i, r in enumerate(resultados, 1):
+        estado = "✅" if r['ok'] else "❌"
+        if 'isbn' in r:
+            item = f"{r['user_id']} / ISBN {r['isbn']}"
+            if r['libro_id']:
+                item += f" → ejemplar {r['libro_id']}"
+        else:
+            item = f"ejemplar {r['libro_id']}"
+        print(f"  [{i}]. {estado} {item}: {r['detalle']}")
+
+    correctos = sum(1 for r in resultados if r['ok'])
+    print(f"\nProcesados: {len(resultados)} | Correctos: {correctos} | Con error: {len(resultados) - correctos}")
+
+
+def ejecutar_devoluciones_en_lote():
+    limpiar_consola()
+    print("=== Devoluciones en lote ===")
+    libro_ids = _leer_lineas("Ingrese los ID de los ejemplares devueltos, uno por línea (línea vacía para terminar):")
+    if not libro_ids:
+        print("No se ingresó ningún ejemplar.")
+        pausar()
+        return
+
+    try:
+        mostrar_resultados_lote(svc.registrar_devoluciones_en_lote(libro_ids))
+    except Exception as e:
+        print(f"❌ Error interno al registrar las devoluciones (no se aplicó ninguna): {e}")
+    pausar()
+
+
+def ejecutar_prestamos_en_lote():
+    limpiar_consola()
+    print("=== Préstamos en lote ===")
+    lineas = _leer_lineas("Ingrese 'ID_USUARIO ISBN', uno por línea (línea vacía para terminar):")
+
+    pedidos = []
+    for linea in lineas:
+        pedido = parsear_pedido_prestamo(linea)
+        if pedido is None:
+            print(f"❌ Línea ignorada (formato inválido): {linea}")
+        else:
+            pedidos.append(pedido)
+
+    if not pedidos:
+        print("No se ingresó ningún préstamo válido.")
+        pausar()
+        return
+
+    try:
+        mostrar_resultados_lote(svc.registrar_prestamos_en_lote(pedidos))
+    except Exception as e:
+        print(f"❌ Error interno al registrar los préstamos (no se aplicó ninguno): {e}")
+    pausar()
@@ -0,0 +1,201 @@
+"""
+Servidor de la biblioteca sobre un socket Unix.
+
+Un proceso de larga duración mantiene en memoria el índice ISBN, el índice
+de texto, los usuarios, los préstamos y los agregados, y atiende las mismas
+operaciones que los subcomandos de presentation/cli.py. Varios puestos de
+atención comparten así un único proceso con los datos ya cargados. Lo que
+escriban otros procesos (la CLI, el menú) se ve en el pedido siguiente: los
+cachés se revalidan contra la firma de sus archivos y el diario de
+disponibilidad.
+
+Protocolo: una línea JSON por pedido y una por respuesta, en la misma
+conexión (se pueden enviar varios pedidos seguidos).
+    -> {"operacion": "search isbn", "args": {"valor": "978-950-07-1234-5"}}
+    <- {"ok": true, "resultado": {...}, "texto": "..."}
+Si el pedido es inválido la respuesta es {"ok": false, "error": "..."}.
+La operación "ping" devuelve el pid, el tiempo activo y los pedidos atendidos.
+
+Los pedidos se ejecutan de a uno (los servicios no son seguros entre hilos);
+cada conexión se atiende en su propio hilo.
+
+Uso:
+    python main.py serve [--socket data/biblioteca.sock]
+    python main.py search isbn 978-950-07-1234-5 --socket data/biblioteca.sock
+"""
+
+import contextlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+from utils.rutas import obtener_directorio_datos
+
+RUTA_SOCKET_POR_DEFECTO = obtener_directorio_datos() / "biblioteca.sock"
+
+# Tiempo máximo de espera del cliente por una respuesta (segundos)
+TIMEOUT_CLIENTE = 300
+
+# Los pedidos se ejecutan de a uno
+_lock = threading.Lock()
+_estado = {"inicio": None, "pedidos": 0}
+
+
+def calentar_datos():
+    """Carga en memoria los índices, usuarios, préstamos y agregados."""
+    from negocio import agregados_service, prestamos_service, usuario_service
+    from repositorios import obtener_repositorios
+
+    obtener_repositorios().calentar()
+    usuario_service.cargar_usuarios()
+    prestamos_service.cargar_prestamos()
+    agregados_service.top_libros(1)
+    agregados_service.top_usuarios(1)
+
+
+def atender(pedido):
+    """
+    Ejecuta un pedido del protocolo.
+
+    Args:
+        pedido (dict): {"operacion", "args"}
+
+    Returns:
+        dict: Respuesta del protocolo
+    """
+    from presentation.cli import COMANDOS, armar_argumentos
+
+    if not isinstance(pedido, dict):
+        return {"ok": False, "error": "el pedido debe ser un objeto JSON"}
+    operacion = pedido.get("operacion")
+    if operacion == "ping":
+        return {"ok": True, "resultado": {
+            "pid": os.getpid(),
+            "segundos_activo": round(time.monotonic() - _estado["inicio"], 3),
+            "pedidos": _estado["pedidos"]
+        }, "texto": "pong"}
+    if operacion not in COMANDOS:
+        return {"ok": False, "error": f"operación desconocida: {operacion}"}
+    argumentos = pedido.get("args") or {}
+    if not isinstance(argumentos, dict):
+        return {"ok": False, "error": "args debe ser un objeto JSON"}
+    try:
+        args = armar_argumentos(operacion, argumentos)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+
+    with _lock:
+        _estado["pedidos"] += 1
+        try:
+            # Lo que impriman los servicios va al registro del servidor
+            with contextlib.redirect_stdout(sys.stderr):
+                ok, resultado, texto = COMANDOS[operacion][0](args)
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    return {"ok": ok, "resultado": resultado, "texto": texto}
+
+
+class _Manejador(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for linea in self.rfile:
+            if not linea.strip():
+                continue
+            try:
+                respuesta = atender(json.loads(linea))
+            except json.JSONDecodeError as e:
+                respuesta = {"ok": False, "error": f"JSON inválido: {e}"}
+            self.wfile.write(json.dumps(respuesta, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class _Servidor(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Conexiones pendientes de aceptar (el valor por defecto, 5, es poco para varios puestos)
+    request_queue_size = 64
+
+
+def _socket_en_uso(ruta):
+    """True si hay un servidor escuchando en la ruta (si no, el archivo quedó de una ejecución anterior)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as prueba:
+        try:
+            prueba.connect(str(ruta))
+            return True
+        except OSError:
+            return False
+
+
+def servir(ruta):
+    """
+    Carga los datos y atiende pedidos hasta recibir SIGINT o SIGTERM.
+
+    Args:
+        ruta (str | Path): Ruta del socket Unix
+    """
+    ruta = Path(ruta)
+    if ruta.exists():
+        if _socket_en_uso(ruta):
+            raise RuntimeError(f"Ya hay un servidor escuchando en {ruta}")
+        ruta.unlink()
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    inicio = time.perf_counter()
+    calentar_datos()
+    print(f"✓ Datos cargados en memoria ({time.perf_counter() - inicio:.2f} s)", file=sys.stderr)
+
+    servidor = _Servidor(str(ruta), _Manejador)
+    _estado["inicio"] = time.monotonic()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(senal, lambda *_: sys.exit(0))
+    print(f"✓ Escuchando en {ruta} (pid {os.getpid()})", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
+        # Se espera a que termine el pedido en curso (si lo hay) antes de salir
+        _lock.acquire()
+        with contextlib.suppress(FileNotFoundError):
+            ruta.unlink()
+        print("✓ Servidor detenido", file=sys.stderr)
+
+
+class Cliente:
+    """
+    Conexión a un servidor. Se puede reutilizar para varios pedidos:
+
+        with Cliente("data/biblioteca.sock") as cliente:
+            cliente.pedir("search isbn", valor="978-950-07-1234-5")
+    """
+
+    def __init__(self, ruta, timeout=TIMEOUT_CLIENTE):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(str(ruta))
+        self._lector = self._socket.makefile("rb")
+
+    def pedir(self, operacion, **args):
+        """
+        Returns:
+            dict: Respuesta del protocolo
+        """
+        pedido = json.dumps({"operacion": operacion, "args": args}, ensure_ascii=False)
+        self._socket.sendall(pedido.encode("utf-8") + b"\n")
+        linea = self._lector.readline()
+        if not linea:
+            raise ConnectionError("el servidor cerró la conexión")
+        return json.loads(linea)
+
+    def cerrar(self):
+        self._lector.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,74 @@
+"""
+Capa de repositorios: acceso a libros, usuarios y préstamos independiente
+del formato de almacenamiento.
+
+El almacenamiento se elige por configuración:
+- variable de entorno BIBLIOTECA_ALMACENAMIENTO = "json" (por defecto) o "sqlite"
+- variable de entorno BIBLIOTECA_SQLITE con la ruta de la base (por defecto data/biblioteca.db)
+- o bien configurar_almacenamiento(), que usa main.py con --almacenamiento
+"""
+
+import os
+from pathlib import Path
+
+from utils.rutas import obtener_directorio_datos
+
+ALMACENAMIENTOS = ("json", "sqlite")
+
+RUTA_SQLITE_POR_DEFECTO = obtener_directorio_datos() / "biblioteca.db"
+
+_configuracion = {
+    "almacenamiento": os.environ.get("BIBLIOTECA_ALMACENAMIENTO", "json").lower(),
+    "ruta_sqlite": Path(os.environ.get("BIBLIOTECA_SQLITE", RUTA_SQLITE_POR_DEFECTO))
+}
+
+# Repositorios ya creados, por (almacenamiento, ruta)
+_repositorios = {}
+
+
+def configurar_almacenamiento(almacenamiento, ruta_sqlite=None):
+    """
+    Selecciona el almacenamiento activo.
+
+    Args:
+        almacenamiento (str): "json" o "sqlite"
+        ruta_sqlite (str | Path, optional): Ruta de la base SQLite
+    """
+    if almacenamiento not in ALMACENAMIENTOS:
+        raise ValueError(f"Almacenamiento desconocido: {almacenamiento}")
+    _configuracion["almacenamiento"] = almacenamiento
+    if ruta_sqlite is not None:
+        _configuracion["ruta_sqlite"] = Path(ruta_sqlite)
+
+
+def almacenamiento_configurado():
+    """Devuelve el nombre del almacenamiento activo."""
+    return _configuracion["almacenamiento"]
+
+
+def obtener_repositorios(almacenamiento=None):
+    """
+    Devuelve los repositorios (libros, usuarios, prestamos) del almacenamiento
+    activo o del indicado.
+
+    Returns:
+        Repositorios
+    """
+    almacenamiento = almacenamiento or _configuracion["almacenamiento"]
+
+    if almacenamiento == "sqlite":
+        clave = (almacenamiento, str(_configuracion["ruta_sqlite"]))
+        if clave not in _repositorios:
+            from repositorios.sqlite_repo import crear_repositorios_sqlite
+            _repositorios[clave] = crear_repositorios_sqlite(_configuracion["ruta_sqlite"])
+        return _repositorios[clave]
+
+    if almacenamiento == "json":
+        clave = (almacenamiento, None)
+        if clave not in _repositorios:
+            from repositorios.json_repo import crear_repositorios_json
+            _repositorios[clave] = crear_repositorios_json()
+        return _repositorios[clave]
+
+    raise ValueError(f"Almacenamiento desconocido: {almacenamiento}")
+
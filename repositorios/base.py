@@ -0,0 +1,273 @@
+"""
+Interfaces de los repositorios.
+Cada almacenamiento (archivos JSON, SQLite) implementa estas tres clases.
+Los formatos de entrada y salida son los mismos que usan los servicios.
+"""
+
+from abc import ABC, abstractmethod
+
+from utils import agregados as logica_agregados
+
+
+class RepositorioLibros(ABC):
+
+    @abstractmethod
+    def buscar_por_isbn(self, isbn):
+        """
+        Returns:
+            dict: {'isbn', 'title', 'autor', 'genero', 'ejemplares': [libros]} o None
+        """
+
+    @abstractmethod
+    def buscar_por_id(self, libro_id):
+        """
+        Returns:
+            dict: {'libro', 'isbn', 'genero', 'ruta'} o None
+        """
+
+    def entrada_isbn(self, isbn):
+        """
+        Datos de un ISBN para decidir un préstamo o una importación, sin
+        leer cada ejemplar si el almacenamiento lo evita.
+
+        Returns:
+            dict: {'isbn', 'title', 'autor', 'genero', 'ejemplares'} o None
+        """
+        return self.buscar_por_isbn(isbn)
+
+    def ubicar(self, libro_id):
+        """
+        Returns:
+            dict: {'genero', 'isbn'} del libro, o None si no existe
+        """
+        encontrado = self.buscar_por_id(libro_id)
+        if encontrado is None:
+            return None
+        return {'genero': encontrado['genero'], 'isbn': encontrado['isbn']}
+
+    def ejemplares_disponibles(self, isbn):
+        """
+        Returns:
+            list: (genero, libro_id) de cada ejemplar disponible del ISBN,
+                  o None si el ISBN no existe
+        """
+        resultado = self.buscar_por_isbn(isbn)
+        if resultado is None:
+            return None
+        return [(e.get("genero"), e["libro_id"]) for e in resultado["ejemplares"] if e.get("disponible", True)]
+
+    @abstractmethod
+    def buscar_texto(self, texto):
+        """Libros cuyo título, autor o ISBN contienen el texto (sin distinguir mayúsculas)."""
+
+    @abstractmethod
+    def listar_por_genero(self, genero):
+        """Libros de un género."""
+
+    @abstractmethod
+    def listar_generos(self):
+        """Nombres de los géneros, ordenados."""
+
+    @abstractmethod
+    def listar(self):
+        """Itera todos los libros."""
+
+    @abstractmethod
+    def agregar(self, libro):
+        """Agrega un libro completo (con libro_id ya asignado)."""
+
+    def agregar_lote(self, libros):
+        """Agrega varios libros; cada almacenamiento puede hacerlo en una sola operación."""
+        for libro in libros:
+            self.agregar(libro)
+
+    def agregar_lotes(self, lotes):
+        """Agrega varios lotes de libros (iterable de listas)."""
+        for lote in lotes:
+            self.agregar_lote(lote)
+
+    @abstractmethod
+    def modificar(self, libro_id, nuevos_datos):
+        """
+        Returns:
+            bool: True si el libro existía
+        """
+
+    @abstractmethod
+    def eliminar(self, libro_id):
+        """
+        Returns:
+            bool: True si el libro existía
+        """
+
+    def cambios_desde(self, marca):
+        """
+        Libros modificados desde 'marca' (lo devuelto por la llamada
+        anterior, o None la primera vez).
+
+        Returns:
+            tuple: (nueva marca, libros nuevos o modificados,
+                    libro_ids eliminados, o None si los libros devueltos
+                    son todos los existentes)
+        """
+        return None, list(self.listar()), None
+
+
+class RepositorioUsuarios(ABC):
+
+    @abstractmethod
+    def listar(self):
+        """
+        Returns:
+            dict: user_id -> datos del usuario
+        """
+
+    def obtener(self, user_id):
+        """
+        Returns:
+            dict: Datos del usuario, o None si no existe
+        """
+        return self.listar().get(user_id)
+
+    @abstractmethod
+    def guardar(self, user_id, user):
+        """Agrega o reemplaza un usuario."""
+
+    def actualizar(self, user_id, datos):
+        """
+        Combina 'datos' con los datos actuales del usuario.
+
+        Returns:
+            bool: True si el usuario existía
+        """
+        usuario = self.obtener(user_id)
+        if usuario is None:
+            return False
+        self.guardar(user_id, dict(usuario, **datos))
+        return True
+
+    @abstractmethod
+    def eliminar(self, user_id):
+        """
+        Returns:
+            bool: True si el usuario existía
+        """
+
+
+class RepositorioPrestamos(ABC):
+
+    @abstractmethod
+    def listar(self):
+        """
+        Returns:
+            list: Préstamos en formato {"prestamo_numero", "prestamo"}, por número
+        """
+
+    def iterar(self):
+        """
+        Recorre los préstamos (mismo formato que listar) sin armar la lista
+        completa; cada almacenamiento puede leerlos de a uno.
+        """
+        return iter(self.listar())
+
+    @abstractmethod
+    def de_usuario(self, user_id):
+        """Préstamos (mismo formato que listar) de un usuario."""
+
+    @abstractmethod
+    def activos(self):
+        """Diccionarios internos de los préstamos no devueltos."""
+
+    def en_transaccion(self, funcion):
+        """
+        Ejecuta 'funcion': los préstamos y devoluciones que registre forman
+        una sola transacción del almacenamiento.
+
+        Returns:
+            Lo que devuelva 'funcion'
+        """
+        return funcion()
+
+    @abstractmethod
+    def registrar_prestamo(self, genero, libro_id, user_id):
+        """
+        Marca el libro como prestado, registra el préstamo y actualiza el
+        usuario, de forma atómica.
+
+        Returns:
+            bool: True si se registró
+        """
+
+    @abstractmethod
+    def registrar_devolucion(self, genero, libro_id):
+        """
+        Cierra el préstamo activo del libro, lo marca como disponible y
+        actualiza el usuario, de forma atómica.
+
+        Returns:
+            bool: True si se registró
+        """
+
+    @abstractmethod
+    def agregados(self):
+        """
+        Agregados de préstamos para los reportes (ver utils/agregados.py),
+        mantenidos en cada préstamo y devolución.
+
+        Returns:
+            dict: prestamos_por_libro, prestamos_por_usuario, por_genero y activos
+        """
+
+    @abstractmethod
+    def guardar_agregados(self, agregados):
+        """Reemplaza los agregados guardados (reparación)."""
+
+    def top_libros(self, n):
+        """
+        Returns:
+            list: Tuplas (libro_id, préstamos) de los n libros más prestados
+        """
+        return logica_agregados.Ranking(self.agregados()["prestamos_por_libro"]).top(n)
+
+    def top_usuarios(self, n):
+        """
+        Returns:
+            list: Tuplas (user_id, préstamos) de los n usuarios con más préstamos
+        """
+        return logica_agregados.Ranking(self.agregados()["prestamos_por_usuario"]).top(n)
+
+
+class Repositorios:
+    """Agrupa los tres repositorios de un mismo almacenamiento."""
+
+    def __init__(self, libros, usuarios, prestamos):
+        self.libros = libros
+        self.usuarios = usuarios
+        self.prestamos = prestamos
+
+    def preparar(self, forzar_indices=False, workers=1, validar_indices=True):
+        """
+        Deja el almacenamiento listo para usarse al iniciar la aplicación
+        (recuperaciones pendientes, índices, etc.).
+        """
+
+    def reindexar(self, workers=1):
+        """
+        Reconstruye los índices del almacenamiento.
+
+        Returns:
+            int: Cantidad de ISBN indexados, o None si no usa índices propios
+        """
+        return None
+
+    def migrar_prestamos(self):
+        """
+        Lleva los préstamos guardados al formato actual.
+
+        Returns:
+            int: Cantidad de préstamos migrados, o None si no hace falta
+        """
+        return None
+
+    def calentar(self):
+        """Carga en memoria lo que conviene tener listo antes de atender pedidos."""
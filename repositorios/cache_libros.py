@@ -0,0 +1,115 @@
+"""
+Caché LRU acotado de libros ya parseados, por ruta de archivo.
+
+Cada entrada guarda la firma (inodo, mtime_ns, tamaño) del archivo leído:
+si el archivo cambió (incluso fuera de la aplicación) la entrada se
+descarta y se vuelve a leer. Además, las escrituras de libros y préstamos
+invalidan explícitamente las rutas que modifican.
+
+Los libros devueltos se comparten con el caché: no deben modificarse.
+Se puede usar desde varios hilos: el lock protege solo el diccionario, la
+lectura y el parseo de los archivos se hacen fuera de él.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+CAPACIDAD_POR_DEFECTO = 512
+
+# ruta -> (firma, libro), del menos al más recientemente usado
+_cache = OrderedDict()
+# Capacidad configurable con la variable de entorno BIBLIOTECA_CACHE_LIBROS
+_capacidad = int(os.environ.get("BIBLIOTECA_CACHE_LIBROS", CAPACIDAD_POR_DEFECTO))
+_estadisticas = {"aciertos": 0, "fallos": 0, "desalojos": 0, "invalidaciones": 0}
+_lock = threading.Lock()
+
+
+def _firma(ruta):
+    stat = os.stat(ruta)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def leer_libro(ruta):
+    """
+    Devuelve el libro parseado de un archivo, usando el caché si la firma
+    del archivo no cambió.
+
+    Args:
+        ruta (str | Path): Ruta del archivo del libro
+
+    Returns:
+        dict: Libro, o None si el archivo no existe
+    """
+    clave = str(ruta)
+    try:
+        firma = _firma(clave)
+    except FileNotFoundError:
+        with _lock:
+            _cache.pop(clave, None)
+        return None
+
+    with _lock:
+        entrada = _cache.get(clave)
+        if entrada is not None and entrada[0] == firma:
+            _cache.move_to_end(clave)
+            _estadisticas["aciertos"] += 1
+            return entrada[1]
+        _estadisticas["fallos"] += 1
+
+    with open(clave, "r", encoding="utf-8") as f:
+        libro = json.load(f)
+
+    with _lock:
+        _cache[clave] = (firma, libro)
+        _cache.move_to_end(clave)
+        while len(_cache) > _capacidad:
+            _cache.popitem(last=False)
+            _estadisticas["desalojos"] += 1
+
+    return libro
+
+
+def invalidar_libro(ruta):
+    """Descarta del caché el libro de una ruta (llamar al escribirlo o borrarlo)."""
+    with _lock:
+        if _cache.pop(str(ruta), None) is not None:
+            _estadisticas["invalidaciones"] += 1
+
+
+def vaciar_cache():
+    """Descarta todos los libros cacheados (las estadísticas se conservan)."""
+    with _lock:
+        _cache.clear()
+
+
+def configurar_capacidad(capacidad):
+    """Cambia la cantidad máxima de libros cacheados."""
+    global _capacidad
+    _capacidad = max(0, int(capacidad))
+    with _lock:
+        while len(_cache) > _capacidad:
+            _cache.popitem(last=False)
+            _estadisticas["desalojos"] += 1
+
+
+def estadisticas_cache():
+    """
+    Returns:
+        dict: aciertos, fallos, desalojos, invalidaciones, tasa_aciertos,
+              tamano y capacidad del caché
+    """
+    consultas = _estadisticas["aciertos"] + _estadisticas["fallos"]
+    return dict(
+        _estadisticas,
+        tasa_aciertos=_estadisticas["aciertos"] / consultas if consultas else 0.0,
+        tamano=len(_cache),
+        capacidad=_capacidad
+    )
+
+
+def reiniciar_estadisticas():
+    for clave in _estadisticas:
+        _estadisticas[clave] = 0
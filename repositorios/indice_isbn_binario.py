@@ -0,0 +1,190 @@
+"""
+Índice ISBN binario compacto, leído con mmap.
+
+Es una copia de indice_isbn.json pensada solo para búsquedas: no hace falta
+parsear todo el JSON antes de la primera consulta, y una búsqueda toca unas
+pocas páginas del archivo.
+
+Formato de data/libros/indice_isbn.bin (enteros little-endian):
+
+    cabecera  MAGIA (8 bytes) | versión u32 | cantidad u32
+    claves    cantidad x 13 bytes: ISBN normalizado en ASCII, completado con NUL
+    offsets   (cantidad + 1) x u64: inicio de cada entrada en el blob
+    blob      entradas del índice en JSON compacto (isbn, title, autor, genero,
+              total, disponibles, ejemplares)
+
+Las claves quedan en el mismo orden que el índice JSON (orden de los ISBN
+normalizados); completar con NUL a la derecha conserva ese orden byte a byte.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+
+ARCHIVO = "indice_isbn.bin"
+MAGIA = b"BIBISBN\x01"
+VERSION = 1
+ANCHO_CLAVE = 13
+_CABECERA = struct.Struct("<8sII")
+_OFFSET = struct.Struct("<Q")
+
+# Índice abierto y firma (inodo, mtime_ns, tamaño) del archivo mapeado
+_indice_binario_cache = None
+_firma_cache = None
+
+
+def clave_isbn(isbn_normalizado):
+    """
+    Convierte un ISBN normalizado en su clave de ancho fijo, o None si no
+    entra en 13 bytes ASCII (en ese caso no se puede usar el índice binario).
+    """
+    try:
+        clave = isbn_normalizado.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+    if len(clave) > ANCHO_CLAVE:
+        return None
+    return clave.ljust(ANCHO_CLAVE, b"\x00")
+
+
+class _Claves:
+    """Secuencia de solo lectura sobre las claves del mmap (para bisect)."""
+
+    def __init__(self, mm, cantidad):
+        self._mm = mm
+        self._cantidad = cantidad
+
+    def __len__(self):
+        return self._cantidad
+
+    def __getitem__(self, posicion):
+        # Se copian los 13 bytes de la clave: bisect compara con <, y un
+        # memoryview del mmap no admite comparaciones de orden (bytes sí)
+        inicio = _CABECERA.size + posicion * ANCHO_CLAVE
+        return self._mm[inicio:inicio + ANCHO_CLAVE]
+
+
+class IndiceISBNBinario:
+    """Índice ISBN binario mapeado en memoria."""
+
+    def __init__(self, ruta):
+        with open(ruta, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magia, version, cantidad = _CABECERA.unpack_from(self._mm, 0)
+        except struct.error:
+            self._mm.close()
+            raise
+        if magia != MAGIA or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{ruta} no es un índice ISBN binario válido")
+
+        self._cantidad = cantidad
+        self._claves = _Claves(self._mm, cantidad)
+        self._offset_offsets = _CABECERA.size + cantidad * ANCHO_CLAVE
+        self._offset_blob = self._offset_offsets + (cantidad + 1) * _OFFSET.size
+
+    def __len__(self):
+        return self._cantidad
+
+    def entrada(self, posicion):
+        """Entrada completa del índice en la posición indicada."""
+        inicio, fin = struct.unpack_from("<QQ", self._mm, self._offset_offsets + posicion * _OFFSET.size)
+        return json.loads(self._mm[self._offset_blob + inicio:self._offset_blob + fin])
+
+    def buscar(self, isbn_normalizado):
+        """
+        Búsqueda binaria sobre las claves crudas.
+
+        Returns:
+            dict: Entrada del índice (isbn, title, autor, genero, total,
+                  disponibles, ejemplares) o None
+        """
+        clave = clave_isbn(isbn_normalizado)
+        if clave is None:
+            return None
+        posicion = bisect.bisect_left(self._claves, clave)
+        if posicion < self._cantidad and self._claves[posicion] == clave:
+            return self.entrada(posicion)
+        return None
+
+
+def guardar_indice_binario(dir_libros, indice):
+    """
+    Escribe el índice binario a partir del índice ISBN (lista ordenada).
+    Si algún ISBN no entra en una clave de 13 bytes no se genera (y se borra
+    el anterior): las búsquedas usan entonces el índice JSON.
+
+    Returns:
+        str: Checksum SHA-256 del archivo, o None si no se generó
+    """
+    ruta = dir_libros / ARCHIVO
+    claves = [clave_isbn(entrada["isbn"]) for entrada in indice]
+
+    if any(clave is None for clave in claves) or claves != sorted(claves):
+        if ruta.exists():
+            ruta.unlink()
+        invalidar_cache_binario()
+        return None
+
+    blob = bytearray()
+    offsets = [0]
+    for entrada in indice:
+        blob += json.dumps(entrada, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        offsets.append(len(blob))
+
+    contenido = b"".join([
+        _CABECERA.pack(MAGIA, VERSION, len(indice)),
+        b"".join(claves),
+        struct.pack(f"<{len(offsets)}Q", *offsets),
+        bytes(blob)
+    ])
+
+    tmp = ruta.with_name(ruta.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(contenido)
+    os.replace(tmp, ruta)
+    invalidar_cache_binario()
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def abrir_indice_binario(dir_libros):
+    """
+    Devuelve el índice binario (abierto una vez y reabierto si el archivo
+    cambia), o None si no existe o no es válido.
+    """
+    global _indice_binario_cache, _firma_cache
+
+    ruta = dir_libros / ARCHIVO
+    try:
+        stat = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+
+    firma = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if _indice_binario_cache is None or firma != _firma_cache:
+        # El mapeo anterior apunta a un archivo ya reemplazado: se descarta
+        invalidar_cache_binario()
+        try:
+            _indice_binario_cache = IndiceISBNBinario(ruta)
+        except (OSError, ValueError, struct.error):
+            return None
+        _firma_cache = firma
+
+    return _indice_binario_cache
+
+
+def invalidar_cache_binario():
+    """
+    Descarta el índice binario abierto. El mapeo no se cierra acá: otro hilo
+    puede estar en medio de una búsqueda sobre él; se libera cuando nadie
+    más lo referencia.
+    """
+    global _indice_binario_cache, _firma_cache
+    _indice_binario_cache = None
+    _firma_cache = None
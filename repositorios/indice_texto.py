@@ -0,0 +1,257 @@
+"""
+Índice invertido para la búsqueda por texto libre.
+Indexa tokens normalizados y trigramas de caracteres de título, autor e ISBN,
+con postings que apuntan al libro_id de cada ejemplar.
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+
+# Índice cacheado en memoria:
+# {"documentos": {libro_id: metadatos}, "tokens": {token: set}, "trigramas": {trigrama: set}}
+_indice_texto_cache = None
+
+# Campos del libro que se indexan (los mismos que revisa la búsqueda)
+CAMPOS_INDEXADOS = ("title", "autor", "isbn")
+
+# Columnas de metadatos que se guardan por documento
+_COLUMNAS = ("title", "autor", "isbn", "genero")
+
+
+def normalizar_texto(texto):
+    """Pasa a minúsculas y quita acentos, para comparar texto sin importar el formato."""
+    texto = unicodedata.normalize("NFKD", (texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Devuelve el conjunto de tokens (secuencias alfanuméricas) del texto normalizado."""
+    return set(re.findall(r"\w+", normalizar_texto(texto)))
+
+
+def trigramas(texto):
+    """Devuelve el conjunto de trigramas de caracteres del texto normalizado."""
+    texto = normalizar_texto(texto)
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _terminos_documento(documento):
+    """Calcula los tokens y trigramas de todos los campos indexados de un documento."""
+    tokens = set()
+    trigs = set()
+    for campo in CAMPOS_INDEXADOS:
+        valor = documento.get(campo) or ""
+        tokens |= tokenizar(valor)
+        trigs |= trigramas(valor)
+    return tokens, trigs
+
+
+def _indice_vacio():
+    return {"documentos": {}, "tokens": {}, "trigramas": {}}
+
+
+def cargar_indice_texto(dir_libros):
+    """
+    Carga el índice de texto en memoria.
+
+    Args:
+        dir_libros (Path): Directorio donde se guarda indice_texto.json
+
+    Returns:
+        dict: Índice en memoria, o None si el archivo no existe o es inválido
+    """
+    global _indice_texto_cache
+
+    if _indice_texto_cache is None:
+        try:
+            with open(dir_libros / "indice_texto.json", "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # En disco los postings guardan la posición del documento en la lista
+        ids = [fila[0] for fila in datos["documentos"]]
+        _indice_texto_cache = {
+            "documentos": {fila[0]: dict(zip(_COLUMNAS, fila[1:])) for fila in datos["documentos"]},
+            "tokens": {t: {ids[n] for n in posiciones} for t, posiciones in datos["tokens"].items()},
+            "trigramas": {t: {ids[n] for n in posiciones} for t, posiciones in datos["trigramas"].items()}
+        }
+
+    return _indice_texto_cache
+
+
+def guardar_indice_texto(dir_libros):
+    """
+    Guarda el índice de texto en disco. Se escribe en un temporal y se
+    reemplaza el archivo, así otro proceso (el servidor, la API) nunca lee
+    un índice a medio escribir.
+
+    Returns:
+        str: Checksum SHA-256 del archivo guardado
+    """
+    indice = _indice_texto_cache if _indice_texto_cache is not None else _indice_vacio()
+
+    # Los libro_id se reemplazan por su posición para que el archivo sea compacto
+    posiciones = {libro_id: n for n, libro_id in enumerate(indice["documentos"])}
+    datos = {
+        "documentos": [
+            [libro_id] + [documento[c] for c in _COLUMNAS]
+            for libro_id, documento in indice["documentos"].items()
+        ],
+        "tokens": {t: sorted(posiciones[i] for i in ids) for t, ids in sorted(indice["tokens"].items())},
+        "trigramas": {t: sorted(posiciones[i] for i in ids) for t, ids in sorted(indice["trigramas"].items())}
+    }
+    contenido = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+    tmp = dir_libros / "indice_texto.json.tmp"
+    with open(tmp, "wb") as f:
+        f.write(contenido)
+    os.replace(tmp, dir_libros / "indice_texto.json")
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def invalidar_cache_texto():
+    """Descarta el índice de texto en memoria."""
+    global _indice_texto_cache
+    _indice_texto_cache = None
+
+
+def reemplazar_documentos(documentos, conservar=None):
+    """
+    Arma el índice en memoria a partir de un diccionario de documentos.
+
+    Args:
+        documentos (dict): libro_id -> metadatos (title, autor, isbn, genero)
+        conservar (callable, optional): Si se indica, se conservan además los
+            documentos actuales para los que conservar(documento) sea True.
+    """
+    global _indice_texto_cache
+
+    anterior = _indice_texto_cache
+    _indice_texto_cache = _indice_vacio()
+
+    if conservar is not None and anterior is not None:
+        for libro_id, documento in anterior["documentos"].items():
+            if conservar(documento):
+                indexar_documento(libro_id, documento)
+
+    for libro_id, documento in documentos.items():
+        indexar_documento(libro_id, documento)
+
+
+def metadatos_documento(libro, genero):
+    """Extrae del libro los metadatos que guarda el índice de texto."""
+    return {
+        "title": libro.get("title") or "",
+        "autor": libro.get("autor") or "",
+        "isbn": libro.get("isbn") or "",
+        "genero": genero
+    }
+
+
+def indexar_documento(libro_id, documento):
+    """
+    Agrega (o reemplaza) un documento en el índice en memoria.
+
+    Args:
+        libro_id (str): ID del ejemplar
+        documento (dict): Metadatos (ver metadatos_documento)
+    """
+    global _indice_texto_cache
+
+    if _indice_texto_cache is None:
+        _indice_texto_cache = _indice_vacio()
+
+    quitar_documento(libro_id)
+
+    indice = _indice_texto_cache
+    indice["documentos"][libro_id] = documento
+    tokens, trigs = _terminos_documento(documento)
+    for token in tokens:
+        indice["tokens"].setdefault(token, set()).add(libro_id)
+    for trigrama in trigs:
+        indice["trigramas"].setdefault(trigrama, set()).add(libro_id)
+
+
+def quitar_documento(libro_id):
+    """
+    Quita un documento del índice en memoria.
+
+    Returns:
+        bool: True si el documento estaba indexado
+    """
+    indice = _indice_texto_cache
+    if indice is None or libro_id not in indice["documentos"]:
+        return False
+
+    documento = indice["documentos"].pop(libro_id)
+    tokens, trigs = _terminos_documento(documento)
+    for clave, terminos in (("tokens", tokens), ("trigramas", trigs)):
+        postings = indice[clave]
+        for termino in terminos:
+            ids = postings.get(termino)
+            if ids is not None:
+                ids.discard(libro_id)
+                if not ids:
+                    del postings[termino]
+    return True
+
+
+def _candidatos(indice, consulta):
+    """
+    Devuelve los libro_id candidatos para una consulta (ya normalizada).
+    Es un superconjunto de los resultados: luego se verifican con los metadatos.
+    """
+    if len(consulta) >= 3:
+        # Intersección de postings de los trigramas, empezando por el más selectivo
+        postings = []
+        for trigrama in trigramas(consulta):
+            ids = indice["trigramas"].get(trigrama)
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        candidatos = set(postings[0])
+        for ids in postings[1:]:
+            candidatos &= ids
+        return candidatos
+
+    if consulta.isalnum():
+        # Consultas cortas: unión de postings de los tokens que la contienen
+        candidatos = set()
+        for token, ids in indice["tokens"].items():
+            if consulta in token:
+                candidatos |= ids
+        return candidatos
+
+    return set(indice["documentos"])
+
+
+def buscar(indice, texto_busqueda):
+    """
+    Busca coincidencias de texto en título, autor o ISBN usando el índice.
+
+    Args:
+        indice (dict): Índice en memoria (ver cargar_indice_texto)
+        texto_busqueda (str): Texto a buscar
+
+    Returns:
+        list: Tuplas (libro_id, metadatos) que coinciden, ordenadas por género y título
+    """
+    texto_busqueda = texto_busqueda.lower()
+    candidatos = _candidatos(indice, normalizar_texto(texto_busqueda))
+
+    resultados = []
+    for libro_id in candidatos:
+        documento = indice["documentos"][libro_id]
+        # Verificación exacta (misma regla que la búsqueda recursiva)
+        if (texto_busqueda in documento["title"].lower() or
+                texto_busqueda in documento["autor"].lower() or
+                texto_busqueda in documento["isbn"].lower()):
+            resultados.append((libro_id, documento))
+
+    resultados.sort(key=lambda r: (r[1]["genero"], r[1]["title"], r[0]))
+    return resultados
@@ -0,0 +1,188 @@
+"""
+Agregados de préstamos en archivos JSON (data/prestamos/agregados.json,
+ver utils/agregados.py).
+
+Se actualizan dentro de la misma transacción que registra el préstamo o la
+devolución. En memoria se mantienen además dos rankings (libros y usuarios)
+para servir los top-N de los reportes.
+"""
+
+import json
+
+from repositorios.json_libros import ubicar_libro
+from utils import agregados as logica
+from utils import rutas
+from utils.instrumentacion import instrumentar_modulo
+from utils.transacciones import Transaccion
+
+# Agregados en memoria, firma (inodo, mtime_ns, tamaño) del archivo leído y rankings
+_agregados_cache = None
+_firma_cache = None
+_rankings = None
+
+
+def _archivo_agregados():
+    return rutas.obtener_directorio_prestamos() / "agregados.json"
+
+
+def _firma_agregados():
+    try:
+        stat = _archivo_agregados().stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _genero_de_libro(libro_id):
+    ubicacion = ubicar_libro(libro_id)
+    return ubicacion["genero"] if ubicacion else None
+
+
+def calcular_agregados():
+    """Calcula los agregados desde cero a partir de todos los préstamos."""
+    # Import diferido: json_prestamos usa este módulo al registrar préstamos
+    from repositorios.json_prestamos import iterar_prestamos
+
+    return logica.calcular_agregados((item["prestamo"] for item in iterar_prestamos()), _genero_de_libro)
+
+
+def guardar_agregados(agregados):
+    """Reemplaza agregados.json en una transacción."""
+    global _agregados_cache, _firma_cache, _rankings
+
+    with Transaccion() as transaccion:
+        transaccion.escribir_json(_archivo_agregados(), agregados)
+    _agregados_cache = None
+    _firma_cache = None
+    _rankings = None
+
+
+def cargar_agregados():
+    """
+    Devuelve los agregados actuales. Se leen una vez y se mantienen en
+    memoria; si el archivo no existe se calculan desde cero y se guardan.
+    No deben modificarse.
+
+    Returns:
+        dict: prestamos_por_libro, prestamos_por_usuario, por_genero y activos
+    """
+    global _agregados_cache, _firma_cache, _rankings
+
+    firma = _firma_agregados()
+    if _agregados_cache is not None and firma == _firma_cache:
+        return _agregados_cache
+
+    if firma is None:
+        agregados = calcular_agregados()
+        guardar_agregados(agregados)
+    else:
+        with open(_archivo_agregados(), "r", encoding="utf-8") as f:
+            agregados = json.load(f)
+
+    _agregados_cache = agregados
+    _firma_cache = _firma_agregados()
+    _rankings = None
+    return _agregados_cache
+
+
+def _adoptar_agregados(agregados):
+    """
+    Después de confirmar, el caché pasa a ser el diccionario que escribió
+    la transacción (el mismo contenido que el archivo), sin releerlo.
+    """
+    global _agregados_cache, _firma_cache
+    _agregados_cache = agregados
+    _firma_cache = _firma_agregados()
+
+
+def _modificar_agregados(transaccion, funcion):
+    """
+    Programa en la transacción una modificación de los agregados. Si otro
+    proceso los cambia antes del commit, la modificación se vuelve a aplicar
+    sobre el archivo actual.
+
+    Returns:
+        callable: Después del commit indica si los rankings en memoria siguen
+                  al día (ningún otro proceso cambió los agregados)
+    """
+    archivo = _archivo_agregados()
+    if not archivo.exists() and transaccion.leer_json(archivo, None) is None:
+        transaccion.escribir_json(archivo, calcular_agregados())
+    al_dia = _agregados_cache is not None and _firma_cache == _firma_agregados()
+    aplicaciones = []
+
+    def aplicar(agregados):
+        funcion(agregados)
+        aplicaciones.append(True)
+
+    transaccion.modificar_json(archivo, None, aplicar)
+    return lambda: al_dia and len(aplicaciones) == 1
+
+
+def registrar_prestamo(transaccion, libro_id, user_id, genero):
+    """
+    Programa en la transacción la actualización de los agregados por un
+    préstamo. Al confirmarse, se actualizan también el caché en memoria y
+    los rankings (sin releer el archivo ni rearmar el heap).
+    """
+    rankings_al_dia = _modificar_agregados(
+        transaccion, lambda agregados: logica.sumar_prestamo(agregados, libro_id, user_id, genero))
+
+    def aplicar_en_memoria():
+        global _rankings
+        _adoptar_agregados(transaccion.leer_json(_archivo_agregados(), None))
+        if _rankings is None:
+            return
+        if rankings_al_dia():
+            _rankings["libros"].incrementar(libro_id)
+            _rankings["usuarios"].incrementar(user_id)
+        else:
+            _rankings = None
+
+    transaccion.al_confirmar(aplicar_en_memoria)
+
+
+def registrar_devolucion(transaccion, genero):
+    """Programa en la transacción la actualización de los agregados por una devolución."""
+    rankings_al_dia = _modificar_agregados(
+        transaccion, lambda agregados: logica.sumar_devolucion(agregados, genero))
+
+    def aplicar_en_memoria():
+        global _rankings
+        _adoptar_agregados(transaccion.leer_json(_archivo_agregados(), None))
+        if not rankings_al_dia():
+            _rankings = None
+
+    transaccion.al_confirmar(aplicar_en_memoria)
+
+
+def _obtener_rankings():
+    global _rankings
+
+    agregados = cargar_agregados()
+    if _rankings is None:
+        _rankings = {
+            "libros": logica.Ranking(agregados["prestamos_por_libro"]),
+            "usuarios": logica.Ranking(agregados["prestamos_por_usuario"])
+        }
+    return _rankings
+
+
+def top_libros(n):
+    """
+    Returns:
+        list: Tuplas (libro_id, préstamos) de los n libros más prestados
+    """
+    return _obtener_rankings()["libros"].top(n)
+
+
+def top_usuarios(n):
+    """
+    Returns:
+        list: Tuplas (user_id, préstamos) de los n usuarios con más préstamos
+    """
+    return _obtener_rankings()["usuarios"].top(n)
+
+
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals())
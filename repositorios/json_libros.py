@@ -0,0 +1,1570 @@
+"""
+Libros en archivos JSON (data/libros/<genero>/<libro_id>.json) y sus índices.
+
+Implementa la búsqueda binaria por ISBN y la búsqueda recursiva por texto
+libre que usa RepositorioLibrosJSON, y mantiene los índices ISBN, de IDs y
+de texto con cada alta, modificación o baja de un libro.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+from pathlib import Path
+from repositorios import cache_libros, indice_isbn_binario, indice_texto
+from utils import rutas, segmento_catalogo
+from utils.bloqueos import bloqueo_escritura
+from utils.isbn import normalizar_isbn
+from utils.instrumentacion import instrumentar_modulo
+
+
+# Variable global para cachear el índice en memoria
+_indice_isbn_cache = None
+
+# Índice libro_id -> ubicación del ejemplar, cacheado en memoria
+_indice_ids_cache = None
+
+# Diario de disponibilidad: cada préstamo o devolución agrega una línea
+# {"libro_id", "isbn", "disponible"} en la misma transacción que el libro,
+# en lugar de reescribir los índices. volcar_disponibilidad() incorpora las
+# líneas al índice y lo vacía (al compactar los préstamos y al iniciar).
+DIARIO_DISPONIBILIDAD = 'disponibilidad.jsonl'
+
+# Estado de los índices en memoria respecto de los archivos: firma de
+# indice_isbn.json con la que se cargaron, posición leída del diario de
+# disponibilidad y cambios leídos (libro_id -> (isbn, disponible))
+_estado_indices = {"firma": None, "offset": 0, "cambios": {}}
+
+# Archivos de índice que conviven con las carpetas de géneros y no son libros
+_ARCHIVOS_INDICE = {'indice_isbn.json', 'indice_ids.json', 'indice_texto.json', 'manifiesto_indice.json'}
+
+# Formato de las entradas del índice ISBN. Se guarda en el manifiesto: un
+# índice de otra versión se reconstruye al iniciar.
+# 2: contadores 'total' y 'disponibles' por ISBN y 'disponible' por ejemplar
+VERSION_INDICE = 2
+
+
+def _firma_archivo_indice():
+    """Devuelve (inodo, mtime_ns, tamaño) de indice_isbn.json, o None si no existe."""
+    try:
+        stat = (rutas.obtener_directorio_libros() / 'indice_isbn.json').stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _ruta_diario_disponibilidad():
+    return rutas.obtener_directorio_libros() / DIARIO_DISPONIBILIDAD
+
+
+def _actualizar_estado_indices():
+    """
+    Revalida los índices en memoria contra los archivos.
+    Si otro proceso guardó el índice (cambió la firma de indice_isbn.json,
+    que se escribe después de los demás) o vació el diario de
+    disponibilidad, se descartan los índices cacheados. Si no, solo se leen
+    las líneas nuevas del diario y se aplican al índice en memoria.
+
+    Returns:
+        dict: libro_id -> (isbn, disponible) con los cambios del diario
+    """
+    global _indice_isbn_cache, _indice_ids_cache
+
+    try:
+        tamano = _ruta_diario_disponibilidad().stat().st_size
+    except FileNotFoundError:
+        tamano = 0
+
+    firma = _firma_archivo_indice()
+    if firma != _estado_indices["firma"] or tamano < _estado_indices["offset"]:
+        _indice_isbn_cache = None
+        _indice_ids_cache = None
+        indice_texto.invalidar_cache_texto()
+        _estado_indices.update(firma=firma, offset=0, cambios={})
+
+    if tamano > _estado_indices["offset"]:
+        with open(_ruta_diario_disponibilidad(), 'rb') as f:
+            f.seek(_estado_indices["offset"])
+            datos = f.read()
+        # Una línea final incompleta se lee cuando se termine de escribir
+        consumido = datos.rfind(b"\n") + 1
+        for linea in datos[:consumido].splitlines():
+            try:
+                cambio = json.loads(linea)
+                libro_id, isbn, disponible = cambio["libro_id"], cambio["isbn"], cambio["disponible"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+            _estado_indices["cambios"][libro_id] = (isbn, disponible)
+            if _indice_isbn_cache is not None:
+                _marcar_en_indice(_indice_isbn_cache, libro_id, isbn, disponible)
+        _estado_indices["offset"] += consumido
+
+    return _estado_indices["cambios"]
+
+
+def _checksum_archivo(ruta):
+    """Calcula el checksum SHA-256 del contenido de un archivo."""
+    with open(ruta, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _cargar_manifiesto():
+    """Carga el manifiesto de frescura del índice, o None si no existe o es inválido."""
+    archivo_manifiesto = rutas.obtener_directorio_libros() / 'manifiesto_indice.json'
+    try:
+        with open(archivo_manifiesto, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _guardar_manifiesto(actualizar=None, **checksums):
+    """
+    Guarda el manifiesto de frescura junto al índice: mtime y cantidad de
+    archivos de cada carpeta de género, y los checksums de los índices.
+    Solo se vuelven a contar los archivos de los géneros cuyo mtime cambió.
+
+    Args:
+        actualizar (set, optional): Si se indica, solo se registra el estado
+                                    actual de esos géneros y el resto conserva
+                                    el anterior (así un cambio hecho fuera de
+                                    la aplicación se sigue detectando al iniciar)
+    """
+    dir_libros = rutas.obtener_directorio_libros()
+    anterior = (_cargar_manifiesto() or {}).get("generos", {})
+    generos = {}
+
+    if actualizar is not None:
+        generos = {genero: datos for genero, datos in anterior.items() if genero not in actualizar}
+
+    for item in sorted(dir_libros.iterdir()):
+        if not item.is_dir() or (actualizar is not None and item.name not in actualizar):
+            continue
+        mtime_ns = item.stat().st_mtime_ns
+        if item.name in anterior and anterior[item.name]["mtime_ns"] == mtime_ns:
+            archivos = anterior[item.name]["archivos"]
+        else:
+            archivos = sum(1 for a in os.listdir(item) if a.endswith(".json"))
+        generos[item.name] = {"mtime_ns": mtime_ns, "archivos": archivos}
+
+    manifiesto = dict(checksums, generos=dict(sorted(generos.items())))
+    with open(dir_libros / 'manifiesto_indice.json', 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=4)
+
+
+def _guardar_indice_isbn(indice, solo_isbn=False, generos=None):
+    """
+    Guarda el índice ISBN (JSON y binario), el índice de IDs y el índice de
+    texto en disco, y actualiza su manifiesto de frescura. El índice en
+    memoria ya incluye los cambios del diario de disponibilidad, que se vacía.
+
+    indice_isbn.json se reemplaza al final: otros procesos lo usan para
+    saber que los índices cambiaron y volver a cargarlos.
+
+    Args:
+        indice (list): Índice ISBN ordenado
+        solo_isbn (bool): Si es True solo se reescribe el índice ISBN (por
+                          ejemplo, al volcar la disponibilidad); los índices
+                          de IDs y de texto no cambian
+        generos (set, optional): Géneros cuyo estado se registra en el
+                                 manifiesto (por defecto, todos)
+    """
+    global _indice_ids_cache
+
+    dir_libros = rutas.obtener_directorio_libros()
+    contenido = json.dumps(indice, ensure_ascii=False, indent=4).encode('utf-8')
+
+    anterior = _cargar_manifiesto() if solo_isbn else None
+    if anterior and anterior.get("checksum_ids") and anterior.get("checksum_texto"):
+        checksum_ids = anterior["checksum_ids"]
+        checksum_texto = anterior["checksum_texto"]
+    else:
+        if _indice_ids_cache is None:
+            _indice_ids_cache = _derivar_indice_ids(indice)
+        contenido_ids = json.dumps(_indice_ids_cache, ensure_ascii=False, indent=4).encode('utf-8')
+        _reemplazar_archivo(dir_libros / 'indice_ids.json', contenido_ids)
+        checksum_ids = hashlib.sha256(contenido_ids).hexdigest()
+        checksum_texto = indice_texto.guardar_indice_texto(dir_libros)
+
+    checksum_binario = indice_isbn_binario.guardar_indice_binario(dir_libros, indice)
+
+    _reemplazar_archivo(dir_libros / 'indice_isbn.json', contenido)
+
+    # El índice guardado ya incluye los cambios del diario de disponibilidad
+    diario = _ruta_diario_disponibilidad()
+    if diario.exists():
+        with open(diario, 'wb'):
+            pass
+    _estado_indices.update(firma=_firma_archivo_indice(), offset=0, cambios={})
+
+    _guardar_manifiesto(
+        actualizar=generos,
+        version=VERSION_INDICE,
+        checksum=hashlib.sha256(contenido).hexdigest(),
+        checksum_ids=checksum_ids,
+        checksum_texto=checksum_texto,
+        checksum_binario=checksum_binario
+    )
+
+
+def _reemplazar_archivo(ruta, contenido):
+    """Escribe un archivo de forma atómica: otros procesos lo leen sin tomar el bloqueo."""
+    tmp = ruta.with_name(ruta.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(contenido)
+    os.replace(tmp, ruta)
+
+
+def _derivar_indice_ids(indice):
+    """
+    Arma el índice libro_id -> ubicación a partir del índice ISBN.
+
+    Returns:
+        dict: libro_id -> {'genero', 'ruta', 'isbn'}
+    """
+    indice_ids = {}
+    for entrada in indice:
+        for ejemplar in entrada["ejemplares"]:
+            indice_ids[ejemplar["libro_id"]] = {
+                "genero": Path(ejemplar["ruta"]).parent.name,
+                "ruta": ejemplar["ruta"],
+                "isbn": entrada["isbn"]
+            }
+    return indice_ids
+
+
+def cargar_indice_ids():
+    """
+    Carga en memoria el índice libro_id -> ubicación (genero, ruta, isbn).
+    Si el archivo no existe se deriva del índice ISBN, sin leer ningún libro.
+    Se vuelve a cargar si otro proceso guardó los índices.
+
+    Returns:
+        dict: libro_id -> {'genero', 'ruta', 'isbn'}
+    """
+    global _indice_ids_cache
+
+    _actualizar_estado_indices()
+    if _indice_ids_cache is None:
+        archivo_ids = rutas.obtener_directorio_libros() / 'indice_ids.json'
+        try:
+            with open(archivo_ids, 'r', encoding='utf-8') as f:
+                _indice_ids_cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _indice_ids_cache = _derivar_indice_ids(cargar_indice_isbn())
+
+    return _indice_ids_cache
+
+
+def ubicar_libro(libro_id):
+    """
+    Devuelve la ubicación de un ejemplar en O(1) usando el índice de IDs.
+
+    Args:
+        libro_id (str): ID único del ejemplar
+
+    Returns:
+        dict: {'genero', 'ruta', 'isbn'} con la ruta relativa a la raíz del proyecto,
+              o None si el ejemplar no está indexado
+    """
+    return cargar_indice_ids().get(libro_id)
+
+
+def cargar_indice_isbn():
+    """
+    Carga el índice de ISBNs en memoria (ordenado), con los cambios del
+    diario de disponibilidad aplicados. Se vuelve a cargar si otro proceso
+    guardó el índice.
+
+    Returns:
+        list: Lista de entradas del índice ordenadas por ISBN
+    """
+    global _indice_isbn_cache
+
+    cambios = _actualizar_estado_indices()
+    if _indice_isbn_cache is None:
+        archivo_indice = rutas.obtener_directorio_libros() / 'indice_isbn.json'
+        with open(archivo_indice, 'r', encoding='utf-8') as f:
+            _indice_isbn_cache = json.load(f)
+        for libro_id, (isbn, disponible) in cambios.items():
+            _marcar_en_indice(_indice_isbn_cache, libro_id, isbn, disponible)
+
+    return _indice_isbn_cache
+
+
+def invalidar_cache_indice():
+    """
+    Invalida el caché del índice ISBN para forzar una recarga en la próxima búsqueda.
+    Debe llamarse cuando se agregan, modifican o eliminan libros del índice.
+    """
+    global _indice_isbn_cache, _indice_ids_cache
+    _indice_isbn_cache = None
+    _indice_ids_cache = None
+    _estado_indices.update(firma=None, offset=0, cambios={})
+    indice_texto.invalidar_cache_texto()
+    indice_isbn_binario.invalidar_cache_binario()
+
+
+def _indexar_genero(dir_libros, genero, indice_temp, documentos):
+    """
+    Lee todos los archivos de un género y agrupa sus ejemplares por ISBN.
+
+    Args:
+        dir_libros (Path): Directorio raíz de los libros
+        genero (str): Nombre de la carpeta del género
+        indice_temp (dict): Diccionario ISBN -> entrada (modificado por referencia)
+        documentos (dict): libro_id -> metadatos para el índice de texto
+                           (modificado por referencia)
+    """
+    ruta_genero = dir_libros / genero
+
+    # Recorrer todos los archivos JSON del género
+    for archivo in os.listdir(ruta_genero):
+        if not archivo.endswith(".json"):
+            continue
+
+        ruta_archivo = ruta_genero / archivo
+
+        try:
+            with open(ruta_archivo, "r", encoding="utf-8") as f:
+                libro = json.load(f)
+
+            # Extraer datos necesarios
+            isbn = libro.get("isbn")
+            libro_id = libro.get("libro_id")
+            title = libro.get("title")
+            autor = libro.get("autor")
+
+            # Validar que tenga los campos mínimos
+            if not isbn or not libro_id:
+                continue
+
+            # Normalizar ISBN
+            isbn_normalizado = normalizar_isbn(isbn)
+
+            # Si el ISBN no existe en el diccionario temporal, crearlo
+            if isbn_normalizado not in indice_temp:
+                indice_temp[isbn_normalizado] = {
+                    "isbn": isbn_normalizado,
+                    "title": title,
+                    "autor": autor,
+                    "genero": genero,
+                    "total": 0,
+                    "disponibles": 0,
+                    "ejemplares": []
+                }
+
+            # Agregar el ejemplar
+            ruta_relativa = _ruta_relativa_ejemplar(genero, libro_id)
+            indice_temp[isbn_normalizado]["ejemplares"].append({
+                "libro_id": libro_id,
+                "ruta": ruta_relativa,
+                "disponible": libro.get("disponible", True) is not False
+            })
+            documentos[libro_id] = indice_texto.metadatos_documento(libro, genero)
+
+        except (json.JSONDecodeError, KeyError, IOError):
+            # Ignorar archivos con errores
+            continue
+
+
+def _indexar_genero_parcial(dir_libros, genero):
+    """
+    Indexa un único género y devuelve su diccionario parcial ISBN -> entrada
+    junto con los metadatos de texto de sus ejemplares.
+    Es la unidad de trabajo de la reconstrucción en paralelo.
+    """
+    indice_temp = {}
+    documentos = {}
+    _indexar_genero(dir_libros, genero, indice_temp, documentos)
+    return indice_temp, documentos
+
+
+def _indexar_generos_en_paralelo(dir_libros, generos, workers, usar_procesos):
+    """
+    Indexa los géneros en un pool de workers y fusiona los diccionarios parciales.
+    La fusión respeta el orden de 'generos', así el resultado es idéntico
+    al de la reconstrucción secuencial.
+
+    Returns:
+        tuple: (indice_temp, documentos)
+    """
+    # Import diferido: concurrent.futures (y multiprocessing) es costoso de
+    # importar y solo se usa al reconstruir en paralelo
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if usar_procesos:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    with pool:
+        parciales = list(pool.map(_indexar_genero_parcial, [dir_libros] * len(generos), generos))
+
+    indice_temp = {}
+    documentos = {}
+    for parcial, documentos_parcial in parciales:
+        for isbn_normalizado, entrada in parcial.items():
+            if isbn_normalizado not in indice_temp:
+                indice_temp[isbn_normalizado] = entrada
+            else:
+                indice_temp[isbn_normalizado]["ejemplares"].extend(entrada["ejemplares"])
+        documentos.update(documentos_parcial)
+
+    return indice_temp, documentos
+
+
+def reconstruir_indice_isbn(motivo=None, workers=1, usar_procesos=False):
+    """
+    Reconstruye el índice ISBN desde cero leyendo todos los archivos de libros.
+    Esto garantiza que el índice esté sincronizado con los archivos reales.
+
+    Es una operación de reparación: las altas, modificaciones y bajas de libros
+    mantienen el índice de forma incremental (ver indice_agregar_ejemplar).
+
+    Args:
+        motivo (str, optional): Razón de la reconstrucción (se muestra en consola)
+        workers (int): Cantidad de workers. Con más de 1 se reparte el trabajo
+                       por carpeta de género en un pool de concurrent.futures.
+        usar_procesos (bool): Usa un pool de procesos (True) o de hilos (False).
+                              Por defecto hilos: el trabajo es sobre todo
+                              lectura de archivos, y con procesos el costo de
+                              arrancarlos y de pasar los resultados supera
+                              a la ganancia en catálogos chicos y medianos
+                              (ver benchmarks/bench_reconstruccion.py).
+    """
+    with bloqueo_escritura():
+        _reconstruir_indice_isbn(motivo, workers, usar_procesos)
+
+
+def _reconstruir_indice_isbn(motivo, workers, usar_procesos):
+    if motivo:
+        print(f"Reconstruyendo índice ISBN ({motivo})...")
+    else:
+        print("Reconstruyendo índice ISBN...")
+
+    dir_libros = rutas.obtener_directorio_libros()
+
+    try:
+        # Solo procesar directorios, saltar archivos como indice_isbn.json
+        generos = [genero for genero in os.listdir(dir_libros) if (dir_libros / genero).is_dir()]
+
+        if workers and workers > 1 and len(generos) > 1:
+            indice_temp, documentos = _indexar_generos_en_paralelo(dir_libros, generos, workers, usar_procesos)
+        else:
+            # Diccionario temporal para agrupar ejemplares por ISBN
+            indice_temp = {}
+            documentos = {}
+            for genero in generos:
+                _indexar_genero(dir_libros, genero, indice_temp, documentos)
+
+        # Convertir el diccionario a lista y ordenar por ISBN normalizado
+        indice_lista = list(indice_temp.values())
+        indice_lista.sort(key=lambda x: normalizar_isbn(x["isbn"]))
+        for entrada in indice_lista:
+            _contar_ejemplares(entrada)
+
+        # Invalidar caché para que se recargue
+        invalidar_cache_indice()
+        indice_texto.reemplazar_documentos(documentos)
+
+        # Guardar el índice reconstruido (y los índices de IDs y de texto)
+        _guardar_indice_isbn(indice_lista)
+
+        print(f"✓ Índice reconstruido: {len(indice_lista)} ISBNs registrados")
+
+    except Exception as e:
+        print(f"Error al reconstruir índice: {e}")
+
+
+def reindexar_generos(generos):
+    """
+    Reindexa solo los géneros indicados: quita del índice sus ejemplares
+    y los vuelve a leer desde disco. El resto del índice no se toca.
+
+    Args:
+        generos (list): Nombres de las carpetas de género a reindexar
+    """
+    with bloqueo_escritura():
+        _reindexar_generos(generos)
+
+
+def _reindexar_generos(generos):
+    global _indice_ids_cache
+
+    generos = set(generos)
+    dir_libros = rutas.obtener_directorio_libros()
+    indice = cargar_indice_isbn()
+
+    # Quitar los ejemplares que pertenecen a los géneros a reindexar
+    indice_filtrado = []
+    for entrada in indice:
+        ejemplares = [e for e in entrada["ejemplares"] if Path(e["ruta"]).parent.name not in generos]
+        if ejemplares:
+            entrada["ejemplares"] = ejemplares
+            _contar_ejemplares(entrada)
+            indice_filtrado.append(entrada)
+    indice[:] = indice_filtrado
+
+    # Volver a leer los géneros que todavía existen
+    indice_temp = {}
+    documentos = {}
+    for genero in sorted(generos):
+        if (dir_libros / genero).is_dir():
+            _indexar_genero(dir_libros, genero, indice_temp, documentos)
+
+    for entrada in indice_temp.values():
+        for ejemplar in entrada["ejemplares"]:
+            _insertar_en_indice(indice, {
+                "libro_id": ejemplar["libro_id"],
+                "isbn": entrada["isbn"],
+                "title": entrada["title"],
+                "autor": entrada["autor"],
+                "disponible": ejemplar["disponible"]
+            }, Path(ejemplar["ruta"]).parent.name)
+
+    _indice_ids_cache = _derivar_indice_ids(indice)
+    indice_texto.cargar_indice_texto(dir_libros)
+    indice_texto.reemplazar_documentos(documentos, conservar=lambda d: d["genero"] not in generos)
+
+    _guardar_indice_isbn(indice)
+    print(f"✓ Índice actualizado: {len(indice)} ISBNs registrados")
+
+
+def _generos_modificados(manifiesto):
+    """
+    Compara el estado actual de las carpetas de género con el manifiesto.
+    Solo consulta el mtime de cada carpeta, por lo que el costo es O(géneros).
+
+    Returns:
+        list: Tuplas (genero, motivo) de los géneros que cambiaron
+    """
+    dir_libros = rutas.obtener_directorio_libros()
+    registrados = manifiesto.get("generos", {})
+    actuales = {item.name: item for item in dir_libros.iterdir() if item.is_dir()}
+    cambios = []
+
+    for genero, ruta_genero in sorted(actuales.items()):
+        if genero not in registrados:
+            cambios.append((genero, "género nuevo"))
+        elif ruta_genero.stat().st_mtime_ns != registrados[genero]["mtime_ns"]:
+            cambios.append((genero, "la carpeta cambió desde la última indexación"))
+
+    for genero in sorted(set(registrados) - set(actuales)):
+        cambios.append((genero, "género eliminado"))
+
+    return cambios
+
+
+def asegurar_indice_isbn(forzar=False, workers=1):
+    """
+    Verifica al inicio que el índice ISBN esté al día usando su manifiesto.
+    Si está fresco no lee ningún libro; si cambiaron algunos géneros, reindexa
+    solo esos; si falta el índice o no coincide su checksum, lo reconstruye.
+
+    La verificación se hace sin bloqueo: solo lee el manifiesto y compara
+    checksums, así varios procesos pueden arrancar a la vez. El bloqueo de
+    escritura se toma solo si hay que volcar, reindexar o reconstruir, y con
+    él tomado se vuelve a verificar todo: el índice pudo estar a medio
+    guardar por otro proceso, o ese proceso ya lo pudo haber arreglado.
+
+    Args:
+        forzar (bool): Si es True, reconstruye el índice completo sin validar
+        workers (int): Workers a usar si hace falta una reconstrucción completa
+    """
+    if not forzar and _indice_al_dia():
+        print("✓ Índice ISBN al día")
+        return
+
+    with bloqueo_escritura():
+        _asegurar_indice_isbn(forzar, workers)
+
+
+def _indice_al_dia():
+    """
+    Verificación de solo lectura (sin bloqueo) de los índices contra su
+    manifiesto.
+
+    Returns:
+        bool: True si no hay nada que regenerar, volcar ni reindexar
+    """
+    dir_libros = rutas.obtener_directorio_libros()
+    manifiesto = _cargar_manifiesto()
+    if manifiesto is None or manifiesto.get("version") != VERSION_INDICE:
+        return False
+
+    try:
+        for nombre, clave in (('indice_isbn.json', 'checksum'),
+                              ('indice_texto.json', 'checksum_texto'),
+                              ('indice_ids.json', 'checksum_ids')):
+            if _checksum_archivo(dir_libros / nombre) != manifiesto.get(clave):
+                return False
+
+        archivo_binario = dir_libros / indice_isbn_binario.ARCHIVO
+        checksum_binario = _checksum_archivo(archivo_binario) if archivo_binario.exists() else None
+        if checksum_binario != manifiesto.get("checksum_binario", ""):
+            return False
+
+        diario = _ruta_diario_disponibilidad()
+        if diario.exists() and diario.stat().st_size > 0:
+            return False
+
+        return not _generos_modificados(manifiesto)
+    except OSError:
+        # Un archivo desapareció mientras otro proceso lo reemplazaba
+        return False
+
+
+def _asegurar_indice_isbn(forzar, workers):
+    global _indice_ids_cache
+
+    if forzar:
+        reconstruir_indice_isbn("reindexado forzado con --reindex", workers=workers)
+        return
+
+    archivo_indice = rutas.obtener_directorio_libros() / 'indice_isbn.json'
+    manifiesto = _cargar_manifiesto()
+
+    if manifiesto is None or not archivo_indice.exists():
+        reconstruir_indice_isbn("no existe el índice o su manifiesto", workers=workers)
+        return
+
+    if manifiesto.get("version") != VERSION_INDICE:
+        reconstruir_indice_isbn("el formato del índice cambió", workers=workers)
+        return
+
+    if _checksum_archivo(archivo_indice) != manifiesto.get("checksum"):
+        reconstruir_indice_isbn("el contenido del índice no coincide con su manifiesto", workers=workers)
+        return
+
+    archivo_texto = rutas.obtener_directorio_libros() / 'indice_texto.json'
+    if not archivo_texto.exists() or _checksum_archivo(archivo_texto) != manifiesto.get("checksum_texto"):
+        reconstruir_indice_isbn("el índice de texto falta o no coincide con su manifiesto", workers=workers)
+        return
+
+    archivo_ids = rutas.obtener_directorio_libros() / 'indice_ids.json'
+    if not archivo_ids.exists() or _checksum_archivo(archivo_ids) != manifiesto.get("checksum_ids"):
+        print("Regenerando índice de IDs a partir del índice ISBN")
+        _indice_ids_cache = _derivar_indice_ids(cargar_indice_isbn())
+        _guardar_indice_isbn(cargar_indice_isbn())
+        manifiesto = _cargar_manifiesto()
+
+    # El índice binario no existe si algún ISBN no entra en 13 bytes (checksum None)
+    archivo_binario = rutas.obtener_directorio_libros() / indice_isbn_binario.ARCHIVO
+    checksum_binario = _checksum_archivo(archivo_binario) if archivo_binario.exists() else None
+    if checksum_binario != manifiesto.get("checksum_binario", ""):
+        print("Regenerando índice ISBN binario a partir del índice ISBN")
+        _guardar_indice_isbn(cargar_indice_isbn())
+
+    # Los préstamos y devoluciones registrados desde el último volcado
+    # cambiaron las carpetas de sus libros: se registran antes de comparar
+    if _volcar_disponibilidad():
+        manifiesto = _cargar_manifiesto()
+
+    cambios = _generos_modificados(manifiesto)
+    if not cambios:
+        print("✓ Índice ISBN al día")
+        return
+
+    for genero, motivo in cambios:
+        print(f"Reindexando género '{genero}' ({motivo})")
+    reindexar_generos([genero for genero, _ in cambios])
+
+
+def _ruta_relativa_ejemplar(genero, libro_id):
+    """Devuelve la ruta relativa (desde la raíz del proyecto) del archivo de un ejemplar."""
+    return os.path.join("data", "libros", genero, f"{libro_id}.json")
+
+
+def _cargar_indice_para_escritura():
+    """
+    Devuelve el índice en memoria listo para ser modificado, con el índice
+    de texto también cargado. Si alguno de los archivos no existe todavía,
+    reconstruye los índices una única vez.
+
+    Para modificar el índice se llama con el bloqueo de escritura tomado:
+    si otro proceso lo guardó después de que este lo leyó, se vuelve a
+    cargar desde disco y no se pierden sus cambios.
+    """
+    dir_libros = rutas.obtener_directorio_libros()
+    _actualizar_estado_indices()
+    if _indice_isbn_cache is None and not (dir_libros / 'indice_isbn.json').exists():
+        reconstruir_indice_isbn("no existe el índice")
+    elif indice_texto.cargar_indice_texto(dir_libros) is None:
+        reconstruir_indice_isbn("no existe el índice de texto")
+    return cargar_indice_isbn()
+
+
+def _posicion_isbn(indice, isbn_normalizado):
+    """
+    Búsqueda binaria de la posición de inserción de un ISBN en el índice ordenado.
+
+    Returns:
+        tuple: (posicion, encontrado)
+    """
+    posicion = bisect.bisect_left(indice, isbn_normalizado, key=lambda e: e['isbn'])
+    encontrado = posicion < len(indice) and normalizar_isbn(indice[posicion]['isbn']) == isbn_normalizado
+    return posicion, encontrado
+
+
+def _contar_ejemplares(entrada):
+    """Recalcula los contadores 'total' y 'disponibles' de una entrada del índice."""
+    ejemplares = entrada["ejemplares"]
+    entrada["total"] = len(ejemplares)
+    entrada["disponibles"] = sum(1 for e in ejemplares if e.get("disponible", True))
+
+
+def _insertar_en_indice(indice, libro, genero):
+    """
+    Inserta un ejemplar en el índice en memoria manteniendo el orden por ISBN.
+
+    Returns:
+        bool: True si el índice cambió
+    """
+    libro_id = libro.get("libro_id")
+    isbn_normalizado = normalizar_isbn(libro.get("isbn"))
+    if not libro_id or not isbn_normalizado:
+        return False
+
+    posicion, encontrado = _posicion_isbn(indice, isbn_normalizado)
+
+    if not encontrado:
+        indice.insert(posicion, {
+            "isbn": isbn_normalizado,
+            "title": libro.get("title"),
+            "autor": libro.get("autor"),
+            "genero": genero,
+            "total": 0,
+            "disponibles": 0,
+            "ejemplares": []
+        })
+
+    ejemplares = indice[posicion]["ejemplares"]
+
+    # Evitar duplicados (por ejemplo, si el índice se acaba de reconstruir)
+    if any(e["libro_id"] == libro_id for e in ejemplares):
+        return False
+
+    ruta_relativa = _ruta_relativa_ejemplar(genero, libro_id)
+    ejemplares.append({
+        "libro_id": libro_id,
+        "ruta": ruta_relativa,
+        "disponible": libro.get("disponible", True) is not False
+    })
+    _contar_ejemplares(indice[posicion])
+    cargar_indice_ids()[libro_id] = {
+        "genero": genero,
+        "ruta": ruta_relativa,
+        "isbn": isbn_normalizado
+    }
+    return True
+
+
+def indice_agregar_ejemplar(libro, genero=None):
+    """
+    Agrega un ejemplar al índice ISBN sin reconstruirlo.
+    Si el ISBN no existe se inserta una nueva entrada en su posición ordenada
+    (inserción binaria); si ya existe, se agrega el ejemplar a la entrada.
+
+    Args:
+        libro (dict): Datos del libro (libro_id, isbn, title, autor, genero)
+        genero (str, optional): Carpeta de género donde está el archivo.
+                                Por defecto se usa libro['genero'].
+    """
+    if genero is None:
+        genero = libro.get("genero")
+
+    with bloqueo_escritura():
+        indice = _cargar_indice_para_escritura()
+        if _insertar_en_indice(indice, libro, genero):
+            indice_texto.indexar_documento(libro["libro_id"], indice_texto.metadatos_documento(libro, genero))
+            _guardar_indice_isbn(indice)
+
+
+def indice_agregar_ejemplares(libros):
+    """
+    Agrega muchos ejemplares al índice ISBN de una vez (importación masiva).
+    Las entradas de ISBN nuevos se agregan al final y el índice se reordena
+    una sola vez; los índices se guardan en disco una única vez al terminar.
+
+    Args:
+        libros (iterable): Libros completos (su carpeta es libro['genero'])
+
+    Returns:
+        int: Cantidad de ejemplares agregados
+    """
+    with bloqueo_escritura():
+        return _indice_agregar_ejemplares(libros)
+
+
+def _indice_agregar_ejemplares(libros):
+    indice = _cargar_indice_para_escritura()
+    indice_ids = cargar_indice_ids()
+    entradas = {entrada["isbn"]: entrada for entrada in indice}
+    agregados = 0
+
+    for libro in libros:
+        libro_id = libro.get("libro_id")
+        isbn_normalizado = normalizar_isbn(libro.get("isbn"))
+        genero = libro.get("genero")
+        if not libro_id or not isbn_normalizado or libro_id in indice_ids:
+            continue
+
+        entrada = entradas.get(isbn_normalizado)
+        if entrada is None:
+            entrada = {
+                "isbn": isbn_normalizado,
+                "title": libro.get("title"),
+                "autor": libro.get("autor"),
+                "genero": genero,
+                "total": 0,
+                "disponibles": 0,
+                "ejemplares": []
+            }
+            entradas[isbn_normalizado] = entrada
+            indice.append(entrada)
+
+        ruta_relativa = _ruta_relativa_ejemplar(genero, libro_id)
+        disponible = libro.get("disponible", True) is not False
+        entrada["ejemplares"].append({"libro_id": libro_id, "ruta": ruta_relativa, "disponible": disponible})
+        entrada["total"] += 1
+        entrada["disponibles"] += disponible
+        indice_ids[libro_id] = {"genero": genero, "ruta": ruta_relativa, "isbn": isbn_normalizado}
+        indice_texto.indexar_documento(libro_id, indice_texto.metadatos_documento(libro, genero))
+        agregados += 1
+
+    if agregados:
+        indice.sort(key=lambda e: e["isbn"])
+        _guardar_indice_isbn(indice)
+    return agregados
+
+
+def obtener_entrada_isbn(isbn):
+    """
+    Devuelve la entrada del índice para un ISBN (title, autor, genero, los
+    contadores total y disponibles, y sus ejemplares con libro_id y
+    disponible) sin leer los archivos de los ejemplares, o None.
+    """
+    isbn_normalizado = normalizar_isbn(isbn)
+    indice_binario = indice_isbn_binario.abrir_indice_binario(rutas.obtener_directorio_libros())
+    if indice_binario is not None:
+        entrada = indice_binario.buscar(isbn_normalizado)
+        if entrada is not None:
+            # El archivo binario no incluye el diario de disponibilidad
+            cambios = _actualizar_estado_indices()
+            for ejemplar in entrada["ejemplares"]:
+                if ejemplar["libro_id"] in cambios:
+                    ejemplar["disponible"] = cambios[ejemplar["libro_id"]][1]
+            _contar_ejemplares(entrada)
+        return entrada
+
+    indice = _cargar_indice_para_escritura()
+    posicion, encontrado = _posicion_isbn(indice, isbn_normalizado)
+    return indice[posicion] if encontrado else None
+
+
+def ejemplares_disponibles(isbn):
+    """
+    (genero, libro_id) de cada ejemplar disponible de un ISBN según el
+    índice, sin leer sus archivos, o None si el ISBN no existe.
+    """
+    entrada = obtener_entrada_isbn(isbn)
+    if entrada is None:
+        return None
+    return [(Path(e["ruta"]).parent.name, e["libro_id"])
+            for e in entrada["ejemplares"] if e.get("disponible", True)]
+
+
+def indice_quitar_ejemplar(libro_id, isbn):
+    """
+    Quita un ejemplar del índice ISBN sin reconstruirlo.
+    Si era el último ejemplar del ISBN, se elimina la entrada completa.
+
+    Args:
+        libro_id (str): ID del ejemplar
+        isbn (str): ISBN del ejemplar (con o sin guiones)
+
+    Returns:
+        bool: True si el ejemplar estaba en el índice
+    """
+    with bloqueo_escritura():
+        return _indice_quitar_ejemplar(libro_id, isbn)
+
+
+def _indice_quitar_ejemplar(libro_id, isbn):
+    indice = _cargar_indice_para_escritura()
+    posicion, encontrado = _posicion_isbn(indice, normalizar_isbn(isbn))
+    if not encontrado:
+        return False
+
+    ejemplares = indice[posicion]["ejemplares"]
+    restantes = [e for e in ejemplares if e["libro_id"] != libro_id]
+    if len(restantes) == len(ejemplares):
+        return False
+
+    if restantes:
+        indice[posicion]["ejemplares"] = restantes
+        _contar_ejemplares(indice[posicion])
+    else:
+        indice.pop(posicion)
+
+    cargar_indice_ids().pop(libro_id, None)
+    indice_texto.quitar_documento(libro_id)
+
+    _guardar_indice_isbn(indice)
+    return True
+
+
+def indice_actualizar_ejemplar(libro_anterior, libro_nuevo, genero=None):
+    """
+    Actualiza en el índice ISBN los datos de un ejemplar modificado.
+    Si cambió el ISBN, el ejemplar se mueve a la entrada correspondiente.
+
+    Args:
+        libro_anterior (dict): Datos del libro antes de la modificación
+        libro_nuevo (dict): Datos del libro después de la modificación
+        genero (str, optional): Carpeta de género donde está el archivo
+    """
+    with bloqueo_escritura():
+        _indice_actualizar_ejemplar(libro_anterior, libro_nuevo, genero)
+
+
+def _indice_actualizar_ejemplar(libro_anterior, libro_nuevo, genero):
+    isbn_anterior = normalizar_isbn(libro_anterior.get("isbn"))
+    isbn_nuevo = normalizar_isbn(libro_nuevo.get("isbn"))
+
+    if isbn_anterior != isbn_nuevo:
+        indice_quitar_ejemplar(libro_anterior.get("libro_id"), isbn_anterior)
+        indice_agregar_ejemplar(libro_nuevo, genero)
+        return
+
+    indice = _cargar_indice_para_escritura()
+    posicion, encontrado = _posicion_isbn(indice, isbn_nuevo)
+    if not encontrado:
+        indice_agregar_ejemplar(libro_nuevo, genero)
+        return
+
+    if genero is None:
+        genero = libro_nuevo.get("genero")
+
+    cambio = False
+    entrada = indice[posicion]
+    if entrada["title"] != libro_nuevo.get("title") or entrada["autor"] != libro_nuevo.get("autor"):
+        entrada["title"] = libro_nuevo.get("title")
+        entrada["autor"] = libro_nuevo.get("autor")
+        cambio = True
+
+    disponible = libro_nuevo.get("disponible", True) is not False
+    for ejemplar in entrada["ejemplares"]:
+        if ejemplar["libro_id"] == libro_nuevo.get("libro_id") and ejemplar.get("disponible") != disponible:
+            ejemplar["disponible"] = disponible
+            _contar_ejemplares(entrada)
+            cambio = True
+
+    documento = indice_texto.metadatos_documento(libro_nuevo, genero)
+    if indice_texto.cargar_indice_texto(rutas.obtener_directorio_libros())["documentos"].get(libro_nuevo.get("libro_id")) != documento:
+        indice_texto.indexar_documento(libro_nuevo.get("libro_id"), documento)
+        cambio = True
+
+    if cambio:
+        _guardar_indice_isbn(indice)
+
+
+def _marcar_en_indice(indice, libro_id, isbn, disponible):
+    """Marca un ejemplar en el índice y recalcula los contadores. Returns: True si cambió"""
+    posicion, encontrado = _posicion_isbn(indice, isbn)
+    if not encontrado:
+        return False
+
+    entrada = indice[posicion]
+    for ejemplar in entrada["ejemplares"]:
+        if ejemplar["libro_id"] == libro_id:
+            if ejemplar.get("disponible", True) == disponible:
+                return False
+            ejemplar["disponible"] = disponible
+            _contar_ejemplares(entrada)
+            return True
+    return False
+
+
+def indice_registrar_disponibilidad(transaccion, libro_id, isbn, disponible):
+    """
+    Programa en la transacción el cambio de disponibilidad de un ejemplar
+    (al prestarlo o devolverlo) como una línea del diario de disponibilidad,
+    que se confirma junto con el libro. Los índices no se reescriben: las
+    búsquedas leen las líneas nuevas del diario.
+
+    Args:
+        transaccion (Transaccion): Transacción del préstamo o la devolución
+        libro_id (str): ID del ejemplar
+        isbn (str): ISBN del ejemplar (con o sin guiones)
+        disponible (bool): Nueva disponibilidad
+    """
+    cambio = {"libro_id": libro_id, "isbn": normalizar_isbn(isbn), "disponible": disponible}
+    transaccion.agregar_linea(_ruta_diario_disponibilidad(), json.dumps(cambio, ensure_ascii=False) + "\n")
+
+
+def volcar_disponibilidad():
+    """
+    Incorpora al índice ISBN los cambios del diario de disponibilidad y lo
+    vacía. En el manifiesto solo se registra el nuevo estado de los géneros
+    de los ejemplares prestados o devueltos.
+    """
+    with bloqueo_escritura():
+        _volcar_disponibilidad()
+
+
+def _volcar_disponibilidad():
+    """Returns: True si había cambios para volcar"""
+    diario = _ruta_diario_disponibilidad()
+    if not diario.exists() or diario.stat().st_size == 0:
+        return False
+
+    indice = _cargar_indice_para_escritura()
+    indice_ids = cargar_indice_ids()
+    generos = {indice_ids[libro_id]["genero"] for libro_id in _estado_indices["cambios"] if libro_id in indice_ids}
+    _guardar_indice_isbn(indice, solo_isbn=True, generos=generos)
+    return True
+
+
+def busqueda_binaria_isbn(isbn_buscado):
+    """
+    Búsqueda binaria ITERATIVA por ISBN en el índice ordenado.
+    Esta es la versión principal para la entrega (sin recursión).
+
+    Args:
+        isbn_buscado (str): ISBN a buscar (puede venir con o sin guiones)
+
+    Returns:
+        dict: Información del libro con todos sus ejemplares, o None si no se encuentra
+    """
+    # Normalizar el ISBN buscado
+    isbn_buscado_normalizado = normalizar_isbn(isbn_buscado)
+
+    # Índice binario: bisect sobre las claves crudas, sin parsear el índice JSON
+    indice_binario = indice_isbn_binario.abrir_indice_binario(rutas.obtener_directorio_libros())
+    if indice_binario is not None:
+        entrada = indice_binario.buscar(isbn_buscado_normalizado)
+        return cargar_detalles_ejemplares(entrada) if entrada is not None else None
+
+    # Cargar índice
+    indice = cargar_indice_isbn()
+
+    # Búsqueda binaria iterativa
+    izquierda = 0
+    derecha = len(indice) - 1
+
+    while izquierda <= derecha:
+        # Calcular punto medio
+        medio = (izquierda + derecha) // 2
+        isbn_medio = indice[medio]['isbn']  # el índice ya guarda el ISBN normalizado
+
+        # Verificar si encontramos el ISBN
+        if isbn_medio == isbn_buscado_normalizado:
+            return cargar_detalles_ejemplares(indice[medio])
+
+        # Si el ISBN buscado es menor, buscar en la mitad izquierda
+        elif isbn_medio > isbn_buscado_normalizado:
+            derecha = medio - 1
+
+        # Si el ISBN buscado es mayor, buscar en la mitad derecha
+        else:
+            izquierda = medio + 1
+
+    # No se encontró
+    return None
+
+
+def busqueda_binaria_isbn_recursiva(isbn_buscado):
+    """
+    Búsqueda binaria RECURSIVA por ISBN en el índice ordenado.
+    Versión alternativa que usa recursividad.
+
+    Args:
+        isbn_buscado (str): ISBN a buscar (puede venir con o sin guiones)
+
+    Returns:
+        dict: Información del libro con todos sus ejemplares, o None si no se encuentra
+    """
+    # Normalizar el ISBN buscado
+    isbn_buscado_normalizado = normalizar_isbn(isbn_buscado)
+
+    # Con el índice binario la búsqueda es la misma que en la versión iterativa
+    indice_binario = indice_isbn_binario.abrir_indice_binario(rutas.obtener_directorio_libros())
+    if indice_binario is not None:
+        entrada = indice_binario.buscar(isbn_buscado_normalizado)
+        return cargar_detalles_ejemplares(entrada) if entrada is not None else None
+
+    # Cargar índice
+    indice = cargar_indice_isbn()
+
+    # Llamar a la función recursiva
+    return _busqueda_binaria_recursiva(indice, isbn_buscado_normalizado, 0, len(indice) - 1)
+
+
+def _busqueda_binaria_recursiva(indice, isbn_buscado, izquierda, derecha):
+    """
+    Implementación de búsqueda binaria.
+
+    Args:
+        indice (list): Lista ordenada de libros por ISBN
+        isbn_buscado (str): ISBN a buscar (ya normalizado)
+        izquierda (int): Índice izquierdo del rango de búsqueda
+        derecha (int): Índice derecho del rango de búsqueda
+
+    Returns:
+        dict: Información del libro o None si no se encuentra
+    """
+    # Caso base: no se encontró (rango vacío)
+    if izquierda > derecha:
+        return None
+
+    # Calcular punto medio
+    medio = (izquierda + derecha) // 2
+    isbn_medio = indice[medio]['isbn']  # el índice ya guarda el ISBN normalizado
+
+    # Caso base: se encontró el ISBN
+    if isbn_medio == isbn_buscado:
+        return cargar_detalles_ejemplares(indice[medio])
+
+    # Caso recursivo: buscar en mitad izquierda
+    elif isbn_medio > isbn_buscado:
+        return _busqueda_binaria_recursiva(indice, isbn_buscado, izquierda, medio - 1)
+
+    # Caso recursivo: buscar en mitad derecha
+    else:
+        return _busqueda_binaria_recursiva(indice, isbn_buscado, medio + 1, derecha)
+
+
+def cargar_detalles_ejemplares(entrada_indice):
+    """
+    Carga los detalles completos de todos los ejemplares de un ISBN.
+
+    Args:
+        entrada_indice (dict): Entrada del índice con información básica
+
+    Returns:
+        dict: Diccionario con información completa del libro y sus ejemplares
+    """
+    base_dir = rutas.obtener_directorio_base()
+
+    resultado = {
+        'isbn': entrada_indice['isbn'],
+        'title': entrada_indice['title'],
+        'autor': entrada_indice['autor'],
+        'genero': entrada_indice['genero'],
+        'ejemplares': []
+    }
+
+    for ejemplar_info in entrada_indice['ejemplares']:
+        # Caché LRU validado por la firma del archivo (None si ya no existe)
+        ejemplar = cache_libros.leer_libro(base_dir / ejemplar_info['ruta'])
+        if ejemplar is not None:
+            resultado['ejemplares'].append(ejemplar)
+
+    resultado['total'] = len(resultado['ejemplares'])
+    resultado['disponibles'] = sum(1 for e in resultado['ejemplares'] if e.get('disponible', True))
+    return resultado
+
+
+def busqueda_recursiva_texto(texto_busqueda, directorio=None):
+    """
+    Búsqueda por texto libre en título, autor o ISBN.
+
+    Sin directorio se resuelve con el índice invertido de texto: se intersectan
+    los postings de la consulta, se verifican los candidatos con los metadatos
+    cacheados y solo se leen de disco los libros que coinciden.
+    Con un directorio explícito, o si el índice de texto no existe, se
+    recorre recursivamente leyendo cada archivo.
+
+    Args:
+        texto_busqueda (str): Texto a buscar
+        directorio (Path, optional): Directorio donde buscar recursivamente
+
+    Returns:
+        list: Lista de libros que coinciden con la búsqueda
+    """
+    if directorio is not None:
+        resultados = []
+        buscar_en_directorio_recursivo(directorio, texto_busqueda.lower(), resultados)
+        return resultados
+
+    # Solo lectura: el índice de texto lo reconstruye asegurar_indice_isbn.
+    # Si todavía no existe se recorren los archivos.
+    _actualizar_estado_indices()
+    indice = indice_texto.cargar_indice_texto(rutas.obtener_directorio_libros())
+    if indice is None:
+        resultados = []
+        buscar_en_directorio_recursivo(rutas.obtener_directorio_libros(), texto_busqueda.lower(), resultados)
+        return resultados
+    base_dir = rutas.obtener_directorio_base()
+
+    resultados = []
+    for libro_id, documento in indice_texto.buscar(indice, texto_busqueda):
+        ruta = base_dir / _ruta_relativa_ejemplar(documento["genero"], libro_id)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                resultados.append(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            # El archivo cambió fuera de la aplicación: se omite
+            continue
+
+    return resultados
+
+
+def buscar_en_directorio_recursivo(directorio, texto_busqueda, resultados):
+    """
+    Función recursiva que recorre directorios y archivos buscando coincidencias.
+
+    Args:
+        directorio (Path): Directorio actual
+        texto_busqueda (str): Texto a buscar (en minúsculas)
+        resultados (list): Lista donde se agregan los resultados (modificada por referencia)
+    """
+    try:
+        # Listar contenido del directorio
+        for item in directorio.iterdir():
+            # Si es un directorio, llamada recursiva
+            if item.is_dir():
+                buscar_en_directorio_recursivo(item, texto_busqueda, resultados)
+
+            # Si es un archivo JSON de libro
+            elif item.is_file() and item.suffix == '.json' and item.name not in _ARCHIVOS_INDICE:
+                buscar_en_archivo(item, texto_busqueda, resultados)
+
+    except PermissionError:
+        # Ignorar directorios sin permisos
+        pass
+
+
+def buscar_en_archivo(ruta_archivo, texto_busqueda, resultados):
+    """
+    Busca coincidencias de texto en un archivo JSON de libro.
+
+    Args:
+        ruta_archivo (Path): Ruta del archivo a buscar
+        texto_busqueda (str): Texto a buscar (en minúsculas)
+        resultados (list): Lista donde se agregan los resultados
+    """
+    try:
+        with open(ruta_archivo, 'r', encoding='utf-8') as f:
+            libro = json.load(f)
+
+        # Verificar que sea un diccionario (no una lista)
+        if not isinstance(libro, dict):
+            return
+
+        # Buscar en título, autor o ISBN
+        if (texto_busqueda in libro.get('title', '').lower() or
+            texto_busqueda in libro.get('autor', '').lower() or
+            texto_busqueda in libro.get('isbn', '').lower()):
+
+            resultados.append(libro)
+
+    except (json.JSONDecodeError, KeyError, AttributeError):
+        # Ignorar archivos con formato incorrecto
+        pass
+
+
+def buscar_por_genero(genero):
+    """
+    Busca todos los libros de un género específico.
+
+    Args:
+        genero (str): Nombre del género
+
+    Returns:
+        list: Lista de libros del género
+    """
+    return list(leer_libros_genero(genero))
+
+
+def leer_libros_genero(genero):
+    """
+    Itera los libros de un género. Si el catálogo empaquetado (catalogo.seg)
+    está al día para ese género, los registros se leen de ese único archivo
+    mapeado en memoria; si no, se lee cada archivo JSON de la carpeta.
+
+    Args:
+        genero (str): Nombre del género
+    """
+    dir_libros = rutas.obtener_directorio_libros()
+    segmento = segmento_catalogo.abrir_segmento(dir_libros / segmento_catalogo.SEGMENTO_FILE.name)
+    if segmento is not None and segmento.genero_vigente(genero, dir_libros):
+        yield from segmento.libros_de_genero(genero)
+        return
+
+    genero_dir = dir_libros / genero
+    if not genero_dir.is_dir():
+        return
+
+    for archivo in genero_dir.glob('*.json'):
+        try:
+            with open(archivo, 'r', encoding='utf-8') as f:
+                libro = json.load(f)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(libro, dict):
+            yield libro
+
+
+def listar_generos():
+    """
+    Lista todos los géneros disponibles.
+
+    Returns:
+        list: Lista de nombres de géneros ordenados
+    """
+    dir_libros = rutas.obtener_directorio_libros()
+    generos = []
+
+    for item in dir_libros.iterdir():
+        if item.is_dir():
+            generos.append(item.name)
+
+    return sorted(generos)
+
+
+def buscar_por_libro_id(libro_id):
+    """
+    Busca un ejemplar específico por su libro_id usando el índice de IDs (O(1)).
+
+    Args:
+        libro_id (str): ID único del ejemplar a buscar
+
+    Returns:
+        dict: Diccionario con 'libro' (datos completos del libro), 'isbn', 'genero'
+              y 'ruta' (path del archivo), o None si no se encuentra
+    """
+    ubicacion = ubicar_libro(libro_id)
+    if ubicacion is None:
+        return None
+
+    ruta = rutas.obtener_directorio_base() / ubicacion['ruta']
+    libro = cache_libros.leer_libro(ruta)
+    if libro is None:
+        return None
+
+    return {
+        'libro': libro,
+        'isbn': ubicacion['isbn'],
+        'genero': ubicacion['genero'],
+        'ruta': str(ruta)
+    }
+
+
+
+def cambios_desde(marca):
+    """
+    Libros nuevos, modificados o eliminados desde una llamada anterior, para
+    mantener una copia del catálogo al día sin releerlo completo.
+    Toda escritura de un libro (alta, baja o reemplazo atómico) cambia el
+    mtime de la carpeta de su género: solo se revisan los géneros cuya
+    carpeta cambió y, dentro de ellos, se leen solo los archivos nuevos o
+    con mtime posterior a la lectura anterior.
+
+    Args:
+        marca (dict): La devuelta por la llamada anterior, o None para leer
+                      el catálogo completo
+
+    Returns:
+        tuple: (marca nueva, libros nuevos o modificados, libro_ids eliminados);
+               sin marca, los libros son el catálogo completo y los
+               eliminados None
+    """
+    dir_libros = rutas.obtener_directorio_libros()
+
+    if marca is None:
+        marca = {"mtime": {}, "ids": {}}
+        libros = []
+        for genero in listar_generos():
+            # El mtime se toma antes de leer: un cambio durante la lectura
+            # se vuelve a aplicar en la próxima llamada
+            marca["mtime"][genero] = (dir_libros / genero).stat().st_mtime_ns
+            ids = set()
+            for libro in leer_libros_genero(genero):
+                libros.append(libro)
+                ids.add(libro['libro_id'])
+            marca["ids"][genero] = ids
+        return marca, libros, None
+
+    modificados = []
+    eliminados = set()
+    actuales = set(listar_generos())
+
+    for genero in set(marca["mtime"]) - actuales:
+        eliminados.update(marca["ids"].pop(genero, ()))
+        del marca["mtime"][genero]
+
+    for genero in sorted(actuales):
+        ruta_genero = dir_libros / genero
+        try:
+            mtime_ns = ruta_genero.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        anterior = marca["mtime"].get(genero)
+        if anterior == mtime_ns:
+            continue
+
+        ids_anteriores = marca["ids"].get(genero, set())
+        ids = set()
+        for entrada in os.scandir(ruta_genero):
+            if not entrada.name.endswith('.json'):
+                continue
+            libro_id = entrada.name[:-len('.json')]
+            try:
+                nuevo = anterior is None or libro_id not in ids_anteriores \
+                    or entrada.stat().st_mtime_ns >= anterior
+            except FileNotFoundError:
+                continue
+            if nuevo:
+                try:
+                    with open(entrada.path, 'r', encoding='utf-8') as f:
+                        libro = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    continue
+                if not isinstance(libro, dict) or 'libro_id' not in libro:
+                    continue
+                libro_id = libro['libro_id']
+                modificados.append(libro)
+            ids.add(libro_id)
+
+        eliminados.update(ids_anteriores - ids)
+        marca["ids"][genero] = ids
+        marca["mtime"][genero] = mtime_ns
+
+    return marca, modificados, sorted(eliminados)
+
+
+# Escritura de los archivos de libros (los índices se actualizan en la misma operación)
+
+def guardar_json(ruta, datos):
+    """
+    Guarda un archivo JSON en la ruta indicada.
+    Se escribe un temporal y se reemplaza de forma atómica: además de no dejar
+    archivos a medio escribir, así cambia el mtime de la carpeta del género
+    (con eso el catálogo empaquetado detecta que el género cambió).
+    """
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, indent=4, ensure_ascii=False)
+    os.replace(tmp, ruta)
+    cache_libros.invalidar_libro(ruta)
+
+
+def cargar_json(ruta):
+    """Carga y devuelve los datos de un archivo JSON."""
+    if os.path.exists(ruta):
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            return json.load(archivo)
+    return None
+
+
+def _archivo_libro(libro):
+    """Ruta del archivo de un libro en la carpeta de su género (que se crea si no existe)."""
+    carpeta_genero = rutas.obtener_directorio_libros() / libro["genero"]
+    carpeta_genero.mkdir(parents=True, exist_ok=True)
+    return carpeta_genero / f"{libro['libro_id']}.json"
+
+
+def agregar_libro(libro):
+    """
+    Guarda un libro nuevo (con libro_id ya asignado) y lo inserta en el
+    índice ISBN sin reconstruirlo.
+    """
+    # El archivo y el índice se escriben con el bloqueo tomado: el índice se
+    # vuelve a leer si otro proceso agregó un libro mientras tanto
+    with bloqueo_escritura():
+        guardar_json(_archivo_libro(libro), libro)
+        indice_agregar_ejemplar(libro)
+
+
+def agregar_libros(lotes):
+    """
+    Guarda los libros de cada lote a medida que llegan (importación masiva)
+    y actualiza los índices ISBN, de IDs y de texto una única vez al final.
+
+    Args:
+        lotes (iterable): Listas de libros completos (su carpeta es libro['genero'])
+    """
+    indexados = []
+    for lote in lotes:
+        for libro in lote:
+            guardar_json(_archivo_libro(libro), libro)
+        # Solo se conservan los datos que necesitan los índices
+        indexados.extend(
+            {c: libro[c] for c in ("libro_id", "isbn", "title", "autor", "genero", "disponible")} for libro in lote
+        )
+
+    if indexados:
+        indice_agregar_ejemplares(indexados)
+
+
+def _ubicar_archivo_libro(libro_id):
+    """
+    Devuelve (ruta_archivo, genero) de un ejemplar usando el índice de IDs,
+    o (None, None) si no se encuentra.
+    """
+    ubicacion = ubicar_libro(libro_id)
+    if ubicacion is None:
+        return None, None
+
+    archivo = rutas.obtener_directorio_base() / ubicacion["ruta"]
+    if not archivo.exists():
+        return None, None
+
+    return archivo, ubicacion["genero"]
+
+
+def modificar_libro(libro_id, nuevos_datos):
+    """
+    Modifica los datos de un libro y actualiza solo ese ejemplar en el índice.
+
+    Returns:
+        bool: True si se modificó, False si no se encontró
+    """
+    archivo, genero = _ubicar_archivo_libro(libro_id)
+    if archivo is None:
+        return False
+
+    # Se lee y se escribe con el bloqueo tomado para no pisar un préstamo
+    # registrado por otro proceso; el cambio de versión hace que un préstamo
+    # en curso sobre este libro se rechace y se reintente
+    with bloqueo_escritura():
+        libro = cargar_json(archivo)
+        if libro is None:
+            return False
+        libro_anterior = dict(libro)
+        libro.update(nuevos_datos)
+        libro["version"] = libro_anterior.get("version", 0) + 1
+        guardar_json(archivo, libro)
+        indice_actualizar_ejemplar(libro_anterior, libro, genero)
+
+    return True
+
+
+def eliminar_libro(libro_id):
+    """
+    Elimina el archivo de un ejemplar y lo quita del índice.
+
+    Returns:
+        bool: True si se eliminó, False si no se encontró
+    """
+    archivo, _ = _ubicar_archivo_libro(libro_id)
+    if archivo is None:
+        return False
+
+    with bloqueo_escritura():
+        if not archivo.exists():
+            # Otro proceso lo eliminó mientras tanto
+            return False
+        libro = cargar_json(archivo) or {}
+        os.remove(archivo)
+        cache_libros.invalidar_libro(archivo)
+        indice_quitar_ejemplar(libro_id, libro.get("isbn"))
+
+    return True
+
+
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals())
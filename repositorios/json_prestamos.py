@@ -0,0 +1,591 @@
+"""
+Préstamos en archivos JSON: snapshot (data/prestamos/prestamos.json) más un
+diario append-only de eventos (data/prestamos/prestamos.jsonl).
+
+Un préstamo o una devolución marca el libro, agrega el evento al diario y
+actualiza usuarios.json y los agregados de los reportes en una sola
+Transaccion (WAL). Las operaciones que se llaman dentro de en_transaccion()
+comparten la transacción del hilo y se confirman juntas en un único commit.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from repositorios import cache_libros, json_agregados
+from repositorios.json_libros import indice_registrar_disponibilidad, volcar_disponibilidad
+from utils import rutas
+from utils.bloqueos import bloqueo_escritura
+from utils.instrumentacion import instrumentar_modulo
+from utils.transacciones import Transaccion, reintentar_en_conflicto
+
+# Cantidad de eventos del diario a partir de la cual se compacta en el snapshot
+EVENTOS_POR_SNAPSHOT = 500
+
+# Estado materializado de los préstamos (snapshot + eventos del diario)
+_estado_prestamos = None
+
+# Transacción en curso de cada hilo (ver en_transaccion)
+_hilo = threading.local()
+
+
+def _archivo_snapshot():
+    return rutas.obtener_directorio_prestamos() / "prestamos.json"
+
+
+def _archivo_diario():
+    return rutas.obtener_directorio_prestamos() / "prestamos.jsonl"
+
+
+def _cargar_json(ruta: Path, por_defecto):
+    if not ruta.exists():
+        return por_defecto
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        return por_defecto
+
+def _guardar_json(ruta: Path, datos):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=4)
+
+
+def _firma_archivo(ruta: Path):
+    """Devuelve (mtime_ns, tamaño) de un archivo, o None si no existe."""
+    try:
+        stat = ruta.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _normalizar_item_prestamo(item):
+    """
+    Lleva un elemento de prestamos.json al formato anidado
+    {"prestamo_numero": n, "prestamo": {...}}. Devuelve None si no es válido.
+    """
+    if not isinstance(item, dict) or 'prestamo_numero' not in item:
+        return None
+    if 'prestamo' in item:
+        return item
+    # Formato directo (antiguo): {"prestamo_numero": 1, "user_id": ..., "libro_id": ...}
+    prestamo = {k: v for k, v in item.items() if k != 'prestamo_numero'}
+    return {"prestamo_numero": item['prestamo_numero'], "prestamo": prestamo}
+
+
+def _aplicar_evento(estado, evento):
+    """Aplica un evento del diario ('prestamo' o 'devolucion') al estado en memoria."""
+    tipo = evento.get("evento")
+    numero = evento.get("prestamo_numero")
+
+    if tipo == "prestamo":
+        if numero in estado["por_numero"]:
+            # Ya incluido en el snapshot (compactación interrumpida)
+            return
+        item = {"prestamo_numero": numero, "prestamo": evento["prestamo"]}
+        estado["prestamos"].append(item)
+        estado["por_numero"][numero] = item
+        estado["ultimo_numero"] = max(estado["ultimo_numero"], numero)
+        if not item["prestamo"].get("regresado", False):
+            estado["activos"].setdefault(item["prestamo"].get("libro_id"), item)
+
+    elif tipo == "devolucion":
+        item = estado["por_numero"].get(numero)
+        if item is not None:
+            item["prestamo"]["regresado"] = True
+            item["prestamo"]["fecha_devolucion"] = evento.get("fecha_devolucion")
+            libro_id = item["prestamo"].get("libro_id")
+            if estado["activos"].get(libro_id) is item:
+                del estado["activos"][libro_id]
+
+
+def _leer_diario_desde(estado):
+    """
+    Lee los eventos agregados al diario desde la última posición leída y los aplica.
+    Una línea final incompleta (escritura interrumpida) se ignora hasta que se complete.
+    """
+    try:
+        with open(_archivo_diario(), "rb") as f:
+            f.seek(estado["offset"])
+            datos = f.read()
+    except FileNotFoundError:
+        return
+
+    consumido = datos.rfind(b"\n") + 1
+    for linea in datos[:consumido].splitlines():
+        if not linea.strip():
+            continue
+        try:
+            _aplicar_evento(estado, json.loads(linea))
+        except (json.JSONDecodeError, KeyError, TypeError):
+            continue
+        estado["eventos_diario"] += 1
+    estado["offset"] += consumido
+
+
+def _materializar_prestamos():
+    """Arma el estado completo: carga el snapshot y reproduce el diario entero."""
+    snapshot = _archivo_snapshot()
+    estado = {
+        "prestamos": [],
+        "por_numero": {},
+        "activos": {},
+        "ultimo_numero": 0,
+        "offset": 0,
+        "eventos_diario": 0,
+        "firma_snapshot": _firma_archivo(snapshot)
+    }
+
+    for item in _cargar_json(snapshot, []):
+        item = _normalizar_item_prestamo(item)
+        if item is None:
+            continue
+        estado["prestamos"].append(item)
+        estado["por_numero"][item["prestamo_numero"]] = item
+        estado["ultimo_numero"] = max(estado["ultimo_numero"], item["prestamo_numero"])
+        if not item["prestamo"].get("regresado", False):
+            estado["activos"].setdefault(item["prestamo"].get("libro_id"), item)
+
+    _leer_diario_desde(estado)
+    return estado
+
+
+def _estado_actual():
+    """
+    Devuelve el estado materializado de los préstamos, actualizado.
+    Si el snapshot cambió (o el diario se compactó) se recarga todo;
+    si no, solo se leen los eventos nuevos del diario.
+    """
+    global _estado_prestamos
+
+    firma_diario = _firma_archivo(_archivo_diario())
+    tamano_diario = firma_diario[1] if firma_diario else 0
+
+    if (_estado_prestamos is None
+            or _estado_prestamos["firma_snapshot"] != _firma_archivo(_archivo_snapshot())
+            or tamano_diario < _estado_prestamos["offset"]):
+        _estado_prestamos = _materializar_prestamos()
+    elif tamano_diario > _estado_prestamos["offset"]:
+        _leer_diario_desde(_estado_prestamos)
+
+    return _estado_prestamos
+
+
+def _registrar_evento(transaccion, evento):
+    """Programa en la transacción el agregado de un evento al final del diario."""
+    diario = _archivo_diario()
+    diario.parent.mkdir(parents=True, exist_ok=True)
+    transaccion.agregar_linea(diario, json.dumps(evento, ensure_ascii=False) + "\n")
+
+
+def _eventos_pendientes(transaccion):
+    """Eventos del diario que la transacción todavía no confirmó."""
+    return [json.loads(linea) for linea in transaccion.lineas_pendientes(_archivo_diario())]
+
+
+def _proximo_numero_prestamo(transaccion):
+    """
+    Número del próximo préstamo, contando los pendientes de la transacción.
+    El último número del diario funciona como versión de la numeración: si
+    otro proceso registra un préstamo antes del commit, este se rechaza.
+    """
+    numero = _estado_actual()["ultimo_numero"]
+    pendientes = [evento["prestamo_numero"] for evento in _eventos_pendientes(transaccion)
+                  if evento["evento"] == "prestamo"]
+    if not pendientes:
+        base = numero
+        transaccion.verificar_al_confirmar(lambda: _estado_actual()["ultimo_numero"] == base,
+                                           "otro proceso registró un préstamo con el mismo número")
+    return max([numero, *pendientes]) + 1
+
+
+def _prestamo_activo(libro_id, transaccion):
+    """
+    Devuelve (prestamo_numero, user_id) del préstamo activo de un libro,
+    considerando los eventos pendientes de la transacción, o None.
+    """
+    item = _estado_actual()["activos"].get(libro_id)
+    activo = (item["prestamo_numero"], item["prestamo"].get("user_id")) if item else None
+
+    for evento in _eventos_pendientes(transaccion):
+        if evento["evento"] == "prestamo" and evento["prestamo"]["libro_id"] == libro_id:
+            activo = (evento["prestamo_numero"], evento["prestamo"]["user_id"])
+        elif evento["evento"] == "devolucion" and activo and evento["prestamo_numero"] == activo[0]:
+            activo = None
+
+    return activo
+
+
+def _compactar_si_corresponde():
+    """Compacta el diario en el snapshot si acumuló suficientes eventos."""
+    if _estado_actual()["eventos_diario"] >= EVENTOS_POR_SNAPSHOT:
+        compactar_prestamos()
+
+
+def _despues_de_confirmar():
+    """
+    Tareas posteriores al commit de préstamos o devoluciones: compactar el
+    diario si corresponde. La disponibilidad del índice ISBN ya quedó en el
+    diario de disponibilidad, que se vuelca al compactar.
+    """
+    _compactar_si_corresponde()
+
+
+def _escribir_snapshot(prestamos):
+    """Escribe prestamos.json de forma atómica (archivo temporal + reemplazo)."""
+    snapshot = _archivo_snapshot()
+    snapshot.parent.mkdir(parents=True, exist_ok=True)
+    tmp = snapshot.with_suffix(".json.tmp")
+    _guardar_json(tmp, prestamos)
+    os.replace(tmp, snapshot)
+
+
+def compactar_prestamos():
+    """
+    Vuelca el estado materializado en el snapshot (prestamos.json)
+    y vacía el diario de eventos. También vuelca en el índice ISBN los
+    cambios de disponibilidad de esos préstamos y devoluciones.
+    """
+    global _estado_prestamos
+
+    # Con el bloqueo tomado ningún otro proceso agrega eventos mientras tanto
+    with bloqueo_escritura():
+        estado = _estado_actual()
+        _escribir_snapshot(estado["prestamos"])
+        with open(_archivo_diario(), "wb"):
+            pass
+        volcar_disponibilidad()
+    _estado_prestamos = None
+
+
+def migrar_prestamos():
+    """
+    Migra prestamos.json (arreglo, con elementos en formato anidado o directo)
+    al esquema snapshot + diario: normaliza todos los elementos al formato
+    anidado, incorpora los eventos pendientes y deja el diario vacío.
+
+    Returns:
+        int: Cantidad de préstamos migrados
+    """
+    compactar_prestamos()
+    return len(_estado_actual()["prestamos"])
+
+
+def cargar_prestamos():
+    """
+    Devuelve todos los préstamos (formato {"prestamo_numero", "prestamo"})
+    a partir del estado materializado. No deben modificarse.
+    """
+    return _estado_actual()["prestamos"]
+
+
+def prestamos_de_usuario(user_id):
+    """Préstamos (mismo formato que cargar_prestamos) de un usuario."""
+    return [
+        p for p in cargar_prestamos()
+        if p.get("prestamo", {}).get("user_id", "").upper() == user_id.upper()
+    ]
+
+
+def prestamos_activos():
+    """Diccionarios internos de los préstamos no devueltos."""
+    return [p.get("prestamo") for p in cargar_prestamos() if not p.get("prestamo", {}).get("regresado", False)]
+
+
+def _iterar_arreglo_json(f, tamano_bloque=64 * 1024):
+    """
+    Genera los elementos de un arreglo JSON leyendo el archivo por bloques:
+    en memoria solo queda el elemento que se está decodificando.
+    """
+    decodificador = json.JSONDecoder()
+    buffer = ""
+    posicion = 0
+    abierto = False
+    fin_archivo = False
+
+    while True:
+        # Saltar espacios, el '[' inicial y las comas entre elementos
+        separador = "," if abierto else "["
+        while posicion < len(buffer) and (buffer[posicion].isspace() or buffer[posicion] == separador):
+            abierto = abierto or buffer[posicion] == "["
+            separador = "," if abierto else "["
+            posicion += 1
+
+        if posicion < len(buffer):
+            if buffer[posicion] == "]" or not abierto:
+                return
+            try:
+                elemento, fin = decodificador.raw_decode(buffer, posicion)
+            except json.JSONDecodeError:
+                # Elemento incompleto: falta leer el resto del bloque
+                fin = None
+            if fin is not None:
+                posicion = fin
+                yield elemento
+                continue
+
+        if fin_archivo:
+            return
+        bloque = f.read(tamano_bloque)
+        fin_archivo = not bloque
+        buffer = buffer[posicion:] + bloque
+        posicion = 0
+
+
+def _leer_snapshot_y_diario():
+    """
+    Abre prestamos.json y lee los eventos del diario como un par consistente:
+    si una compactación reemplaza el snapshot entre las dos lecturas, se
+    vuelve a intentar.
+
+    Returns:
+        tuple: (archivo del snapshot abierto o None, lista de eventos del diario)
+    """
+    archivo_snapshot = _archivo_snapshot()
+    while True:
+        firma = _firma_archivo(archivo_snapshot)
+        try:
+            with open(_archivo_diario(), "rb") as f:
+                datos = f.read()
+        except FileNotFoundError:
+            datos = b""
+
+        eventos = []
+        for linea in datos[:datos.rfind(b"\n") + 1].splitlines():
+            try:
+                eventos.append(json.loads(linea))
+            except json.JSONDecodeError:
+                continue
+
+        try:
+            snapshot = open(archivo_snapshot, "r", encoding="utf-8")
+        except FileNotFoundError:
+            if firma is None:
+                return None, eventos
+            continue
+        stat = os.fstat(snapshot.fileno())
+        if (stat.st_mtime_ns, stat.st_size) == firma:
+            return snapshot, eventos
+        snapshot.close()
+
+
+def iterar_prestamos():
+    """
+    Genera los préstamos (mismo formato que cargar_prestamos) sin armar la
+    lista completa: prestamos.json se decodifica de a un elemento y solo se
+    tienen en memoria los eventos del diario, que la compactación mantiene
+    por debajo de EVENTOS_POR_SNAPSHOT.
+    """
+    snapshot, eventos = _leer_snapshot_y_diario()
+
+    # Préstamos del diario (por número) y devoluciones a aplicar al historial
+    prestamos_diario = {}
+    devoluciones = {}
+    for evento in eventos:
+        if not isinstance(evento, dict):
+            continue
+        if evento.get("evento") == "prestamo" and "prestamo" in evento:
+            prestamos_diario.setdefault(evento.get("prestamo_numero"), evento["prestamo"])
+        elif evento.get("evento") == "devolucion":
+            devoluciones[evento.get("prestamo_numero")] = evento.get("fecha_devolucion")
+
+    def con_devolucion(item):
+        numero = item["prestamo_numero"]
+        if numero in devoluciones:
+            item["prestamo"]["regresado"] = True
+            item["prestamo"]["fecha_devolucion"] = devoluciones[numero]
+        return item
+
+    if snapshot is not None:
+        with snapshot:
+            for item in _iterar_arreglo_json(snapshot):
+                item = _normalizar_item_prestamo(item)
+                if item is None:
+                    continue
+                # Ya incluido en el snapshot (compactación interrumpida)
+                prestamos_diario.pop(item["prestamo_numero"], None)
+                yield con_devolucion(item)
+
+    for numero, prestamo in prestamos_diario.items():
+        yield con_devolucion({"prestamo_numero": numero, "prestamo": dict(prestamo)})
+
+
+def _agregar_libro_a_usuario(usuarios, user_id: str, libro_id: str):
+    """Agrega un libro_id a la lista de libros_prestados del usuario"""
+    for i in range(len(usuarios)):
+        if usuarios[i].get('user_id') == user_id:
+            usuario = usuarios[i].get('user', {})
+            libros_prestados = usuario.get('libros_prestados', [])
+
+            # Solo agregar si no está ya en la lista
+            if libro_id not in libros_prestados:
+                libros_prestados.append(libro_id)
+                usuario['libros_prestados'] = libros_prestados
+                usuarios[i]['user'] = usuario
+                usuarios[i]['version'] = usuarios[i].get('version', 0) + 1
+            return True
+
+    return False
+
+
+def _quitar_libro_a_usuario(usuarios, user_id: str, libro_id: str):
+    """Quita un libro_id de la lista de libros_prestados del usuario"""
+    for i in range(len(usuarios)):
+        if usuarios[i].get('user_id') == user_id:
+            usuario = usuarios[i].get('user', {})
+            libros_prestados = usuario.get('libros_prestados', [])
+
+            # Quitar el libro si está en la lista
+            if libro_id in libros_prestados:
+                libros_prestados.remove(libro_id)
+                usuario['libros_prestados'] = libros_prestados
+                usuarios[i]['user'] = usuario
+                usuarios[i]['version'] = usuarios[i].get('version', 0) + 1
+            return True
+
+    return False
+
+
+def _actualizar_usuario_agregar_libro(transaccion, user_id: str, libro_id: str):
+    # Si otro proceso cambia usuarios.json antes del commit, el cambio se
+    # vuelve a aplicar sobre el archivo actual (no se pisan otros usuarios).
+    # En el WAL queda solo la llamada, no todo usuarios.json
+    return transaccion.modificar_json_en_wal(rutas.obtener_archivo_usuarios(), [], _agregar_libro_a_usuario, user_id, libro_id)
+
+
+def _actualizar_usuario_quitar_libro(transaccion, user_id: str, libro_id: str):
+    return transaccion.modificar_json_en_wal(rutas.obtener_archivo_usuarios(), [], _quitar_libro_a_usuario, user_id, libro_id)
+
+
+def en_transaccion(funcion):
+    """
+    Ejecuta 'funcion' con una transacción del hilo abierta y la confirma:
+    los préstamos y devoluciones que registre se programan en ella y se
+    escriben juntos en un único commit de grupo (cada archivo afectado una
+    sola vez). Si otro proceso cambió lo leído antes del commit, se repite
+    toda la función. Dentro de otra llamada a en_transaccion() solo ejecuta
+    'funcion', que forma parte de la transacción más externa.
+
+    Returns:
+        Lo que devuelva 'funcion'
+    """
+    if getattr(_hilo, "transaccion", None) is not None:
+        return funcion()
+
+    def ejecutar():
+        with Transaccion() as transaccion:
+            _hilo.transaccion = transaccion
+            try:
+                return funcion()
+            finally:
+                _hilo.transaccion = None
+
+    resultado = reintentar_en_conflicto(ejecutar)
+    _despues_de_confirmar()
+    return resultado
+
+
+def registrar_prestamo(genero: str, libro_id: str, user_id: str) -> bool:
+    """
+    Registra un préstamo: marca el libro como prestado, agrega el evento al
+    diario y actualiza los libros_prestados del usuario.
+
+    Las escrituras se programan en la transacción del hilo (ver
+    en_transaccion) y se confirman juntas. Si otro proceso prestó el mismo
+    libro antes del commit, se reintenta.
+    """
+    return en_transaccion(lambda: _registrar_prestamo(_hilo.transaccion, genero, libro_id, user_id))
+
+
+def _registrar_prestamo(transaccion, genero, libro_id, user_id):
+    ruta_libro = rutas.obtener_directorio_libros() / genero / f"{libro_id}.json"
+
+    if not ruta_libro.exists():
+        return False
+
+    # La versión leída del libro se verifica al confirmar
+    libro = transaccion.leer_registro(ruta_libro, {})
+
+    if not libro or not libro.get("disponible", True):
+        return False
+
+    # 1. Actualizar el libro (marcar como no disponible)
+    libro["disponible"] = False
+    libro["prestamo_actual"] = user_id
+    transaccion.escribir_registro(ruta_libro, libro)
+    cache_libros.invalidar_libro(ruta_libro)
+    indice_registrar_disponibilidad(transaccion, libro_id, libro.get("isbn"), False)
+
+    # 2. Registrar el préstamo (evento en el diario)
+    _registrar_evento(transaccion, {
+        "evento": "prestamo",
+        "prestamo_numero": _proximo_numero_prestamo(transaccion), # Generar número de préstamo
+        "prestamo": {
+            "libro_id": libro_id,
+            "genero": genero,
+            "user_id": user_id,
+            "fecha_prestamo": datetime.now().isoformat(timespec="seconds"),
+            "regresado": False,
+            "fecha_devolucion": None
+        }
+    })
+
+    # 3. Actualizar el usuario (agregar libro a libros_prestados)
+    _actualizar_usuario_agregar_libro(transaccion, user_id, libro_id)
+
+    # 4. Actualizar los agregados de los reportes
+    json_agregados.registrar_prestamo(transaccion, libro_id, user_id, genero)
+
+    return True
+
+
+def registrar_devolucion(genero: str, libro_id: str) -> bool:
+    """Registra una devolución, marcando el libro como disponible."""
+    return en_transaccion(lambda: _registrar_devolucion(_hilo.transaccion, genero, libro_id))
+
+
+def _registrar_devolucion(transaccion, genero, libro_id):
+    ruta_libro = rutas.obtener_directorio_libros() / genero / f"{libro_id}.json"
+    if not ruta_libro.exists():
+        return False
+
+    # Se lee el libro antes que el diario: si otro proceso registra la
+    # devolución entretanto, la versión del libro cambia y el commit se rechaza
+    libro = transaccion.leer_registro(ruta_libro, {})
+
+    # 1. Buscar el préstamo ACTIVO (regresado: false) con el ID del libro
+    activo = _prestamo_activo(libro_id, transaccion)
+
+    if activo is None:
+        return False
+
+    prestamo_numero, user_id_prestamo = activo
+
+    # 2. Actualizar el libro (marcar como disponible)
+    libro["disponible"] = True
+    libro["prestamo_actual"] = None
+
+    transaccion.escribir_registro(ruta_libro, libro)
+    cache_libros.invalidar_libro(ruta_libro)
+    indice_registrar_disponibilidad(transaccion, libro_id, libro.get("isbn"), True)
+    _registrar_evento(transaccion, {
+        "evento": "devolucion",
+        "prestamo_numero": prestamo_numero,
+        "fecha_devolucion": datetime.now().isoformat(timespec="seconds")
+    })
+
+    # 3. Actualizar el usuario (quitar libro de libros_prestados)
+    if user_id_prestamo:
+        _actualizar_usuario_quitar_libro(transaccion, user_id_prestamo, libro_id)
+
+    # 4. Actualizar los agregados de los reportes
+    json_agregados.registrar_devolucion(transaccion, genero)
+
+    return True
+
+
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals(), extras=("_cargar_json", "_guardar_json"))
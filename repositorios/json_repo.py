@@ -0,0 +1,145 @@
+"""
+Repositorios sobre el almacenamiento original en archivos JSON
+(data/libros/<genero>/<libro_id>.json, usuarios.json y prestamos.json + diario).
+
+Usan los módulos json_libros, json_usuarios, json_prestamos y json_agregados:
+índices ISBN / IDs / texto, diario de préstamos y transacciones con WAL.
+"""
+
+from repositorios import json_agregados, json_libros, json_prestamos, json_usuarios
+from repositorios.base import Repositorios, RepositorioLibros, RepositorioPrestamos, RepositorioUsuarios
+from repositorios.indice_texto import cargar_indice_texto
+from utils import rutas
+from utils.transacciones import recuperar_transacciones
+
+
+class RepositorioLibrosJSON(RepositorioLibros):
+
+    def buscar_por_isbn(self, isbn):
+        return json_libros.busqueda_binaria_isbn(isbn)
+
+    def buscar_por_id(self, libro_id):
+        return json_libros.buscar_por_libro_id(libro_id)
+
+    def entrada_isbn(self, isbn):
+        # Del índice: sin leer los archivos de los ejemplares
+        return json_libros.obtener_entrada_isbn(isbn)
+
+    def ubicar(self, libro_id):
+        return json_libros.ubicar_libro(libro_id)
+
+    def ejemplares_disponibles(self, isbn):
+        # El índice puede no ver todavía los préstamos del mismo lote: la
+        # transacción vuelve a verificar cada ejemplar antes de prestarlo
+        return json_libros.ejemplares_disponibles(isbn)
+
+    def buscar_texto(self, texto):
+        return json_libros.busqueda_recursiva_texto(texto)
+
+    def listar_por_genero(self, genero):
+        return json_libros.buscar_por_genero(genero)
+
+    def listar_generos(self):
+        return json_libros.listar_generos()
+
+    def listar(self):
+        for genero in json_libros.listar_generos():
+            for libro in json_libros.leer_libros_genero(genero):
+                if libro.get('libro_id'):
+                    yield libro
+
+    def agregar(self, libro):
+        json_libros.agregar_libro(libro)
+
+    def agregar_lotes(self, lotes):
+        # Los índices se actualizan una única vez, después del último lote
+        json_libros.agregar_libros(lotes)
+
+    def modificar(self, libro_id, nuevos_datos):
+        return json_libros.modificar_libro(libro_id, nuevos_datos)
+
+    def eliminar(self, libro_id):
+        return json_libros.eliminar_libro(libro_id)
+
+    def cambios_desde(self, marca):
+        return json_libros.cambios_desde(marca)
+
+
+class RepositorioUsuariosJSON(RepositorioUsuarios):
+
+    def listar(self):
+        return json_usuarios.cargar_usuarios()
+
+    def guardar(self, user_id, user):
+        json_usuarios.guardar_usuario(user_id, user)
+
+    def actualizar(self, user_id, datos):
+        return json_usuarios.actualizar_usuario(user_id, datos)
+
+    def eliminar(self, user_id):
+        return json_usuarios.eliminar_usuario(user_id)
+
+
+class RepositorioPrestamosJSON(RepositorioPrestamos):
+
+    def listar(self):
+        return json_prestamos.cargar_prestamos()
+
+    def iterar(self):
+        return json_prestamos.iterar_prestamos()
+
+    def de_usuario(self, user_id):
+        return json_prestamos.prestamos_de_usuario(user_id)
+
+    def activos(self):
+        return json_prestamos.prestamos_activos()
+
+    def en_transaccion(self, funcion):
+        return json_prestamos.en_transaccion(funcion)
+
+    def registrar_prestamo(self, genero, libro_id, user_id):
+        return json_prestamos.registrar_prestamo(genero, libro_id, user_id)
+
+    def registrar_devolucion(self, genero, libro_id):
+        return json_prestamos.registrar_devolucion(genero, libro_id)
+
+    def agregados(self):
+        return json_agregados.cargar_agregados()
+
+    def guardar_agregados(self, agregados):
+        json_agregados.guardar_agregados(agregados)
+
+    def top_libros(self, n):
+        return json_agregados.top_libros(n)
+
+    def top_usuarios(self, n):
+        return json_agregados.top_usuarios(n)
+
+
+class RepositoriosJSON(Repositorios):
+
+    def preparar(self, forzar_indices=False, workers=1, validar_indices=True):
+        # Completar transacciones que hayan quedado a medio aplicar
+        recuperadas = recuperar_transacciones()
+        if recuperadas:
+            print(f"✓ Transacciones recuperadas del WAL: {recuperadas}")
+
+        # Validar el índice al inicio (solo se reindexa lo que cambió)
+        if validar_indices:
+            json_libros.asegurar_indice_isbn(forzar=forzar_indices, workers=workers)
+
+    def reindexar(self, workers=1):
+        json_libros.asegurar_indice_isbn(forzar=True, workers=workers)
+        return len(json_libros.cargar_indice_isbn())
+
+    def migrar_prestamos(self):
+        return json_prestamos.migrar_prestamos()
+
+    def calentar(self):
+        json_libros.cargar_indice_isbn()
+        json_libros.cargar_indice_ids()
+        cargar_indice_texto(rutas.obtener_directorio_libros())
+
+
+def crear_repositorios_json():
+    return RepositoriosJSON(RepositorioLibrosJSON(), RepositorioUsuariosJSON(), RepositorioPrestamosJSON())
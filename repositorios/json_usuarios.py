@@ -0,0 +1,144 @@
+"""
+Usuarios en archivos JSON (data/usuarios/usuarios.json).
+
+El archivo es una lista de {'user_id', 'user', 'version'}; en memoria se
+mantiene como diccionario user_id -> datos del usuario.
+"""
+
+import json
+from utils import rutas
+from utils.bloqueos import bloqueo_escritura
+from utils.instrumentacion import instrumentar_modulo
+from utils.transacciones import Transaccion
+
+
+# Caché de usuarios en memoria y firma (inodo, mtime_ns, tamaño) del archivo leído
+_usuarios_cache = None
+_firma_cache = None
+
+
+def _firma_usuarios():
+    """
+    Devuelve (inodo, mtime_ns, tamaño) de usuarios.json. El inodo cambia en
+    cada reemplazo atómico, aunque el mtime y el tamaño coincidan.
+    """
+    stat = rutas.obtener_archivo_usuarios().stat()
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def cargar_usuarios():
+    """
+    Carga los usuarios desde usuarios.json.
+    Usa un caché en memoria compartido por todo el proceso, que solo se
+    vuelve a leer de disco cuando cambia la firma del archivo. El diccionario
+    devuelto (y los de cada usuario) es ese caché: no deben modificarse.
+
+    Returns:
+        dict: Diccionario con user_id como clave y datos del usuario como valor
+    """
+    global _usuarios_cache, _firma_cache
+
+    firma = _firma_usuarios()
+    if _usuarios_cache is not None and firma == _firma_cache:
+        return _usuarios_cache
+
+    usuarios_dict = {}
+
+    with open(rutas.obtener_archivo_usuarios(), 'r', encoding='utf-8') as f:
+        usuarios = json.load(f)
+
+    for usuario_data in usuarios:
+        user_id = usuario_data['user_id']
+        usuarios_dict[user_id] = usuario_data['user']
+
+    _usuarios_cache = usuarios_dict
+    _firma_cache = firma
+    return _usuarios_cache
+
+
+def invalidar_cache_usuarios():
+    """Descarta el caché de usuarios para forzar una relectura del archivo."""
+    global _usuarios_cache, _firma_cache
+    _usuarios_cache = None
+    _firma_cache = None
+
+
+def _adoptar_usuarios(usuarios):
+    """
+    Después de confirmar, el caché pasa a ser la lista que escribió la
+    transacción (el mismo contenido que el archivo), sin releerlo.
+    """
+    global _usuarios_cache, _firma_cache
+    _usuarios_cache = {item['user_id']: item['user'] for item in usuarios}
+    _firma_cache = _firma_usuarios()
+
+
+def _modificar_usuarios(funcion):
+    """
+    Aplica 'funcion' a la lista de usuarios.json (elementos con 'user_id',
+    'user' y 'version') y la guarda en una transacción, con el bloqueo de
+    escritura tomado: se parte del archivo actual, así no se pisan los
+    préstamos que otro proceso registró, y se reemplaza de forma atómica.
+
+    Returns:
+        Lo que devuelva 'funcion'
+    """
+    archivo = rutas.obtener_archivo_usuarios()
+    with bloqueo_escritura():
+        with Transaccion() as transaccion:
+            resultado = transaccion.modificar_json(archivo, [], funcion)
+            transaccion.al_confirmar(lambda: _adoptar_usuarios(transaccion.leer_json(archivo, [])))
+            return resultado
+
+
+def _actualizar_item(item, user_data):
+    """Reemplaza los datos de un usuario incrementando su versión."""
+    item['user'] = user_data
+    item['version'] = item.get('version', 0) + 1
+
+
+def guardar_usuario(user_id, user_data):
+    """Agrega un usuario o reemplaza sus datos si ya existe."""
+    def guardar(usuarios):
+        for item in usuarios:
+            if item.get('user_id') == user_id:
+                _actualizar_item(item, user_data)
+                return
+        usuarios.append({"user_id": user_id, "user": user_data})
+
+    _modificar_usuarios(guardar)
+
+
+def actualizar_usuario(user_id, datos):
+    """
+    Combina 'datos' con los datos actuales del usuario (leídos del archivo
+    con el bloqueo tomado).
+
+    Returns:
+        bool: True si el usuario existía
+    """
+    def actualizar(usuarios):
+        for item in usuarios:
+            if item.get('user_id') == user_id:
+                _actualizar_item(item, dict(item.get('user', {}), **datos))
+                return True
+        return False
+
+    return _modificar_usuarios(actualizar)
+
+
+def eliminar_usuario(user_id):
+    """
+    Returns:
+        bool: True si el usuario existía
+    """
+    def eliminar(usuarios):
+        cantidad = len(usuarios)
+        usuarios[:] = [item for item in usuarios if item.get('user_id') != user_id]
+        return len(usuarios) < cantidad
+
+    return _modificar_usuarios(eliminar)
+
+
+# Instrumentación de las operaciones (sin costo mientras está desactivada)
+instrumentar_modulo(globals())
@@ -0,0 +1,91 @@
+"""
+Migración única de los archivos JSON a una base SQLite.
+
+Uso:
+    python -m repositorios.migracion [ruta_base.db]
+
+Lee libros, usuarios y préstamos con los repositorios JSON y los inserta en
+la base por lotes, dentro de una única transacción. La base de destino se
+vacía antes de migrar, así que se puede volver a ejecutar.
+"""
+
+import json
+import sys
+import time
+from itertools import islice
+
+from repositorios import RUTA_SQLITE_POR_DEFECTO, obtener_repositorios
+from repositorios.sqlite_repo import conectar, fila_libro, fila_prestamo
+
+TAMANO_LOTE = 1000
+
+
+def _lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def migrar_json_a_sqlite(ruta_db=RUTA_SQLITE_POR_DEFECTO):
+    """
+    Copia todos los datos de los archivos JSON a la base SQLite.
+
+    Args:
+        ruta_db (str | Path): Ruta de la base de destino
+
+    Returns:
+        dict: Cantidad de libros, usuarios y préstamos migrados
+    """
+    origen = obtener_repositorios("json")
+    usuarios = origen.usuarios.listar()
+    prestamos = origen.prestamos.listar()
+    libros = origen.libros.listar()
+
+    conexion = conectar(ruta_db)
+    cantidades = {"libros": 0, "usuarios": len(usuarios), "prestamos": len(prestamos)}
+    try:
+        with conexion:
+            conexion.execute("DELETE FROM libros")
+            conexion.execute("DELETE FROM usuarios")
+            conexion.execute("DELETE FROM prestamos")
+
+            for lote in _lotes(libros, TAMANO_LOTE):
+                conexion.executemany("INSERT OR REPLACE INTO libros VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     [fila_libro(libro) for libro in lote])
+                cantidades["libros"] += len(lote)
+
+            conexion.executemany("INSERT INTO usuarios VALUES (?, ?)", [
+                (user_id, json.dumps(user, ensure_ascii=False)) for user_id, user in usuarios.items()
+            ])
+
+            for lote in _lotes(prestamos, TAMANO_LOTE):
+                conexion.executemany("INSERT OR REPLACE INTO prestamos VALUES (?, ?, ?, ?, ?)", [
+                    fila_prestamo(item["prestamo_numero"], item["prestamo"]) for item in lote
+                ])
+
+            # Los agregados de los reportes se vacían: la base los
+            # recalcula la primera vez que se consultan
+            conexion.execute("DELETE FROM agregados_libros")
+            conexion.execute("DELETE FROM agregados_usuarios")
+            conexion.execute("DELETE FROM agregados_generos")
+    finally:
+        conexion.close()
+
+    return cantidades
+
+
+def main():
+    ruta_db = sys.argv[1] if len(sys.argv) > 1 else RUTA_SQLITE_POR_DEFECTO
+    inicio = time.perf_counter()
+    cantidades = migrar_json_a_sqlite(ruta_db)
+    duracion = time.perf_counter() - inicio
+    print(f"✓ Migración a {ruta_db} completa en {duracion:.2f}s: "
+          f"{cantidades['libros']} libros, {cantidades['usuarios']} usuarios, "
+          f"{cantidades['prestamos']} préstamos")
+
+
+if __name__ == "__main__":
+    main()
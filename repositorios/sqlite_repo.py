@@ -0,0 +1,448 @@
+"""
+Repositorios sobre una base SQLite (módulo sqlite3 de la biblioteca estándar).
+
+Cada registro se guarda completo en la columna 'datos' (JSON) y las columnas
+por las que se busca se duplican aparte, con sus índices B-tree:
+- libros: isbn normalizado, género, título/autor en minúsculas
+- préstamos: libro_id, user_id y regresado
+
+Un préstamo o una devolución (libro + préstamo + usuario + agregados de
+los reportes) es una sola transacción de SQLite. Cada hilo usa su propia
+conexión (sqlite3 no permite compartirlas entre hilos) y las transacciones
+empiezan con BEGIN IMMEDIATE: la lectura que decide un préstamo queda dentro
+de la misma transacción que la escritura, aunque otro hilo o proceso esté
+escribiendo en la base.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from repositorios.base import Repositorios, RepositorioLibros, RepositorioPrestamos, RepositorioUsuarios
+from utils import agregados as logica_agregados
+from utils.isbn import normalizar_isbn
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS libros (
+    libro_id TEXT PRIMARY KEY,
+    isbn TEXT NOT NULL,
+    genero TEXT NOT NULL,
+    title TEXT NOT NULL,
+    autor TEXT NOT NULL,
+    texto TEXT NOT NULL,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_libros_isbn ON libros (isbn);
+CREATE INDEX IF NOT EXISTS idx_libros_genero ON libros (genero);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    user_id TEXT PRIMARY KEY,
+    datos TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS prestamos (
+    prestamo_numero INTEGER PRIMARY KEY,
+    libro_id TEXT,
+    user_id TEXT,
+    regresado INTEGER NOT NULL,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_prestamos_libro ON prestamos (libro_id, regresado);
+CREATE INDEX IF NOT EXISTS idx_prestamos_usuario ON prestamos (user_id);
+
+CREATE TABLE IF NOT EXISTS agregados_libros (
+    libro_id TEXT PRIMARY KEY,
+    prestamos INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agregados_usuarios (
+    user_id TEXT PRIMARY KEY,
+    prestamos INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agregados_generos (
+    genero TEXT PRIMARY KEY,
+    prestamos INTEGER NOT NULL,
+    activos INTEGER NOT NULL
+);
+"""
+
+
+def conectar(ruta):
+    """Abre (y crea si hace falta) la base con el esquema de la biblioteca."""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    conexion = sqlite3.connect(str(ruta))
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+
+class ConexionPorHilo:
+    """
+    Conexión a la base con una conexión de sqlite3 por hilo (se abre en el
+    primer uso de cada hilo). Se usa igual que una conexión:
+    'with conexion:' es una transacción (BEGIN IMMEDIATE, y commit o
+    rollback al salir); los 'with' anidados en el mismo hilo son parte de la
+    transacción más externa.
+    """
+
+    def __init__(self, ruta):
+        self._ruta = ruta
+        self._hilo = threading.local()
+        # Se abre la del hilo actual para crear el esquema antes del primer uso
+        self.actual()
+
+    def actual(self):
+        """Conexión del hilo actual."""
+        conexion = getattr(self._hilo, "conexion", None)
+        if conexion is None:
+            conexion = conectar(self._ruta)
+            self._hilo.conexion = conexion
+            self._hilo.profundidad = 0
+        return conexion
+
+    def __getattr__(self, nombre):
+        return getattr(self.actual(), nombre)
+
+    def __enter__(self):
+        conexion = self.actual()
+        if self._hilo.profundidad == 0:
+            conexion.execute("BEGIN IMMEDIATE")
+        self._hilo.profundidad += 1
+        return conexion
+
+    def __exit__(self, tipo_error, error, traza):
+        self._hilo.profundidad -= 1
+        if self._hilo.profundidad == 0:
+            if tipo_error is None:
+                self._hilo.conexion.commit()
+            else:
+                self._hilo.conexion.rollback()
+        return False
+
+
+def fila_libro(libro):
+    """Valores de la fila de 'libros' para un libro (orden de las columnas)."""
+    title = libro.get("title") or ""
+    autor = libro.get("autor") or ""
+    isbn = libro.get("isbn") or ""
+    return (
+        libro["libro_id"],
+        normalizar_isbn(isbn),
+        libro.get("genero") or "",
+        title,
+        autor,
+        "\n".join((title.lower(), autor.lower(), isbn.lower())),
+        json.dumps(libro, ensure_ascii=False)
+    )
+
+
+def fila_prestamo(prestamo_numero, prestamo):
+    """Valores de la fila de 'prestamos' para un préstamo (diccionario interno)."""
+    return (
+        prestamo_numero,
+        prestamo.get("libro_id"),
+        (prestamo.get("user_id") or "").upper(),
+        1 if prestamo.get("regresado", False) else 0,
+        json.dumps(prestamo, ensure_ascii=False)
+    )
+
+
+class RepositorioLibrosSQLite(RepositorioLibros):
+
+    def __init__(self, conexion, ruta):
+        self._conexion = conexion
+        self._ruta = ruta
+
+    def _libros(self, consulta, parametros=()):
+        return [json.loads(datos) for (datos,) in self._conexion.execute(consulta, parametros)]
+
+    def buscar_por_isbn(self, isbn):
+        ejemplares = self._libros(
+            "SELECT datos FROM libros WHERE isbn = ? ORDER BY libro_id", (normalizar_isbn(isbn),))
+        if not ejemplares:
+            return None
+        primero = ejemplares[0]
+        return {
+            'isbn': normalizar_isbn(primero.get('isbn', '')),
+            'title': primero.get('title', ''),
+            'autor': primero.get('autor', ''),
+            'genero': primero.get('genero', ''),
+            'total': len(ejemplares),
+            'disponibles': sum(1 for e in ejemplares if e.get('disponible', True)),
+            'ejemplares': ejemplares
+        }
+
+    def buscar_por_id(self, libro_id):
+        fila = self._conexion.execute(
+            "SELECT datos, isbn, genero FROM libros WHERE libro_id = ?", (libro_id,)).fetchone()
+        if fila is None:
+            return None
+        return {
+            'libro': json.loads(fila[0]),
+            'isbn': fila[1],
+            'genero': fila[2],
+            'ruta': f"{self._ruta}#libros/{libro_id}"
+        }
+
+    def ubicar(self, libro_id):
+        fila = self._conexion.execute("SELECT genero, isbn FROM libros WHERE libro_id = ?", (libro_id,)).fetchone()
+        if fila is None:
+            return None
+        return {'genero': fila[0], 'isbn': fila[1]}
+
+    def buscar_texto(self, texto):
+        # instr() distingue mayúsculas: 'texto' ya guarda título, autor e ISBN en minúsculas
+        return self._libros(
+            "SELECT datos FROM libros WHERE instr(texto, ?) > 0 ORDER BY genero, title, libro_id",
+            (texto.lower(),))
+
+    def listar_por_genero(self, genero):
+        return self._libros("SELECT datos FROM libros WHERE genero = ? ORDER BY libro_id", (genero,))
+
+    def listar_generos(self):
+        return [g for (g,) in self._conexion.execute("SELECT DISTINCT genero FROM libros ORDER BY genero")]
+
+    def listar(self):
+        for (datos,) in self._conexion.execute("SELECT datos FROM libros ORDER BY genero, libro_id"):
+            yield json.loads(datos)
+
+    def agregar(self, libro):
+        with self._conexion:
+            self._conexion.execute("INSERT OR REPLACE INTO libros VALUES (?, ?, ?, ?, ?, ?, ?)", fila_libro(libro))
+
+    def agregar_lote(self, libros):
+        with self._conexion:
+            self._conexion.executemany("INSERT OR REPLACE INTO libros VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                       [fila_libro(libro) for libro in libros])
+
+    def modificar(self, libro_id, nuevos_datos):
+        with self._conexion:
+            fila = self._conexion.execute("SELECT datos FROM libros WHERE libro_id = ?", (libro_id,)).fetchone()
+            if fila is None:
+                return False
+            libro = json.loads(fila[0])
+            libro.update(nuevos_datos)
+            libro["libro_id"] = libro_id
+            self._conexion.execute("INSERT OR REPLACE INTO libros VALUES (?, ?, ?, ?, ?, ?, ?)", fila_libro(libro))
+        return True
+
+    def eliminar(self, libro_id):
+        with self._conexion:
+            cursor = self._conexion.execute("DELETE FROM libros WHERE libro_id = ?", (libro_id,))
+        return cursor.rowcount > 0
+
+
+class RepositorioUsuariosSQLite(RepositorioUsuarios):
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def listar(self):
+        return {
+            user_id: json.loads(datos)
+            for user_id, datos in self._conexion.execute("SELECT user_id, datos FROM usuarios ORDER BY rowid")
+        }
+
+    def obtener(self, user_id):
+        fila = self._conexion.execute("SELECT datos FROM usuarios WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def guardar(self, user_id, user):
+        with self._conexion:
+            self._conexion.execute(
+                "INSERT INTO usuarios VALUES (?, ?) ON CONFLICT(user_id) DO UPDATE SET datos = excluded.datos",
+                (user_id, json.dumps(user, ensure_ascii=False)))
+
+    def actualizar(self, user_id, datos):
+        with self._conexion:
+            usuario = self.obtener(user_id)
+            if usuario is None:
+                return False
+            usuario.update(datos)
+            self._conexion.execute("UPDATE usuarios SET datos = ? WHERE user_id = ?",
+                                   (json.dumps(usuario, ensure_ascii=False), user_id))
+        return True
+
+    def eliminar(self, user_id):
+        with self._conexion:
+            cursor = self._conexion.execute("DELETE FROM usuarios WHERE user_id = ?", (user_id,))
+        return cursor.rowcount > 0
+
+
+class RepositorioPrestamosSQLite(RepositorioPrestamos):
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def _prestamos(self, consulta, parametros=()):
+        return [
+            {"prestamo_numero": numero, "prestamo": json.loads(datos)}
+            for numero, datos in self._conexion.execute(consulta, parametros)
+        ]
+
+    def listar(self):
+        return self._prestamos("SELECT prestamo_numero, datos FROM prestamos ORDER BY prestamo_numero")
+
+    def iterar(self):
+        cursor = self._conexion.execute("SELECT prestamo_numero, datos FROM prestamos ORDER BY prestamo_numero")
+        for numero, datos in cursor:
+            yield {"prestamo_numero": numero, "prestamo": json.loads(datos)}
+
+    def de_usuario(self, user_id):
+        return self._prestamos(
+            "SELECT prestamo_numero, datos FROM prestamos WHERE user_id = ? ORDER BY prestamo_numero",
+            (user_id.upper(),))
+
+    def activos(self):
+        return [p["prestamo"] for p in self._prestamos(
+            "SELECT prestamo_numero, datos FROM prestamos WHERE regresado = 0 ORDER BY prestamo_numero")]
+
+    def _libro(self, genero, libro_id):
+        fila = self._conexion.execute(
+            "SELECT datos FROM libros WHERE libro_id = ? AND genero = ?", (libro_id, genero)).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def _actualizar_usuario(self, user_id, libro_id, agregar):
+        """Agrega o quita un libro_id de los libros_prestados del usuario."""
+        fila = self._conexion.execute("SELECT datos FROM usuarios WHERE user_id = ?", (user_id,)).fetchone()
+        if fila is None:
+            return
+        usuario = json.loads(fila[0])
+        libros_prestados = usuario.get('libros_prestados', [])
+        if agregar and libro_id not in libros_prestados:
+            libros_prestados.append(libro_id)
+        elif not agregar and libro_id in libros_prestados:
+            libros_prestados.remove(libro_id)
+        else:
+            return
+        usuario['libros_prestados'] = libros_prestados
+        self._conexion.execute("UPDATE usuarios SET datos = ? WHERE user_id = ?",
+                               (json.dumps(usuario, ensure_ascii=False), user_id))
+
+    def en_transaccion(self, funcion):
+        # Los préstamos y devoluciones de 'funcion' son 'with' anidados de esta transacción
+        with self._conexion:
+            return funcion()
+
+    def registrar_prestamo(self, genero, libro_id, user_id):
+        with self._conexion:
+            libro = self._libro(genero, libro_id)
+            if not libro or not libro.get("disponible", True):
+                return False
+
+            libro["disponible"] = False
+            libro["prestamo_actual"] = user_id
+            self._conexion.execute("INSERT OR REPLACE INTO libros VALUES (?, ?, ?, ?, ?, ?, ?)", fila_libro(libro))
+
+            ultimo = self._conexion.execute("SELECT MAX(prestamo_numero) FROM prestamos").fetchone()[0]
+            prestamo = {
+                "libro_id": libro_id,
+                "genero": genero,
+                "user_id": user_id,
+                "fecha_prestamo": datetime.now().isoformat(timespec="seconds"),
+                "regresado": False,
+                "fecha_devolucion": None
+            }
+            self._conexion.execute("INSERT INTO prestamos VALUES (?, ?, ?, ?, ?)",
+                                   fila_prestamo((ultimo or 0) + 1, prestamo))
+
+            self._actualizar_usuario(user_id, libro_id, agregar=True)
+            self._sumar_agregados(libro_id, user_id, genero, prestamos=1, activos=1)
+        return True
+
+    def registrar_devolucion(self, genero, libro_id):
+        with self._conexion:
+            libro = self._libro(genero, libro_id)
+            if libro is None:
+                return False
+
+            fila = self._conexion.execute(
+                "SELECT prestamo_numero, datos FROM prestamos WHERE libro_id = ? AND regresado = 0 "
+                "ORDER BY prestamo_numero DESC LIMIT 1", (libro_id,)).fetchone()
+            if fila is None:
+                return False
+
+            prestamo_numero, datos = fila
+            prestamo = json.loads(datos)
+            prestamo["regresado"] = True
+            prestamo["fecha_devolucion"] = datetime.now().isoformat(timespec="seconds")
+            self._conexion.execute("UPDATE prestamos SET regresado = 1, datos = ? WHERE prestamo_numero = ?",
+                                   (json.dumps(prestamo, ensure_ascii=False), prestamo_numero))
+
+            libro["disponible"] = True
+            libro["prestamo_actual"] = None
+            self._conexion.execute("INSERT OR REPLACE INTO libros VALUES (?, ?, ?, ?, ?, ?, ?)", fila_libro(libro))
+
+            if prestamo.get("user_id"):
+                self._actualizar_usuario(prestamo["user_id"], libro_id, agregar=False)
+            self._sumar_agregados(None, None, genero, prestamos=0, activos=-1)
+        return True
+
+    def _sumar_agregados(self, libro_id, user_id, genero, prestamos, activos):
+        """Actualiza las tablas de agregados (dentro de la transacción en curso)."""
+        if prestamos and libro_id:
+            self._conexion.execute(
+                "INSERT INTO agregados_libros VALUES (?, ?) "
+                "ON CONFLICT(libro_id) DO UPDATE SET prestamos = prestamos + excluded.prestamos",
+                (libro_id, prestamos))
+        if prestamos and user_id:
+            self._conexion.execute(
+                "INSERT INTO agregados_usuarios VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET prestamos = prestamos + excluded.prestamos",
+                (user_id, prestamos))
+        self._conexion.execute(
+            "INSERT INTO agregados_generos VALUES (?, ?, ?) ON CONFLICT(genero) DO UPDATE SET "
+            "prestamos = prestamos + excluded.prestamos, activos = activos + excluded.activos",
+            (genero or logica_agregados.GENERO_DESCONOCIDO, prestamos, activos))
+
+    def _calcular_agregados(self):
+        generos = dict(self._conexion.execute("SELECT libro_id, genero FROM libros"))
+        return logica_agregados.calcular_agregados(
+            (p["prestamo"] for p in self.listar()), generos.get)
+
+    def agregados(self):
+        # Base creada antes de existir las tablas de agregados (o recién
+        # migrada): se completan una vez. Se compara el total con los préstamos
+        # y no si están vacías, porque un préstamo registrado antes del primer
+        # reporte ya suma en las tablas
+        sumados = self._conexion.execute("SELECT COALESCE(SUM(prestamos), 0) FROM agregados_generos").fetchone()[0]
+        if sumados != self._conexion.execute("SELECT COUNT(*) FROM prestamos").fetchone()[0]:
+            self.guardar_agregados(self._calcular_agregados())
+
+        generos = {
+            genero: {"prestamos": prestamos, "activos": activos}
+            for genero, prestamos, activos in self._conexion.execute(
+                "SELECT genero, prestamos, activos FROM agregados_generos ORDER BY genero")
+        }
+        return {
+            "prestamos_por_libro": dict(self._conexion.execute("SELECT libro_id, prestamos FROM agregados_libros")),
+            "prestamos_por_usuario": dict(self._conexion.execute("SELECT user_id, prestamos FROM agregados_usuarios")),
+            "por_genero": generos,
+            "activos": sum(g["activos"] for g in generos.values())
+        }
+
+    def guardar_agregados(self, agregados):
+        with self._conexion:
+            self._conexion.execute("DELETE FROM agregados_libros")
+            self._conexion.execute("DELETE FROM agregados_usuarios")
+            self._conexion.execute("DELETE FROM agregados_generos")
+            self._conexion.executemany("INSERT INTO agregados_libros VALUES (?, ?)",
+                                       agregados["prestamos_por_libro"].items())
+            self._conexion.executemany("INSERT INTO agregados_usuarios VALUES (?, ?)",
+                                       agregados["prestamos_por_usuario"].items())
+            self._conexion.executemany("INSERT INTO agregados_generos VALUES (?, ?, ?)", [
+                (genero, datos["prestamos"], datos["activos"]) for genero, datos in agregados["por_genero"].items()
+            ])
+
+
+def crear_repositorios_sqlite(ruta):
+    conexion = ConexionPorHilo(ruta)
+    return Repositorios(
+        RepositorioLibrosSQLite(conexion, ruta),
+        RepositorioUsuariosSQLite(conexion),
+        RepositorioPrestamosSQLite(conexion)
+    )
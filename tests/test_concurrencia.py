@@ -0,0 +1,44 @@
+"""
+Escrituras concurrentes entre procesos: varios procesos creados con fork
+prestan y devuelven los mismos ejemplares a la vez y no se pierde ninguna
+actualización (historial, libros, usuarios, índice ISBN y agregados).
+
+Es la prueba de benchmarks/estres_prestamos.py con un tamaño fijo y chico,
+para que corra en pocos segundos.
+
+Uso:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(RAIZ / "benchmarks"))
+
+import estres_prestamos
+
+TRABAJADORES = 4
+OPERACIONES = 15
+EJEMPLARES = 120
+ISBNS = 5
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "la prueba necesita os.fork")
+class TestEscriturasConcurrentes(unittest.TestCase):
+
+    def test_sin_actualizaciones_perdidas(self):
+        resultado = estres_prestamos.ejecutar(TRABAJADORES, OPERACIONES, EJEMPLARES, ISBNS, semilla=7)
+
+        self.assertEqual(resultado["problemas"], [])
+        self.assertEqual(resultado["operaciones"], TRABAJADORES * OPERACIONES)
+        # Con pocos ISBN los procesos compiten: tiene que haber préstamos y devoluciones
+        self.assertGreater(resultado["prestamos"], 0)
+        self.assertGreater(resultado["devoluciones"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
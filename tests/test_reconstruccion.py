@@ -0,0 +1,88 @@
+"""
+La reconstrucción del índice en paralelo (hilos o procesos) debe generar
+exactamente los mismos archivos que la reconstrucción secuencial.
+
+Uso:
+    python -m unittest discover tests
+"""
+
+import json
+import random
+import sys
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from repositorios import indice_isbn_binario, json_libros
+from utils import bloqueos, rutas
+
+GENEROS = ["arte", "ciencia", "ficcion", "historia", "tecnologia"]
+ARCHIVOS = ["indice_isbn.json", "indice_ids.json", "indice_texto.json", indice_isbn_binario.ARCHIVO]
+
+
+def generar_catalogo(dir_libros, cantidad, semilla=7):
+    """Crea 'cantidad' ejemplares sintéticos; varios ISBN se repiten entre géneros."""
+    rnd = random.Random(semilla)
+    for genero in GENEROS:
+        (dir_libros / genero).mkdir(parents=True)
+
+    for _ in range(cantidad):
+        n = rnd.randrange(cantidad // 3)
+        genero = rnd.choice(GENEROS)
+        libro_id = str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+        libro = {
+            "libro_id": libro_id,
+            "isbn": f"978-{n:010d}",
+            "title": f"Libro {n} de {genero}",
+            "autor": f"Autor {n % 37}",
+            "genero": genero,
+            "disponible": rnd.random() > 0.2,
+            "prestamo_actual": None,
+            "historial_prestamos": []
+        }
+        with open(dir_libros / genero / f"{libro_id}.json", "w", encoding="utf-8") as f:
+            json.dump(libro, f, indent=4, ensure_ascii=False)
+
+
+class TestReconstruccionEnParalelo(unittest.TestCase):
+
+    def setUp(self):
+        self._temporal = tempfile.TemporaryDirectory()
+        raiz = Path(self._temporal.name)
+        self.dir_libros = raiz / "data" / "libros"
+        generar_catalogo(self.dir_libros, 600)
+
+        self._directorio_base = rutas.obtener_directorio_base
+        rutas.obtener_directorio_base = lambda: raiz
+        json_libros.invalidar_cache_indice()
+
+        # El bloqueo de escritura también va a la carpeta temporal
+        self._archivo_bloqueo = bloqueos.ARCHIVO_BLOQUEO
+        bloqueos.ARCHIVO_BLOQUEO = raiz / "data" / "escritura.lock"
+
+    def tearDown(self):
+        rutas.obtener_directorio_base = self._directorio_base
+        bloqueos.ARCHIVO_BLOQUEO = self._archivo_bloqueo
+        json_libros.invalidar_cache_indice()
+        self._temporal.cleanup()
+
+    def reconstruir(self, **kwargs):
+        json_libros.reconstruir_indice_isbn(**kwargs)
+        return {nombre: (self.dir_libros / nombre).read_bytes() for nombre in ARCHIVOS}
+
+    def test_hilos_y_procesos_generan_los_mismos_archivos(self):
+        secuencial = self.reconstruir()
+        self.assertTrue(json.loads(secuencial["indice_isbn.json"]))
+
+        for usar_procesos in (False, True):
+            with self.subTest(usar_procesos=usar_procesos):
+                paralelo = self.reconstruir(workers=4, usar_procesos=usar_procesos)
+                for nombre in ARCHIVOS:
+                    self.assertEqual(secuencial[nombre], paralelo[nombre], f"{nombre} difiere")
+
+
+if __name__ == "__main__":
+    unittest.main()
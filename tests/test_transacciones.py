@@ -0,0 +1,176 @@
+"""
+Transacciones con WAL: recuperación después de un corte entre el fsync del
+WAL y la aplicación, reintentos ante conflictos de versión y verificaciones
+al confirmar.
+
+Uso:
+    python -m unittest discover tests
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import bloqueos, transacciones
+from utils.transacciones import ConflictoDeVersion, Transaccion, reintentar_en_conflicto
+
+
+def agregar_elemento(datos, clave, valor):
+    """Modificación idempotente para modificar_json_en_wal."""
+    if datos.get(clave) != valor:
+        datos[clave] = valor
+
+
+class TestTransacciones(unittest.TestCase):
+
+    def setUp(self):
+        self._temporal = tempfile.TemporaryDirectory()
+        self.raiz = Path(self._temporal.name)
+
+        self._wal = transacciones.WAL_FILE
+        self._archivo_bloqueo = bloqueos.ARCHIVO_BLOQUEO
+        transacciones.WAL_FILE = self.raiz / "transacciones.wal"
+        bloqueos.ARCHIVO_BLOQUEO = self.raiz / "escritura.lock"
+
+    def tearDown(self):
+        transacciones.WAL_FILE = self._wal
+        bloqueos.ARCHIVO_BLOQUEO = self._archivo_bloqueo
+        self._temporal.cleanup()
+
+    def leer(self, nombre):
+        with open(self.raiz / nombre, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def escribir(self, nombre, datos):
+        with Transaccion() as tx:
+            tx.escribir_json(self.raiz / nombre, datos)
+
+    def confirmar_con_corte(self, tx):
+        """Confirma 'tx' simulando que el proceso se corta después del fsync del WAL."""
+        with mock.patch.object(transacciones, "_aplicar", side_effect=OSError("corte")):
+            with self.assertRaises(OSError):
+                tx.confirmar()
+
+    def test_recuperar_despues_del_fsync_del_wal(self):
+        tx = Transaccion()
+        tx.escribir_json(self.raiz / "libro.json", {"titulo": "uno"})
+        tx.agregar_linea(self.raiz / "diario.jsonl", '{"evento": 1}\n')
+        self.confirmar_con_corte(tx)
+
+        self.assertFalse((self.raiz / "libro.json").exists())
+        self.assertEqual(transacciones.recuperar_transacciones(), 1)
+        self.assertEqual(self.leer("libro.json"), {"titulo": "uno"})
+        self.assertEqual((self.raiz / "diario.jsonl").read_text(encoding="utf-8"), '{"evento": 1}\n')
+
+        # El WAL quedó vacío: recuperar otra vez no aplica nada
+        self.assertEqual(transacciones.recuperar_transacciones(), 0)
+        self.assertEqual((self.raiz / "diario.jsonl").read_text(encoding="utf-8"), '{"evento": 1}\n')
+
+    def test_el_siguiente_commit_recupera_antes_de_escribir(self):
+        tx = Transaccion()
+        tx.escribir_json(self.raiz / "a.json", {"valor": 1})
+        self.confirmar_con_corte(tx)
+
+        self.escribir("b.json", {"valor": 2})
+
+        self.assertEqual(self.leer("a.json"), {"valor": 1})
+        self.assertEqual(self.leer("b.json"), {"valor": 2})
+        self.assertEqual(transacciones.WAL_FILE.stat().st_size, 0)
+
+    def test_registro_incompleto_del_wal_se_descarta(self):
+        transacciones.WAL_FILE.write_bytes(b'{"operaciones": [')
+        self.assertEqual(transacciones.recuperar_transacciones(), 0)
+
+    def test_modificar_json_en_wal_registra_solo_la_llamada(self):
+        ruta = self.raiz / "usuarios.json"
+        self.escribir("usuarios.json", {"relleno": "x" * 1000})
+
+        tx = Transaccion()
+        tx.modificar_json_en_wal(ruta, {}, agregar_elemento, "u1", "libro")
+        # Otro proceso cambia el archivo antes del commit: no se pisa
+        self.escribir("usuarios.json", {"relleno": "x" * 1000, "u2": "otro"})
+
+        escritos = []
+        aplicar = transacciones._aplicar
+        with mock.patch.object(transacciones, "_aplicar", side_effect=lambda ops: escritos.append(ops) or aplicar(ops)):
+            tx.confirmar()
+
+        operacion, = escritos[0]
+        self.assertEqual(operacion["tipo"], "modificar_json")
+        self.assertNotIn("relleno", json.dumps(operacion))
+        self.assertEqual(self.leer("usuarios.json"), {"relleno": "x" * 1000, "u2": "otro", "u1": "libro"})
+
+        # Reaplicada por la recuperación después de un corte
+        tx = Transaccion()
+        tx.modificar_json_en_wal(ruta, {}, agregar_elemento, "u3", "libro")
+        self.confirmar_con_corte(tx)
+        self.assertEqual(transacciones.recuperar_transacciones(), 1)
+        self.assertEqual(self.leer("usuarios.json")["u3"], "libro")
+
+    def test_conflicto_de_version(self):
+        ruta = self.raiz / "libro.json"
+        with Transaccion() as tx:
+            tx.escribir_registro(ruta, {"disponible": True})
+
+        tx = Transaccion()
+        libro = tx.leer_registro(ruta, None)
+        libro["disponible"] = False
+        tx.escribir_registro(ruta, libro)
+
+        # Otro proceso modifica el libro entre la lectura y el commit
+        with Transaccion() as otra:
+            otro = otra.leer_registro(ruta, None)
+            otra.escribir_registro(ruta, dict(otro, titulo="nuevo"))
+
+        with self.assertRaises(ConflictoDeVersion):
+            tx.confirmar()
+        self.assertEqual(self.leer("libro.json"), {"disponible": True, "titulo": "nuevo", "version": 2})
+
+    def test_reintentar_en_conflicto(self):
+        ruta = self.raiz / "contador.json"
+        with Transaccion() as tx:
+            tx.escribir_registro(ruta, {"valor": 0})
+
+        intentos = []
+
+        def incrementar():
+            with Transaccion() as tx:
+                contador = tx.leer_registro(ruta, None)
+                if len(intentos) < 2:
+                    # Otro proceso incrementa antes de este commit
+                    with Transaccion() as otra:
+                        otro = otra.leer_registro(ruta, None)
+                        otra.escribir_registro(ruta, {"valor": otro["valor"] + 1, "version": otro["version"]})
+                intentos.append(True)
+                tx.escribir_registro(ruta, {"valor": contador["valor"] + 1, "version": contador["version"]})
+
+        reintentar_en_conflicto(incrementar)
+
+        self.assertEqual(len(intentos), 3)
+        self.assertEqual(self.leer("contador.json")["valor"], 3)
+
+    def test_verificar_al_confirmar(self):
+        ruta = self.raiz / "prestamo.json"
+
+        tx = Transaccion()
+        tx.escribir_json(ruta, {"libro_id": "L1"})
+        tx.verificar_al_confirmar(lambda: False, "el ejemplar ya está prestado")
+        with self.assertRaisesRegex(ConflictoDeVersion, "ya está prestado"):
+            tx.confirmar()
+        self.assertFalse(ruta.exists())
+        self.assertFalse(transacciones.WAL_FILE.exists() and transacciones.WAL_FILE.stat().st_size)
+
+        tx = Transaccion()
+        tx.escribir_json(ruta, {"libro_id": "L1"})
+        tx.verificar_al_confirmar(lambda: True, "el ejemplar ya está prestado")
+        tx.confirmar()
+        self.assertEqual(self.leer("prestamo.json"), {"libro_id": "L1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Agregados de préstamos para los reportes.
+
+Tablas que se mantienen al registrar cada préstamo y devolución, para que
+los reportes no tengan que recorrer todo el historial:
+
+    prestamos_por_libro    libro_id -> préstamos históricos
+    prestamos_por_usuario  user_id -> préstamos históricos
+    por_genero             genero -> {"prestamos", "activos"}
+    activos                préstamos sin devolver
+
+Este módulo solo tiene la lógica pura (calcular desde cero, aplicar un
+evento, comparar); dónde se guardan depende del almacenamiento.
+"""
+
+import heapq
+
+# Género que se usa cuando no se puede saber el de un préstamo
+GENERO_DESCONOCIDO = "desconocido"
+
+
+def agregados_vacios():
+    return {
+        "prestamos_por_libro": {},
+        "prestamos_por_usuario": {},
+        "por_genero": {},
+        "activos": 0
+    }
+
+
+def sumar_prestamo(agregados, libro_id, user_id, genero):
+    """Aplica un préstamo nuevo a los agregados (modificados por referencia)."""
+    genero = genero or GENERO_DESCONOCIDO
+    if libro_id:
+        agregados["prestamos_por_libro"][libro_id] = agregados["prestamos_por_libro"].get(libro_id, 0) + 1
+    if user_id:
+        agregados["prestamos_por_usuario"][user_id] = agregados["prestamos_por_usuario"].get(user_id, 0) + 1
+    por_genero = agregados["por_genero"].setdefault(genero, {"prestamos": 0, "activos": 0})
+    por_genero["prestamos"] += 1
+    por_genero["activos"] += 1
+    agregados["activos"] += 1
+
+
+def sumar_devolucion(agregados, genero):
+    """Aplica una devolución a los agregados (modificados por referencia)."""
+    genero = genero or GENERO_DESCONOCIDO
+    por_genero = agregados["por_genero"].setdefault(genero, {"prestamos": 0, "activos": 0})
+    por_genero["activos"] -= 1
+    agregados["activos"] -= 1
+
+
+def calcular_agregados(prestamos, genero_de_libro):
+    """
+    Calcula los agregados desde cero.
+
+    Args:
+        prestamos (iterable): Diccionarios internos de los préstamos
+        genero_de_libro (callable): libro_id -> género, para los préstamos
+                                    que no lo guardan (o None)
+
+    Returns:
+        dict: Agregados
+    """
+    agregados = agregados_vacios()
+    for prestamo in prestamos:
+        libro_id = prestamo.get("libro_id")
+        genero = prestamo.get("genero") or (genero_de_libro(libro_id) if libro_id else None)
+        sumar_prestamo(agregados, libro_id, prestamo.get("user_id"), genero)
+        if prestamo.get("regresado", False):
+            sumar_devolucion(agregados, genero)
+    return agregados
+
+
+def diferencias(guardados, calculados):
+    """
+    Compara dos agregados.
+
+    Returns:
+        list: Textos con cada diferencia (vacía si coinciden)
+    """
+    resultado = []
+    if guardados.get("activos") != calculados["activos"]:
+        resultado.append(f"activos: {guardados.get('activos')} != {calculados['activos']}")
+
+    for tabla in ("prestamos_por_libro", "prestamos_por_usuario", "por_genero"):
+        tabla_guardada = guardados.get(tabla, {})
+        tabla_calculada = calculados[tabla]
+        for clave in sorted(set(tabla_guardada) | set(tabla_calculada)):
+            if tabla_guardada.get(clave) != tabla_calculada.get(clave):
+                resultado.append(f"{tabla}[{clave}]: {tabla_guardada.get(clave)} != {tabla_calculada.get(clave)}")
+    return resultado
+
+
+class Ranking:
+    """
+    Ranking por conteo con un heap de máximos mantenido en cada incremento.
+
+    Cada incremento agrega la nueva entrada (-conteo, orden, clave) al heap
+    sin quitar la anterior: las entradas viejas se descartan al consultar
+    (borrado perezoso) y el heap se rearma cuando acumula demasiadas. Los
+    empates se resuelven por orden de aparición de la clave, como
+    Counter.most_common.
+    """
+
+    def __init__(self, conteos):
+        self._conteos = dict(conteos)
+        self._orden = {clave: orden for orden, clave in enumerate(self._conteos)}
+        self._rearmar()
+
+    def _rearmar(self):
+        self._heap = [(-conteo, self._orden[clave], clave) for clave, conteo in self._conteos.items()]
+        heapq.heapify(self._heap)
+
+    def incrementar(self, clave, cantidad=1):
+        if clave not in self._orden:
+            self._orden[clave] = len(self._orden)
+        conteo = self._conteos.get(clave, 0) + cantidad
+        self._conteos[clave] = conteo
+        heapq.heappush(self._heap, (-conteo, self._orden[clave], clave))
+        if len(self._heap) > 2 * len(self._conteos) + 64:
+            self._rearmar()
+
+    def top(self, n):
+        """
+        Returns:
+            list: Tuplas (clave, conteo) de los n mayores, de mayor a menor
+        """
+        resultado = []
+        vigentes = []
+        while self._heap and len(resultado) < n:
+            entrada = heapq.heappop(self._heap)
+            menos_conteo, _, clave = entrada
+            # Entrada vieja: el conteo de la clave ya cambió
+            if self._conteos.get(clave) != -menos_conteo:
+                continue
+            vigentes.append(entrada)
+            resultado.append((clave, -menos_conteo))
+
+        for entrada in vigentes:
+            heapq.heappush(self._heap, entrada)
+        return resultado
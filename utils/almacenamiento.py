@@ -29,9 +29,12 @@ def escribir_json(path: Path, data: Any) -> None:
     tmp.replace(path)
 
 def buscar_libro_recursivo(libro_id: str) -> Path | None:
-    """Busca recursivamente <libro_id>.json dentro de datos/libros/**"""
-    objetivo = f"{libro_id}.json"
-    for p in LIBROS_ROOT.rglob("*.json"):
-        if p.name == objetivo:
-            return p
-    return None
+    """Ubica <libro_id>.json usando el índice de IDs (sin recorrer data/libros/**)"""
+    from repositorios.json_libros import ubicar_libro
+    from utils.rutas import obtener_directorio_base
+
+    ubicacion = ubicar_libro(libro_id)
+    if ubicacion is None:
+        return None
+    p = obtener_directorio_base() / ubicacion["ruta"]
+    return p if p.exists() else None
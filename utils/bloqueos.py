@@ -0,0 +1,68 @@
+"""
+Bloqueo de escritura entre procesos.
+
+Varios procesos (dos terminales, el servidor por socket, la API HTTP) pueden
+modificar los mismos archivos de datos. Las escrituras se serializan con un
+bloqueo consultivo (fcntl.flock) sobre data/escritura.lock. Las lecturas no
+lo toman: los archivos se reemplazan de forma atómica y el diario de
+préstamos tolera una última línea incompleta.
+
+El bloqueo es reentrante dentro de un proceso y también excluye a los demás
+hilos del mismo proceso. En sistemas sin fcntl (Windows) solo se
+serializan los hilos del proceso.
+
+Uso:
+    with bloqueo_escritura():
+        ...
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from utils.rutas import obtener_directorio_datos
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+ARCHIVO_BLOQUEO = obtener_directorio_datos() / "escritura.lock"
+
+_lock = threading.RLock()
+# Profundidad de anidamiento y descriptor del archivo bloqueado por este proceso
+_estado = {"profundidad": 0, "descriptor": None}
+
+
+def _bloquear():
+    """
+    Abre el archivo de bloqueo y espera a obtenerlo en exclusiva.
+    Se abre en cada adquisición: flock bloquea la descripción de archivo
+    abierta, y un descriptor heredado por fork compartiría el bloqueo con
+    el proceso padre.
+    """
+    ARCHIVO_BLOQUEO.parent.mkdir(parents=True, exist_ok=True)
+    descriptor = os.open(ARCHIVO_BLOQUEO, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+    except BaseException:
+        os.close(descriptor)
+        raise
+    return descriptor
+
+
+@contextmanager
+def bloqueo_escritura():
+    """Toma el bloqueo de escritura de los datos (espera si otro proceso lo tiene)."""
+    with _lock:
+        if _estado["profundidad"] == 0 and fcntl is not None:
+            _estado["descriptor"] = _bloquear()
+        _estado["profundidad"] += 1
+        try:
+            yield
+        finally:
+            _estado["profundidad"] -= 1
+            if _estado["profundidad"] == 0 and _estado["descriptor"] is not None:
+                # Cerrar el descriptor libera el bloqueo
+                os.close(_estado["descriptor"])
+                _estado["descriptor"] = None
@@ -0,0 +1,160 @@
+"""
+Estadísticas del catálogo sobre una vista columnar.
+
+En lugar de recorrer todos los libros una vez por género, se arma en una
+sola pasada una vista columnar del catálogo: el género, la disponibilidad y
+el mes del último préstamo de cada ejemplar se guardan como códigos enteros
+en arreglos. Las tablas salen de reducciones sobre esos arreglos:
+numpy.bincount si NumPy está instalado o, si no, collections.Counter sobre
+arreglos de la biblioteca estándar (el conteo se hace en C en ambos casos).
+"""
+
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+
+SIN_PRESTAMOS = "sin préstamos"
+SIN_FECHA = "sin fecha"
+
+
+class CatalogoColumnar:
+    """
+    Vista columnar del catálogo: una posición por ejemplar.
+
+    Atributos:
+        generos (list): Nombre de cada código de género
+        meses (list): Etiqueta (AAAA-MM, 'sin préstamos' o 'sin fecha') de cada código de mes
+        codigos_genero (array): Código de género de cada ejemplar
+        disponibles (array): 1 si el ejemplar está disponible, 0 si está prestado
+        codigos_mes (array): Código del mes del último préstamo de cada ejemplar
+    """
+
+    def __init__(self, generos, meses, codigos_genero, disponibles, codigos_mes):
+        self.generos = generos
+        self.meses = meses
+        self.codigos_genero = codigos_genero
+        self.disponibles = disponibles
+        self.codigos_mes = codigos_mes
+
+    def __len__(self):
+        return len(self.codigos_genero)
+
+
+def construir_catalogo_columnar(libros, prestamos):
+    """
+    Arma la vista columnar en una pasada sobre los préstamos y una sobre los libros.
+
+    Args:
+        libros (iterable): Libros (dicts con genero y disponible)
+        prestamos (iterable): Préstamos en orden de número (dicts con libro_id
+                              y, si la tiene, fecha_prestamo)
+
+    Returns:
+        CatalogoColumnar
+    """
+    # Mes del último préstamo de cada ejemplar
+    ultimo_mes = {}
+    for prestamo in prestamos:
+        libro_id = prestamo.get("libro_id")
+        if libro_id:
+            ultimo_mes[libro_id] = (prestamo.get("fecha_prestamo") or "")[:7] or SIN_FECHA
+
+    codigo_genero = {}
+    codigo_mes = {}
+    codigos_genero = array("I")
+    disponibles = array("B")
+    codigos_mes = array("I")
+
+    for libro in libros:
+        genero = libro.get("genero", "otros")
+        mes = ultimo_mes.get(libro.get("libro_id"), SIN_PRESTAMOS)
+        codigos_genero.append(codigo_genero.setdefault(genero, len(codigo_genero)))
+        disponibles.append(1 if libro.get("disponible", False) else 0)
+        codigos_mes.append(codigo_mes.setdefault(mes, len(codigo_mes)))
+
+    return CatalogoColumnar(list(codigo_genero), list(codigo_mes), codigos_genero, disponibles, codigos_mes)
+
+
+def _a_numpy(arreglo):
+    """Vista NumPy (sin copiar) de un array de la biblioteca estándar."""
+    return np.frombuffer(arreglo, dtype=np.dtype(f"u{arreglo.itemsize}"))
+
+
+def contar_por_genero_y_disponibilidad(catalogo):
+    """
+    Returns:
+        dict: (codigo_genero, disponible) -> cantidad de ejemplares
+    """
+    if np is not None and len(catalogo):
+        celdas = _a_numpy(catalogo.codigos_genero).astype(np.int64) * 2 + _a_numpy(catalogo.disponibles)
+        conteo = np.bincount(celdas)
+        return {(celda // 2, celda % 2): int(conteo[celda]) for celda in np.flatnonzero(conteo).tolist()}
+    return Counter(zip(catalogo.codigos_genero, catalogo.disponibles))
+
+
+def contar_por_genero_disponibilidad_y_mes(catalogo):
+    """
+    Returns:
+        dict: (codigo_genero, disponible, codigo_mes) -> cantidad de ejemplares
+    """
+    cantidad_meses = len(catalogo.meses)
+    if np is not None and len(catalogo):
+        celdas = ((_a_numpy(catalogo.codigos_genero).astype(np.int64) * 2 + _a_numpy(catalogo.disponibles))
+                  * cantidad_meses + _a_numpy(catalogo.codigos_mes))
+        conteo = np.bincount(celdas)
+        return {
+            (celda // (2 * cantidad_meses), celda // cantidad_meses % 2, celda % cantidad_meses): int(conteo[celda])
+            for celda in np.flatnonzero(conteo).tolist()
+        }
+    return Counter(zip(catalogo.codigos_genero, catalogo.disponibles, catalogo.codigos_mes))
+
+
+def matriz_por_genero(catalogo):
+    """
+    Matriz de estadísticas por género: una fila por género (ordenados por
+    nombre) con [total, disponibles, prestados, % disponibilidad].
+
+    Returns:
+        tuple: (generos, matriz)
+    """
+    conteo = contar_por_genero_y_disponibilidad(catalogo)
+    generos = sorted(catalogo.generos)
+    codigos = {genero: codigo for codigo, genero in enumerate(catalogo.generos)}
+
+    matriz = []
+    for genero in generos:
+        codigo = codigos[genero]
+        disponibles = conteo.get((codigo, 1), 0)
+        prestados = conteo.get((codigo, 0), 0)
+        total = disponibles + prestados
+        matriz.append([total, disponibles, prestados, (disponibles / total * 100) if total else 0.0])
+
+    return generos, matriz
+
+
+def pivot_genero_disponibilidad_mes(catalogo):
+    """
+    Pivot género × disponibilidad × mes del último préstamo.
+
+    Returns:
+        list: Filas {'Género', 'Mes', 'Disponibles', 'Prestados', 'Total'}
+              ordenadas por género y mes
+    """
+    conteo = contar_por_genero_disponibilidad_y_mes(catalogo)
+
+    celdas = {}
+    for (codigo_genero, disponible, codigo_mes), cantidad in conteo.items():
+        clave = (catalogo.generos[codigo_genero], catalogo.meses[codigo_mes])
+        fila = celdas.setdefault(clave, [0, 0])
+        fila[disponible] += cantidad
+
+    return [
+        {"Género": genero, "Mes": mes, "Disponibles": disponibles, "Prestados": prestados,
+         "Total": disponibles + prestados}
+        for (genero, mes), (prestados, disponibles) in sorted(celdas.items())
+    ]
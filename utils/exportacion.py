@@ -0,0 +1,151 @@
+"""
+Exportación en streaming del historial de préstamos y del catálogo.
+
+Los registros se toman de generadores sobre el almacenamiento activo y se
+escriben de a uno en CSV o JSONL, a través de un buffer de tamaño fijo: la
+memoria usada no depende de la cantidad de registros exportados.
+
+El formato sale de la extensión del archivo (.csv o .jsonl, con .gz al final
+para comprimir con gzip), o se indica explícitamente.
+"""
+
+import csv
+import gzip
+import io
+import json
+from pathlib import Path
+
+from repositorios import obtener_repositorios
+
+# Tamaño del buffer de escritura (bytes)
+TAMANO_BUFFER = 1024 * 1024
+
+FORMATOS = ("csv", "jsonl")
+
+COLUMNAS_PRESTAMOS = ["prestamo_numero", "libro_id", "user_id", "genero",
+                      "fecha_prestamo", "regresado", "fecha_devolucion"]
+COLUMNAS_CATALOGO = ["libro_id", "isbn", "title", "autor", "genero",
+                     "disponible", "prestamo_actual", "prestamos_historicos"]
+
+
+def iterar_prestamos():
+    """Genera cada préstamo del historial como una fila plana (COLUMNAS_PRESTAMOS)."""
+    for item in obtener_repositorios().prestamos.iterar():
+        prestamo = item["prestamo"]
+        yield {
+            "prestamo_numero": item["prestamo_numero"],
+            "libro_id": prestamo.get("libro_id"),
+            "user_id": prestamo.get("user_id"),
+            "genero": prestamo.get("genero"),
+            "fecha_prestamo": prestamo.get("fecha_prestamo"),
+            "regresado": prestamo.get("regresado", False),
+            "fecha_devolucion": prestamo.get("fecha_devolucion")
+        }
+
+
+def iterar_catalogo():
+    """Genera cada ejemplar del catálogo como una fila plana (COLUMNAS_CATALOGO)."""
+    for libro in obtener_repositorios().libros.listar():
+        yield {
+            "libro_id": libro.get("libro_id"),
+            "isbn": libro.get("isbn"),
+            "title": libro.get("title"),
+            "autor": libro.get("autor"),
+            "genero": libro.get("genero"),
+            "disponible": libro.get("disponible", True),
+            "prestamo_actual": libro.get("prestamo_actual"),
+            "prestamos_historicos": len(libro.get("historial_prestamos", []))
+        }
+
+
+def formato_de_ruta(ruta):
+    """
+    Deduce el formato y la compresión de la extensión del archivo.
+
+    Returns:
+        tuple: (formato, comprimir)
+    """
+    sufijos = [sufijo.lower() for sufijo in Path(ruta).suffixes]
+    comprimir = bool(sufijos) and sufijos[-1] == ".gz"
+    if comprimir:
+        sufijos = sufijos[:-1]
+    formato = "jsonl" if sufijos and sufijos[-1] in (".jsonl", ".ndjson") else "csv"
+    return formato, comprimir
+
+
+def _abrir_salida(ruta, comprimir, tamano_buffer):
+    """Abre el archivo de salida en modo texto con un buffer de tamaño fijo."""
+    crudo = gzip.GzipFile(ruta, "wb") if comprimir else io.FileIO(ruta, "wb")
+    return io.TextIOWrapper(io.BufferedWriter(crudo, buffer_size=tamano_buffer), encoding="utf-8", newline="")
+
+
+def exportar_registros(registros, ruta, columnas, formato=None, comprimir=None,
+                       tamano_buffer=TAMANO_BUFFER):
+    """
+    Escribe los registros en CSV o JSONL de forma incremental.
+
+    Args:
+        registros (iterable): Filas (dicts); se consumen de a una
+        ruta (str | Path): Archivo de destino
+        columnas (list): Columnas a exportar, en orden
+        formato (str, optional): 'csv' o 'jsonl' (por defecto, según la extensión)
+        comprimir (bool, optional): gzip (por defecto, si la extensión termina en .gz)
+        tamano_buffer (int): Tamaño del buffer de escritura en bytes
+
+    Returns:
+        int: Cantidad de registros exportados
+    """
+    formato_ruta, comprimir_ruta = formato_de_ruta(ruta)
+    formato = formato or formato_ruta
+    comprimir = comprimir_ruta if comprimir is None else comprimir
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato} (se espera csv o jsonl)")
+
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    cantidad = 0
+    with _abrir_salida(ruta, comprimir, tamano_buffer) as salida:
+        if formato == "csv":
+            escritor = csv.writer(salida)
+            escritor.writerow(columnas)
+            for registro in registros:
+                escritor.writerow([registro.get(columna) for columna in columnas])
+                cantidad += 1
+        else:
+            for registro in registros:
+                salida.write(json.dumps({columna: registro.get(columna) for columna in columnas},
+                                        ensure_ascii=False))
+                salida.write("\n")
+                cantidad += 1
+    return cantidad
+
+
+def _validar_columnas(columnas, disponibles):
+    if columnas is None:
+        return list(disponibles)
+    desconocidas = [columna for columna in columnas if columna not in disponibles]
+    if desconocidas:
+        raise ValueError(f"Columnas desconocidas: {', '.join(desconocidas)} "
+                         f"(disponibles: {', '.join(disponibles)})")
+    return list(columnas)
+
+
+def exportar_prestamos(ruta, columnas=None, formato=None, comprimir=None):
+    """
+    Exporta el historial completo de préstamos.
+
+    Returns:
+        int: Cantidad de préstamos exportados
+    """
+    columnas = _validar_columnas(columnas, COLUMNAS_PRESTAMOS)
+    return exportar_registros(iterar_prestamos(), ruta, columnas, formato, comprimir)
+
+
+def exportar_catalogo(ruta, columnas=None, formato=None, comprimir=None):
+    """
+    Exporta todos los ejemplares del catálogo.
+
+    Returns:
+        int: Cantidad de ejemplares exportados
+    """
+    columnas = _validar_columnas(columnas, COLUMNAS_CATALOGO)
+    return exportar_registros(iterar_catalogo(), ruta, columnas, formato, comprimir)
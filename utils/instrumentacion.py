@@ -0,0 +1,274 @@
+"""
+Instrumentación de las operaciones de los servicios.
+
+Cada función instrumentada registra, por operación ("modulo.funcion"):
+cantidad de llamadas y errores, un histograma de latencias, archivos
+abiertos y bytes leídos/escritos. Las métricas son inclusivas: una operación
+cuenta también lo que hicieron las operaciones que llamó.
+
+Está desactivada por defecto: el envoltorio solo consulta una variable y
+llama a la función original. Se activa con activar(), con la opción
+--instrumentar de main.py o con la variable de entorno
+BIBLIOTECA_INSTRUMENTACION=<archivo.json> (en ese caso las métricas se
+guardan en ese archivo al terminar el proceso).
+
+Los archivos abiertos se cuentan con el evento de auditoría "open"; los bytes
+salen de /proc/self/io (solo Linux; en otros sistemas quedan en None). Lo que
+hacen los procesos hijos (reconstrucción en paralelo) no se cuenta.
+"""
+
+import atexit
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+VARIABLE_ENTORNO = "BIBLIOTECA_INSTRUMENTACION"
+
+# Límites superiores (en segundos) de los intervalos del histograma de latencias
+LIMITES_HISTOGRAMA = [0.00001, 0.00003, 0.0001, 0.0003, 0.001, 0.003,
+                      0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0]
+
+# Bandera de los generadores en co_flags (inspect.CO_GENERATOR, sin importar inspect)
+_CO_GENERADOR = 0x20
+
+_activa = False
+_metricas = {}
+_lock = threading.Lock()
+
+# Contador global de archivos abiertos (lo incrementa el hook de auditoría)
+_archivos_abiertos = 0
+_hook_instalado = False
+# Descriptor de /proc/self/io (None si no está disponible) y bytes leídos de
+# ese mismo archivo, que se descuentan para no contar la propia medición
+_fd_io = None
+_bytes_propios = 0
+
+
+def _auditar(evento, args):
+    global _archivos_abiertos
+    if _activa and evento == "open":
+        _archivos_abiertos += 1
+
+
+def _bytes_io():
+    """
+    Returns:
+        tuple: (bytes leídos, bytes escritos) por el proceso hasta ahora, o (None, None)
+    """
+    global _bytes_propios
+    if _fd_io is None:
+        return None, None
+    datos = os.pread(_fd_io, 512, 0)
+    leidos = escritos = None
+    for linea in datos.split(b"\n"):
+        if linea.startswith(b"rchar:"):
+            leidos = int(linea[6:]) - _bytes_propios
+        elif linea.startswith(b"wchar:"):
+            escritos = int(linea[6:])
+    _bytes_propios += len(datos)
+    return leidos, escritos
+
+
+def activar():
+    """Activa la instrumentación (las métricas anteriores se conservan)."""
+    global _activa, _hook_instalado, _fd_io
+    if not _hook_instalado:
+        sys.addaudithook(_auditar)
+        _hook_instalado = True
+    if _fd_io is None:
+        try:
+            _fd_io = os.open("/proc/self/io", os.O_RDONLY)
+        except OSError:
+            _fd_io = None
+    _activa = True
+
+
+def desactivar():
+    global _activa
+    _activa = False
+
+
+def esta_activa():
+    return _activa
+
+
+def reiniciar():
+    """Descarta las métricas acumuladas."""
+    with _lock:
+        _metricas.clear()
+
+
+def _metrica_vacia():
+    return {
+        "llamadas": 0,
+        "errores": 0,
+        "segundos_total": 0.0,
+        "segundos_min": None,
+        "segundos_max": 0.0,
+        "histograma": [0] * (len(LIMITES_HISTOGRAMA) + 1),
+        "archivos_abiertos": 0,
+        "bytes_leidos": None,
+        "bytes_escritos": None
+    }
+
+
+def _registrar(nombre, segundos, error, archivos, leidos, escritos):
+    with _lock:
+        metrica = _metricas.get(nombre)
+        if metrica is None:
+            metrica = _metricas[nombre] = _metrica_vacia()
+        metrica["llamadas"] += 1
+        if error:
+            metrica["errores"] += 1
+        metrica["segundos_total"] += segundos
+        if metrica["segundos_min"] is None or segundos < metrica["segundos_min"]:
+            metrica["segundos_min"] = segundos
+        if segundos > metrica["segundos_max"]:
+            metrica["segundos_max"] = segundos
+        metrica["histograma"][bisect.bisect_left(LIMITES_HISTOGRAMA, segundos)] += 1
+        metrica["archivos_abiertos"] += archivos
+        if leidos is not None:
+            metrica["bytes_leidos"] = (metrica["bytes_leidos"] or 0) + leidos
+            metrica["bytes_escritos"] = (metrica["bytes_escritos"] or 0) + escritos
+
+
+def instrumentar(funcion, nombre=None):
+    """
+    Envuelve una función para registrar sus métricas cuando la
+    instrumentación está activa. Se puede usar como decorador.
+    """
+    nombre = nombre or f"{funcion.__module__}.{funcion.__name__}"
+
+    @functools.wraps(funcion)
+    def envoltorio(*args, **kwargs):
+        if not _activa:
+            return funcion(*args, **kwargs)
+
+        archivos_inicio = _archivos_abiertos
+        leidos_inicio, escritos_inicio = _bytes_io()
+        error = True
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion(*args, **kwargs)
+            error = False
+            return resultado
+        finally:
+            segundos = time.perf_counter() - inicio
+            leidos, escritos = _bytes_io()
+            if leidos is not None and leidos_inicio is not None:
+                leidos, escritos = leidos - leidos_inicio, escritos - escritos_inicio
+            else:
+                leidos = escritos = None
+            _registrar(nombre, segundos, error, _archivos_abiertos - archivos_inicio, leidos, escritos)
+
+    envoltorio.__instrumentada__ = True
+    return envoltorio
+
+
+def instrumentar_modulo(espacio, extras=()):
+    """
+    Instrumenta las funciones públicas definidas en un módulo, más las
+    privadas indicadas en extras. Se llama al final del módulo con globals():
+    así también pasan por el envoltorio las llamadas internas del módulo.
+    Los generadores no se envuelven (solo se mediría su creación).
+    """
+    modulo = espacio["__name__"]
+    for nombre, valor in list(espacio.items()):
+        if not isinstance(valor, types.FunctionType) or valor.__code__.co_flags & _CO_GENERADOR:
+            continue
+        if getattr(valor, "__instrumentada__", False):
+            continue
+        if getattr(valor, "__module__", None) != modulo:
+            continue
+        if nombre.startswith("_") and nombre not in extras:
+            continue
+        espacio[nombre] = instrumentar(valor)
+
+
+def _percentil_ms(metrica, fraccion):
+    """
+    Límite superior (en ms) del intervalo del histograma que contiene el
+    percentil, acotado por la latencia máxima observada.
+    """
+    objetivo = fraccion * metrica["llamadas"]
+    acumulado = 0
+    for posicion, cantidad in enumerate(metrica["histograma"]):
+        acumulado += cantidad
+        if acumulado >= objetivo and cantidad:
+            break
+    limite = LIMITES_HISTOGRAMA[posicion] if posicion < len(LIMITES_HISTOGRAMA) else metrica["segundos_max"]
+    return round(min(limite, metrica["segundos_max"]) * 1000, 3)
+
+
+def _etiqueta_intervalo(posicion):
+    if posicion < len(LIMITES_HISTOGRAMA):
+        return f"<={LIMITES_HISTOGRAMA[posicion] * 1000:g}ms"
+    return f">{LIMITES_HISTOGRAMA[-1] * 1000:g}ms"
+
+
+def obtener_metricas():
+    """
+    Returns:
+        dict: Por operación: llamadas, errores, latencias en ms (total,
+              promedio, mínima, máxima y p50/p95/p99 aproximados por el
+              histograma), histograma, archivos abiertos y bytes leídos/escritos
+    """
+    with _lock:
+        copia = {nombre: dict(metrica, histograma=list(metrica["histograma"]))
+                 for nombre, metrica in _metricas.items()}
+
+    resultado = {}
+    for nombre in sorted(copia):
+        metrica = copia[nombre]
+        llamadas = metrica["llamadas"]
+        resultado[nombre] = {
+            "llamadas": llamadas,
+            "errores": metrica["errores"],
+            "total_ms": round(metrica["segundos_total"] * 1000, 3),
+            "promedio_ms": round(metrica["segundos_total"] * 1000 / llamadas, 3),
+            "min_ms": round(metrica["segundos_min"] * 1000, 3),
+            "max_ms": round(metrica["segundos_max"] * 1000, 3),
+            "p50_ms": _percentil_ms(metrica, 0.5),
+            "p95_ms": _percentil_ms(metrica, 0.95),
+            "p99_ms": _percentil_ms(metrica, 0.99),
+            "histograma": {_etiqueta_intervalo(posicion): cantidad
+                           for posicion, cantidad in enumerate(metrica["histograma"]) if cantidad},
+            "archivos_abiertos": metrica["archivos_abiertos"],
+            "archivos_por_llamada": round(metrica["archivos_abiertos"] / llamadas, 2),
+            "bytes_leidos": metrica["bytes_leidos"],
+            "bytes_escritos": metrica["bytes_escritos"]
+        }
+    return resultado
+
+
+def volcar_json(ruta=None):
+    """
+    Devuelve las métricas (y las del caché de libros) como texto JSON y, si
+    se indica una ruta, las guarda en ese archivo.
+    """
+    from repositorios.cache_libros import estadisticas_cache
+
+    texto = json.dumps({
+        "operaciones": obtener_metricas(),
+        "cache_libros": estadisticas_cache()
+    }, indent=4, ensure_ascii=False)
+    if ruta is not None:
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        Path(ruta).write_text(texto, encoding="utf-8")
+    return texto
+
+
+def activar_con_volcado(ruta):
+    """Activa la instrumentación y guarda las métricas en la ruta al terminar el proceso."""
+    activar()
+    atexit.register(volcar_json, ruta)
+
+
+if os.environ.get(VARIABLE_ENTORNO):
+    activar_con_volcado(os.environ[VARIABLE_ENTORNO])
@@ -1,97 +1,226 @@
 import csv
-import json
 from collections import Counter
 from pathlib import Path
+from negocio import agregados_service, prestamos_service, usuario_service
+from repositorios import obtener_repositorios
+from utils import estadisticas, exportacion
 
 
 class ReportGenerator:
     def __init__(self):
         """
         Inicializa el generador de reportes.
-        Carga automáticamente los datos desde los archivos.
+        Los datos no se cargan acá: se cargan completos en el primer reporte
+        y después cada reporte aplica solo los cambios (ver refresh()).
         """
         self.base_dir = Path(__file__).parent.parent
         self.reports_dir = self.base_dir / 'reports'
         self.reports_dir.mkdir(exist_ok=True)
-        self.users = self._cargar_usuarios()
-        self.books = self._cargar_libros()
-        self.loans = self._cargar_prestamos()
-
-    def _cargar_usuarios(self):
-        """Carga usuarios desde usuarios.json"""
-        archivo = self.base_dir / 'data' / 'usuarios' / 'usuarios.json'
-        with open(archivo, 'r', encoding='utf-8') as f:
-            usuarios_lista = json.load(f)
+        self._users = None
+        self._books = None
+        self._loans = None
+        # Estado para aplicar los cambios de forma incremental
+        self._fuente_usuarios = None
+        self._marca_libros = None
+        self._fuente_prestamos = None
+        self._prestamos_vistos = 0
+        self._prestamos_activos = set()
+        # Vista columnar del catálogo (se rearma solo si cambiaron los datos)
+        self._columnar = None
+
+    # ---- Carga diferida ----
+    @property
+    def users(self):
+        if self._users is None:
+            self._refrescar_usuarios()
+        return self._users
+
+    @property
+    def books(self):
+        if self._books is None:
+            self._cargar_libros()
+        return self._books
+
+    @property
+    def loans(self):
+        if self._loans is None:
+            self._refrescar_prestamos()
+        return self._loans
+
+    def refresh(self):
+        """
+        Pone al día los datos de los reportes aplicando solo los cambios:
+        - usuarios: se vuelven a copiar solo si el servicio recargó el archivo
+        - libros: se releen solo los géneros cuya carpeta cambió de mtime y,
+          dentro de ellos, los archivos nuevos o modificados después
+        - préstamos: se agregan los préstamos nuevos y se actualizan los
+          que estaban activos (devoluciones)
+        La primera llamada hace la carga completa. Los reportes que no usan
+        todos los datos refrescan solo lo que muestran.
+        """
+        self._refrescar_usuarios()
+        self._refrescar_catalogo()
+        self._refrescar_prestamos()
+
+    def _refrescar_usuarios(self):
+        """Copia los usuarios del almacenamiento activo si cambiaron"""
+        # Con archivos JSON el servicio devuelve el mismo diccionario cacheado
+        # mientras usuarios.json no cambie
+        fuente = usuario_service.cargar_usuarios()
+        if fuente is self._fuente_usuarios:
+            return
 
-        # Convertir a diccionario con user_id como clave
+        # Copiar cada usuario agregando su user_id
         usuarios = {}
-        for user_data in usuarios_lista:
-            user_id = user_data['user_id']
-            usuario = user_data['user'].copy()
+        for user_id, user in fuente.items():
+            usuario = user.copy()
             usuario['user_id'] = user_id
             usuarios[user_id] = usuario
 
-        return usuarios
+        self._users = usuarios
+        self._fuente_usuarios = fuente
+
+    def _refrescar_catalogo(self):
+        """Carga los libros la primera vez y después aplica solo los cambios"""
+        if self._books is None:
+            self._cargar_libros()
+        else:
+            self._refrescar_libros()
+
+    @staticmethod
+    def _libros_mostrados(libro_ids):
+        """
+        Lee solo los libros que muestra un reporte, sin poner al día todo el
+        catálogo.
+
+        Returns:
+            dict: libro_id -> datos del libro (los que existen)
+        """
+        libros = obtener_repositorios().libros
+        mostrados = {}
+        for libro_id in libro_ids:
+            encontrado = libros.buscar_por_id(libro_id)
+            if encontrado:
+                mostrados[libro_id] = encontrado['libro']
+        return mostrados
 
     def _cargar_libros(self):
-        """Carga todos los libros desde la estructura de directorios por género"""
-        dir_libros = self.base_dir / 'data' / 'libros'
-        libros = {}
-
-        # Recorrer todos los directorios de géneros
-        for genero_dir in dir_libros.iterdir():
-            if genero_dir.is_dir():
-                # Leer todos los archivos JSON del género
-                for archivo_libro in genero_dir.glob('*.json'):
-                    try:
-                        with open(archivo_libro, 'r', encoding='utf-8') as f:
-                            libro = json.load(f)
-                            libro_id = libro.get('libro_id')
-                            if libro_id:
-                                libros[libro_id] = libro
-                    except json.JSONDecodeError:
-                        pass
-
-        return libros
-
-    def _cargar_prestamos(self):
-        """Carga préstamos desde prestamos.json"""
-        archivo = self.base_dir / 'data' / 'prestamos' / 'prestamos.json'
-        with open(archivo, 'r', encoding='utf-8') as f:
-            prestamos_lista = json.load(f)
-
-        # Convertir a diccionario con prestamo_numero como clave
-        prestamos = {}
-        for prestamo_data in prestamos_lista:
-            # Verificar que el elemento tenga la estructura correcta
-            if not isinstance(prestamo_data, dict):
-                continue
+        """Carga todos los libros desde el almacenamiento activo"""
+        self._marca_libros = None
+        self._books = {}
+        self._refrescar_libros()
+
+    def _refrescar_libros(self):
+        """
+        Aplica los cambios de los libros desde la última carga. El repositorio
+        devuelve solo los libros nuevos, modificados o eliminados (con archivos
+        JSON, los de los géneros cuya carpeta cambió de mtime), o el catálogo
+        completo si no puede saber qué cambió.
+        """
+        marca, modificados, eliminados = obtener_repositorios().libros.cambios_desde(self._marca_libros)
+        self._marca_libros = marca
+
+        if eliminados is None:
+            self._books = {libro['libro_id']: libro for libro in modificados}
+            self._columnar = None
+            return
+
+        for libro in modificados:
+            self._books[libro['libro_id']] = libro
+        for libro_id in eliminados:
+            self._books.pop(libro_id, None)
+        if modificados or eliminados:
+            self._columnar = None
+
+    @staticmethod
+    def _convertir_prestamo(prestamo_data):
+        """
+        Convierte un préstamo del servicio al formato de los reportes.
 
-            # Puede venir en dos formatos: con 'prestamo' anidado o directo
-            if 'prestamo_numero' in prestamo_data and 'prestamo' in prestamo_data:
-                # Formato: {"prestamo_numero": 1, "prestamo": {...}}
-                prestamo_num = prestamo_data['prestamo_numero']
-                prestamo = prestamo_data['prestamo'].copy()
-                prestamo['prestamo_numero'] = prestamo_num
-            elif 'prestamo_numero' in prestamo_data:
-                # Formato directo: {"prestamo_numero": 1, "user_id": ..., "libro_id": ...}
-                prestamo = prestamo_data.copy()
-                prestamo_num = prestamo['prestamo_numero']
-            else:
-                # Elemento sin prestamo_numero, ignorar
+        Returns:
+            tuple: (prestamo_numero, prestamo) o None si el elemento no es válido
+        """
+        # Verificar que el elemento tenga la estructura correcta
+        if not isinstance(prestamo_data, dict):
+            return None
+
+        # Puede venir en dos formatos: con 'prestamo' anidado o directo
+        if 'prestamo_numero' in prestamo_data and 'prestamo' in prestamo_data:
+            # Formato: {"prestamo_numero": 1, "prestamo": {...}}
+            prestamo_num = prestamo_data['prestamo_numero']
+            prestamo = prestamo_data['prestamo'].copy()
+            prestamo['prestamo_numero'] = prestamo_num
+        elif 'prestamo_numero' in prestamo_data:
+            # Formato directo: {"prestamo_numero": 1, "user_id": ..., "libro_id": ...}
+            prestamo = prestamo_data.copy()
+            prestamo_num = prestamo['prestamo_numero']
+        else:
+            # Elemento sin prestamo_numero, ignorar
+            return None
+
+        # Agregar campo 'status' para compatibilidad
+        prestamo['status'] = 'returned' if prestamo.get('regresado', False) else 'active'
+        return prestamo_num, prestamo
+
+    def _refrescar_prestamos(self):
+        """
+        Carga préstamos desde el servicio (snapshot prestamos.json + diario de eventos).
+        Con archivos JSON el servicio mantiene la misma lista y solo le agrega
+        los préstamos nuevos: se convierten solo esos, y de los anteriores se
+        revisan únicamente los que estaban activos. Si la lista es otra (por
+        ejemplo, después de compactar el diario) se convierte completa.
+        """
+        prestamos_lista = prestamos_service.cargar_prestamos()
+
+        if prestamos_lista is not self._fuente_prestamos or len(prestamos_lista) < self._prestamos_vistos:
+            self._loans = {}
+            self._fuente_prestamos = prestamos_lista
+            self._prestamos_vistos = 0
+            self._prestamos_activos = set()
+            self._columnar = None
+
+        # Devoluciones de préstamos que estaban activos
+        for posicion in list(self._prestamos_activos):
+            convertido = self._convertir_prestamo(prestamos_lista[posicion])
+            if convertido is None or convertido[1]['status'] != 'active':
+                self._prestamos_activos.discard(posicion)
+                if convertido is not None:
+                    self._loans[convertido[0]] = convertido[1]
+
+        # Préstamos nuevos
+        if len(prestamos_lista) > self._prestamos_vistos:
+            self._columnar = None
+        for posicion in range(self._prestamos_vistos, len(prestamos_lista)):
+            convertido = self._convertir_prestamo(prestamos_lista[posicion])
+            if convertido is None:
                 continue
+            prestamo_num, prestamo = convertido
+            self._loans[prestamo_num] = prestamo
+            if prestamo['status'] == 'active':
+                self._prestamos_activos.add(posicion)
+        self._prestamos_vistos = len(prestamos_lista)
 
-            # Agregar campo 'status' para compatibilidad
-            prestamo['status'] = 'returned' if prestamo.get('regresado', False) else 'active'
-            prestamos[prestamo_num] = prestamo
+    def catalogo_columnar(self):
+        """
+        Vista columnar del catálogo (género, disponibilidad y mes del último
+        préstamo de cada ejemplar), al día con refresh().
 
-        return prestamos
+        Returns:
+            estadisticas.CatalogoColumnar
+        """
+        self.refresh()
+        if self._columnar is None:
+            self._columnar = estadisticas.construir_catalogo_columnar(self.books.values(), self.loans.values())
+        return self._columnar
 
     # 1. Totals
     def report_totals(self, export=False):
+        # Los préstamos activos salen de los agregados: no hace falta refrescar préstamos
+        self._refrescar_usuarios()
+        self._refrescar_catalogo()
         total_users = len(self.users)
         total_books = len(self.books)
-        active_loans = sum(1 for loan in self.loans.values() if not loan.get("regresado", False))
+        active_loans = agregados_service.cargar_agregados()["activos"]
 
         report = {
             "Total de Usuarios": total_users,
@@ -106,17 +235,24 @@ class ReportGenerator:
 
     # 2. Most Borrowed Books
     def report_most_borrowed_books(self, top_n=5, export=False, only_active=False):
-        # Si only_active=True, contar solo préstamos no devueltos
-        borrowed_books = [
-            loan.get("libro_id")
-            for loan in self.loans.values()
-            if loan.get("libro_id") and (not only_active or not loan.get("regresado", False))
-        ]
-        counter = Counter(borrowed_books)
-
+        if only_active:
+            # Solo préstamos no devueltos: se cuentan sobre los préstamos activos
+            self._refrescar_prestamos()
+            borrowed_books = [
+                loan.get("libro_id")
+                for loan in self.loans.values()
+                if loan.get("libro_id") and not loan.get("regresado", False)
+            ]
+            top = Counter(borrowed_books).most_common(top_n)
+        else:
+            # Histórico: ranking mantenido con cada préstamo
+            top = agregados_service.top_libros(top_n)
+
+        # Solo se leen los libros del ranking, no todo el catálogo
+        libros = self._libros_mostrados(book_id for book_id, _ in top)
         report = []
-        for book_id, count in counter.most_common(top_n):
-            libro = self.books.get(book_id, {})
+        for book_id, count in top:
+            libro = libros.get(book_id, {})
             report.append({
                 "Libro": libro.get("title", "Desconocido"),
                 "Autor": libro.get("autor", "Desconocido"),
@@ -132,18 +268,10 @@ class ReportGenerator:
 
     # 3. Users with Most Borrowed Books
     def report_top_users(self, top_n=5, export=False):
-        # Contar préstamos por usuario (histórico)
-        user_counts = {}
-        for loan in self.loans.values():
-            user_id = loan.get("user_id")
-            if not user_id:
-                continue
-            user_counts[user_id] = user_counts.get(user_id, 0) + 1
-
-        sorted_users = sorted(user_counts.items(), key=lambda x: x[1], reverse=True)
-
+        self._refrescar_usuarios()
+        # Préstamos por usuario (histórico): ranking mantenido con cada préstamo
         report = []
-        for uid, count in sorted_users[:top_n]:
+        for uid, count in agregados_service.top_usuarios(top_n):
             usuario = self.users.get(uid, {})
             libros_actuales = len(usuario.get("libros_prestados", []))
             report.append({
@@ -161,6 +289,7 @@ class ReportGenerator:
 
     # 4. Books Available vs Borrowed
     def report_books_status(self, export=False):
+        self.refresh()
         available = sum(1 for b in self.books.values() if b.get("disponible", False))
         borrowed = len(self.books) - available
 
@@ -211,13 +340,36 @@ class ReportGenerator:
             print("No data to export.")
             return
         path = self.reports_dir / filename
-        with open(path, mode="w", newline="", encoding="utf-8") as file:
-            fieldnames = list(data[0].keys())
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        exportacion.exportar_registros(data, path, columnas=list(data[0].keys()), formato="csv", comprimir=False)
         print(f"CSV report saved as {path}")
 
+    # ---- Exportaciones completas (en streaming) ----
+    def export_loans(self, filename="prestamos.csv", columnas=None):
+        """
+        Exporta el historial completo de préstamos a reports/<filename>.
+        El formato sale de la extensión: .csv o .jsonl, con .gz para comprimir.
+
+        Returns:
+            int: Cantidad de préstamos exportados
+        """
+        path = self.reports_dir / filename
+        cantidad = exportacion.exportar_prestamos(path, columnas=columnas)
+        print(f"Exported {cantidad} loans to {path}")
+        return cantidad
+
+    def export_catalog(self, filename="catalogo.csv", columnas=None):
+        """
+        Exporta todos los ejemplares del catálogo a reports/<filename>.
+        El formato sale de la extensión: .csv o .jsonl, con .gz para comprimir.
+
+        Returns:
+            int: Cantidad de ejemplares exportados
+        """
+        path = self.reports_dir / filename
+        cantidad = exportacion.exportar_catalogo(path, columnas=columnas)
+        print(f"Exported {cantidad} books to {path}")
+        return cantidad
+
     # 5. Estadísticas por Género (usando MATRIZ)
     def report_estadisticas_por_genero(self):
         """
@@ -229,35 +381,8 @@ class ReportGenerator:
         Returns:
             list: Matriz con las estadísticas por género
         """
-        # Obtener lista de géneros únicos
-        generos = set()
-        for libro in self.books.values():
-            genero = libro.get('genero', 'otros')
-            generos.add(genero)
-
-        generos = sorted(list(generos))
-
-        # Crear matriz vacía: filas = géneros, columnas = [Total, Disponibles, Prestados, % Disponibilidad]
-        # Inicializar matriz con ceros
-        matriz = []
-        for i in range(len(generos)):
-            # [total, disponibles, prestados, porcentaje_disponibilidad]
-            matriz.append([0, 0, 0, 0.0])
-
-        # Llenar la matriz con los datos
-        for i in range(len(generos)):
-            genero = generos[i]
-            for libro in self.books.values():
-                if libro.get('genero', 'otros') == genero:
-                    matriz[i][0] += 1  # Total
-                    if libro.get('disponible', False):
-                        matriz[i][1] += 1  # Disponibles
-                    else:
-                        matriz[i][2] += 1  # Prestados
-
-            # Calcular porcentaje de disponibilidad
-            if matriz[i][0] > 0:
-                matriz[i][3] = (matriz[i][1] / matriz[i][0]) * 100
+        # Una sola pasada: conteos por (género, disponibilidad) sobre la vista columnar
+        generos, matriz = estadisticas.matriz_por_genero(self.catalogo_columnar())
 
         # Imprimir la matriz en formato tabla
         print("\n=== Estadísticas por Género (Matriz) ===")
@@ -268,19 +393,54 @@ class ReportGenerator:
             genero = generos[i]
             print(f"{genero.capitalize():<15} | {matriz[i][0]:>8} | {matriz[i][1]:>12} | {matriz[i][2]:>10} | {matriz[i][3]:>11.1f}%")
 
-        # Calcular totales usando ciclos tradicionales
-        total_libros = 0
-        total_disponibles = 0
-        total_prestados = 0
-
-        for i in range(len(matriz)):
-            total_libros += matriz[i][0]
-            total_disponibles += matriz[i][1]
-            total_prestados += matriz[i][2]
+        # Totales: suma de cada columna de la matriz (una fila por género)
+        total_libros = sum(fila[0] for fila in matriz)
+        total_disponibles = sum(fila[1] for fila in matriz)
+        total_prestados = sum(fila[2] for fila in matriz)
 
         porcentaje_total = (total_disponibles / total_libros * 100) if total_libros > 0 else 0
 
         print("-" * 75)
         print(f"{'TOTAL':<15} | {total_libros:>8} | {total_disponibles:>12} | {total_prestados:>10} | {porcentaje_total:>11.1f}%")
 
-        return matriz
\ No newline at end of file
+        return matriz
+
+    # 6. Pivot Género × Disponibilidad × Mes
+    def report_pivot_genero_disponibilidad_mes(self, export=False):
+        """
+        Cantidad de ejemplares por género, disponibilidad y mes de su último
+        préstamo ('sin préstamos' si nunca se prestó, 'sin fecha' si el
+        préstamo no registra fecha).
+
+        Returns:
+            list: Filas {'Género', 'Mes', 'Disponibles', 'Prestados', 'Total'}
+        """
+        report = estadisticas.pivot_genero_disponibilidad_mes(self.catalogo_columnar())
+
+        self._print_table("Ejemplares por Género, Disponibilidad y Mes del Último Préstamo", report)
+
+        if export:
+            self._export_list_to_csv("report_pivot_genero_disponibilidad_mes.csv", report)
+
+        return report
+
+    # 7. Préstamos por Género
+    def report_prestamos_por_genero(self, export=False):
+        """
+        Préstamos históricos y activos por género, leídos de los agregados.
+
+        Returns:
+            list: Filas {'Género', 'Préstamos', 'Activos'}
+        """
+        por_genero = agregados_service.cargar_agregados()["por_genero"]
+        report = [
+            {"Género": genero, "Préstamos": datos["prestamos"], "Activos": datos["activos"]}
+            for genero, datos in sorted(por_genero.items())
+        ]
+
+        self._print_table("Préstamos por Género", report)
+
+        if export:
+            self._export_list_to_csv("report_prestamos_por_genero.csv", report)
+
+        return report
@@ -0,0 +1,34 @@
+"""
+Rutas de los datos de la biblioteca.
+
+Todas salen de obtener_directorio_base() en el momento de la llamada, no al
+importar: las pruebas y los benchmarks reemplazan esa función para trabajar
+sobre una copia de los datos en un directorio temporal.
+"""
+
+from pathlib import Path
+
+
+def obtener_directorio_base():
+    """Obtiene el directorio base del proyecto"""
+    return Path(__file__).parent.parent
+
+
+def obtener_directorio_datos():
+    """Obtiene el directorio data/ del proyecto"""
+    return obtener_directorio_base() / 'data'
+
+
+def obtener_directorio_libros():
+    """Obtiene el directorio donde están los libros"""
+    return obtener_directorio_datos() / 'libros'
+
+
+def obtener_directorio_prestamos():
+    """Obtiene el directorio de los préstamos (snapshot, diario y agregados)"""
+    return obtener_directorio_datos() / 'prestamos'
+
+
+def obtener_archivo_usuarios():
+    """Obtiene la ruta de usuarios.json"""
+    return obtener_directorio_datos() / 'usuarios' / 'usuarios.json'
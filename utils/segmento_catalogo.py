@@ -0,0 +1,226 @@
+"""
+Catálogo empaquetado en un único archivo (segmento) leído con mmap.
+
+En lugar de abrir, hacer stat y parsear ~1000 archivos JSON chicos, los
+recorridos completos (listar libros, libros de un género, reportes) leen
+los registros de un solo archivo mapeado en memoria.
+
+Formato de data/libros/catalogo.seg (enteros little-endian):
+
+    cabecera    MAGIA (8 bytes) | versión u32 | cantidad u32 | offset tabla u64 | offset directorio u64
+    registros   por cada libro: longitud u32 + JSON compacto en UTF-8
+    tabla       cantidad x u64: offset de cada registro
+    directorio  JSON: {"generos": {genero: {"inicio", "fin", "mtime_ns"}}}
+
+Los registros quedan ordenados por género, así cada género es un rango
+[inicio, fin) de la tabla. El directorio guarda el mtime_ns de la carpeta de
+cada género al empaquetar: toda escritura de un libro (alta, baja o
+reemplazo atómico) cambia ese mtime, y el género se considera desactualizado
+hasta volver a empaquetar (mientras tanto se lee de los archivos).
+
+Uso:
+    python -m utils.segmento_catalogo empaquetar
+    python -m utils.segmento_catalogo desempaquetar DIRECTORIO_DESTINO
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from utils.rutas import obtener_directorio_libros
+
+DIR_LIBROS = obtener_directorio_libros()
+SEGMENTO_FILE = DIR_LIBROS / "catalogo.seg"
+
+MAGIA = b"BIBSEG\x00\x01"
+VERSION = 1
+_CABECERA = struct.Struct("<8sIIQQ")
+_LONGITUD = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+
+# Segmento abierto y firma (inodo, mtime_ns, tamaño) del archivo mapeado
+_segmento_cache = None
+_firma_cache = None
+
+
+class SegmentoCatalogo:
+    """Vista de solo lectura de un segmento, mapeado en memoria."""
+
+    def __init__(self, ruta):
+        with open(ruta, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magia, version, cantidad, offset_tabla, offset_directorio = _CABECERA.unpack_from(self._mm, 0)
+        if magia != MAGIA or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{ruta} no es un segmento de catálogo válido")
+
+        self._cantidad = cantidad
+        self._offset_tabla = offset_tabla
+        self.generos = json.loads(self._mm[offset_directorio:])["generos"]
+
+    def __len__(self):
+        return self._cantidad
+
+    def _offset(self, posicion):
+        return _OFFSET.unpack_from(self._mm, self._offset_tabla + posicion * _OFFSET.size)[0]
+
+    def registro_crudo(self, posicion):
+        """Bytes JSON del registro en la posición indicada."""
+        offset = self._offset(posicion)
+        (longitud,) = _LONGITUD.unpack_from(self._mm, offset)
+        inicio = offset + _LONGITUD.size
+        return self._mm[inicio:inicio + longitud]
+
+    def registro(self, posicion):
+        return json.loads(self.registro_crudo(posicion))
+
+    def rango(self, inicio, fin):
+        """Itera los libros de las posiciones [inicio, fin)."""
+        for posicion in range(inicio, fin):
+            yield self.registro(posicion)
+
+    def __iter__(self):
+        return self.rango(0, self._cantidad)
+
+    def libros_de_genero(self, genero):
+        datos = self.generos.get(genero)
+        if datos is None:
+            return iter(())
+        return self.rango(datos["inicio"], datos["fin"])
+
+    def genero_vigente(self, genero, dir_libros=DIR_LIBROS):
+        """True si la carpeta del género no cambió desde que se empaquetó."""
+        datos = self.generos.get(genero)
+        if datos is None:
+            return False
+        try:
+            return (Path(dir_libros) / genero).stat().st_mtime_ns == datos["mtime_ns"]
+        except FileNotFoundError:
+            return False
+
+    def cerrar(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        self.cerrar()
+        return False
+
+
+def empaquetar_catalogo(dir_libros=DIR_LIBROS, ruta_segmento=None):
+    """
+    Empaqueta data/libros/<genero>/<libro_id>.json en un segmento.
+
+    Args:
+        dir_libros (Path): Carpeta con un subdirectorio por género
+        ruta_segmento (Path, optional): Destino (por defecto <dir_libros>/catalogo.seg)
+
+    Returns:
+        int: Cantidad de libros empaquetados
+    """
+    dir_libros = Path(dir_libros)
+    ruta_segmento = Path(ruta_segmento) if ruta_segmento else dir_libros / SEGMENTO_FILE.name
+    tmp = ruta_segmento.with_name(ruta_segmento.name + ".tmp")
+
+    generos = {}
+    offsets = []
+    with open(tmp, "wb") as f:
+        f.write(b"\x00" * _CABECERA.size)
+
+        for genero_dir in sorted(p for p in dir_libros.iterdir() if p.is_dir()):
+            # El mtime se toma antes de leer: si algo cambia mientras tanto,
+            # el género queda desactualizado en vez de guardar datos viejos
+            mtime_ns = genero_dir.stat().st_mtime_ns
+            inicio = len(offsets)
+            for archivo_libro in sorted(genero_dir.glob("*.json")):
+                try:
+                    with open(archivo_libro, "r", encoding="utf-8") as archivo:
+                        libro = json.load(archivo)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(libro, dict):
+                    continue
+                contenido = json.dumps(libro, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                offsets.append(f.tell())
+                f.write(_LONGITUD.pack(len(contenido)))
+                f.write(contenido)
+            generos[genero_dir.name] = {"inicio": inicio, "fin": len(offsets), "mtime_ns": mtime_ns}
+
+        offset_tabla = f.tell()
+        for offset in offsets:
+            f.write(_OFFSET.pack(offset))
+
+        offset_directorio = f.tell()
+        f.write(json.dumps({"generos": generos}, ensure_ascii=False).encode("utf-8"))
+
+        f.seek(0)
+        f.write(_CABECERA.pack(MAGIA, VERSION, len(offsets), offset_tabla, offset_directorio))
+
+    os.replace(tmp, ruta_segmento)
+    return len(offsets)
+
+
+def desempaquetar_catalogo(ruta_segmento, dir_destino):
+    """
+    Vuelve a generar la estructura <dir_destino>/<genero>/<libro_id>.json
+    a partir de un segmento.
+
+    Returns:
+        int: Cantidad de libros escritos
+    """
+    dir_destino = Path(dir_destino)
+    cantidad = 0
+    with SegmentoCatalogo(ruta_segmento) as segmento:
+        for genero in segmento.generos:
+            carpeta_genero = dir_destino / genero
+            carpeta_genero.mkdir(parents=True, exist_ok=True)
+            for libro in segmento.libros_de_genero(genero):
+                with open(carpeta_genero / f"{libro['libro_id']}.json", "w", encoding="utf-8") as f:
+                    json.dump(libro, f, indent=4, ensure_ascii=False)
+                cantidad += 1
+    return cantidad
+
+
+def abrir_segmento(ruta_segmento=SEGMENTO_FILE):
+    """
+    Devuelve el segmento del catálogo (abierto una sola vez y reabierto si el
+    archivo cambia), o None si no existe o no es válido.
+    """
+    global _segmento_cache, _firma_cache
+
+    try:
+        stat = os.stat(ruta_segmento)
+    except FileNotFoundError:
+        return None
+
+    firma = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if _segmento_cache is None or firma != _firma_cache:
+        try:
+            _segmento_cache = SegmentoCatalogo(ruta_segmento)
+        except (ValueError, struct.error):
+            _segmento_cache = None
+            return None
+        _firma_cache = firma
+
+    return _segmento_cache
+
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == "empaquetar":
+        cantidad = empaquetar_catalogo()
+        print(f"✓ Catálogo empaquetado en {SEGMENTO_FILE}: {cantidad} libros")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "desempaquetar":
+        cantidad = desempaquetar_catalogo(SEGMENTO_FILE, sys.argv[2])
+        print(f"✓ Catálogo desempaquetado en {sys.argv[2]}: {cantidad} libros")
+    else:
+        print("Uso: python -m utils.segmento_catalogo empaquetar | desempaquetar DIRECTORIO_DESTINO")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+"""
+Transacciones con registro de escritura anticipada (WAL).
+
+Una Transaccion acumula en memoria las escrituras de varios archivos
+(reemplazo completo de un JSON o agregado de una línea a un diario).
+Al confirmarla, todas las operaciones se escriben primero en el WAL con un
+único fsync y recién después se aplican a los archivos reales, que también
+se sincronizan antes de vaciar el WAL. Si el proceso se interrumpe a mitad
+de camino, recuperar_transacciones() vuelve a aplicar lo que haya quedado
+en el WAL; si no se llamó, el próximo commit lo hace antes de escribir el
+suyo.
+
+Varias transacciones (o varios préstamos dentro de una misma transacción)
+se pueden confirmar juntas en un único commit de grupo.
+
+Concurrencia entre procesos: la transacción lee sin bloquear y el commit se
+hace con el bloqueo de escritura tomado (utils/bloqueos.py). Dentro del
+commit, antes de escribir el WAL:
+- los registros leídos con leer_registro() deben seguir en la versión leída;
+  si otro proceso los modificó, el commit se rechaza con ConflictoDeVersion
+  y la operación se puede reintentar (reintentar_en_conflicto),
+- las modificaciones programadas con modificar_json() se vuelven a aplicar
+  sobre el archivo actual si otro proceso lo cambió entretanto.
+
+Con modificar_json_en_wal() el WAL guarda la llamada a la función (por
+ejemplo, agregar un libro a un usuario) en lugar del archivo completo.
+"""
+
+import copy
+import importlib
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+from utils.bloqueos import bloqueo_escritura
+from utils.instrumentacion import instrumentar
+from utils.rutas import obtener_directorio_base
+
+BASE_DIR = obtener_directorio_base()
+WAL_FILE = BASE_DIR / "data" / "transacciones.wal"
+
+# Intentos optimistas ante un conflicto de versión; el último se hace con el
+# bloqueo de escritura tomado durante toda la operación
+REINTENTOS_POR_CONFLICTO = 8
+
+
+class ConflictoDeVersion(Exception):
+    """Otro proceso modificó un registro que la transacción leyó."""
+
+
+@instrumentar
+def _cargar_json(ruta: Path, por_defecto):
+    if not ruta.exists():
+        return por_defecto
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        return por_defecto
+
+
+def _firma(ruta: Path):
+    """Devuelve (inodo, mtime_ns, tamaño) de un archivo, o None si no existe."""
+    try:
+        stat = ruta.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _version(datos):
+    """Versión de un registro (None si no existe; 0 si nunca se versionó)."""
+    return None if datos is None else datos.get("version", 0)
+
+
+def _ruta_wal(ruta: Path) -> str:
+    """Ruta que se guarda en el WAL: relativa a la raíz del proyecto si es posible."""
+    try:
+        return str(ruta.resolve().relative_to(BASE_DIR.resolve()))
+    except ValueError:
+        return str(ruta.resolve())
+
+
+def _ruta_real(ruta: str) -> Path:
+    ruta = Path(ruta)
+    return ruta if ruta.is_absolute() else BASE_DIR / ruta
+
+
+class Transaccion:
+    """
+    Unidad de trabajo: acumula escrituras y las confirma de forma atómica.
+
+    Las lecturas hechas a través de la transacción ven las escrituras
+    pendientes (read-your-writes), así varias operaciones encadenadas sobre
+    el mismo archivo se acumulan y el archivo se escribe una sola vez.
+
+    Uso:
+        with Transaccion() as tx:
+            datos = tx.leer_json(ruta, [])
+            ...
+            tx.escribir_json(ruta, datos)
+    """
+
+    def __init__(self):
+        self._archivos = {}
+        self._lineas = {}
+        self._al_confirmar = []
+        # ruta -> versión leída de disco (registros con contador de versión)
+        self._versiones = {}
+        # ruta -> (firma al leer, valor por defecto, funciones a reaplicar)
+        self._modificaciones = {}
+        # ruta -> llamadas [función, argumentos] a registrar en el WAL; None si
+        # alguna modificación no se puede registrar así (va el archivo completo)
+        self._llamadas = {}
+        # (función, descripción) a verificar con el bloqueo tomado
+        self._verificaciones = []
+
+    def leer_json(self, ruta, por_defecto):
+        """Lee un JSON considerando las escrituras pendientes de la transacción."""
+        ruta = Path(ruta)
+        if ruta in self._archivos:
+            return self._archivos[ruta]
+        return _cargar_json(ruta, por_defecto)
+
+    def escribir_json(self, ruta, datos):
+        """Programa el reemplazo completo de un archivo JSON."""
+        ruta = Path(ruta)
+        self._archivos[ruta] = datos
+        self._modificaciones.pop(ruta, None)
+        self._llamadas.pop(ruta, None)
+
+    def leer_registro(self, ruta, por_defecto):
+        """
+        Lee un registro JSON con contador de versión (por ejemplo, un libro).
+        Al confirmar, si otro proceso lo modificó desde esta lectura, el commit
+        se rechaza con ConflictoDeVersion.
+        """
+        ruta = Path(ruta)
+        if ruta in self._archivos:
+            return self._archivos[ruta]
+        datos = _cargar_json(ruta, None)
+        self._versiones.setdefault(ruta, _version(datos))
+        return por_defecto if datos is None else datos
+
+    def escribir_registro(self, ruta, datos):
+        """Programa el reemplazo de un registro incrementando su versión."""
+        datos["version"] = datos.get("version", 0) + 1
+        self.escribir_json(ruta, datos)
+
+    def modificar_json(self, ruta, por_defecto, funcion):
+        """
+        Aplica 'funcion' (que modifica los datos en el lugar) al contenido de
+        un JSON visto por la transacción y programa su escritura. Si al
+        confirmar otro proceso ya cambió el archivo, las funciones se vuelven
+        a aplicar sobre el contenido actual en lugar de pisarlo. Sirve para
+        cambios que no dependen de lo leído (contadores, listas por usuario).
+
+        Returns:
+            Lo que devuelva 'funcion'
+        """
+        return self._modificar(Path(ruta), por_defecto, funcion, None)
+
+    def modificar_json_en_wal(self, ruta, por_defecto, funcion, *argumentos):
+        """
+        Como modificar_json, con la llamada funcion(datos, *argumentos). En el
+        WAL se registra la llamada en lugar del archivo completo y al aplicar
+        se ejecuta sobre el contenido actual. 'funcion' debe estar definida a
+        nivel de módulo, recibir argumentos serializables a JSON y ser
+        idempotente: la recuperación puede aplicarla dos veces.
+
+        Returns:
+            Lo que devuelva 'funcion'
+        """
+        llamada = [f"{funcion.__module__}:{funcion.__qualname__}", list(argumentos)]
+        return self._modificar(Path(ruta), por_defecto, lambda datos: funcion(datos, *argumentos), llamada)
+
+    def _modificar(self, ruta, por_defecto, funcion, llamada):
+        if ruta not in self._archivos:
+            firma = _firma(ruta)
+            self._archivos[ruta] = _cargar_json(ruta, copy.deepcopy(por_defecto))
+            self._modificaciones[ruta] = (firma, copy.deepcopy(por_defecto), [])
+            self._llamadas[ruta] = []
+        resultado = funcion(self._archivos[ruta])
+        if ruta in self._modificaciones:
+            self._modificaciones[ruta][2].append(funcion)
+            if llamada is None or self._llamadas[ruta] is None:
+                self._llamadas[ruta] = None
+            else:
+                self._llamadas[ruta].append(llamada)
+        return resultado
+
+    def verificar_al_confirmar(self, funcion, descripcion):
+        """
+        Programa una verificación que se evalúa en el commit, con el bloqueo
+        de escritura tomado. Si devuelve False, el commit se rechaza con
+        ConflictoDeVersion.
+        """
+        self._verificaciones.append((funcion, descripcion))
+
+    def agregar_linea(self, ruta, linea: str):
+        """Programa el agregado de una línea al final de un archivo (diario)."""
+        self._lineas.setdefault(Path(ruta), []).append(linea)
+
+    def lineas_pendientes(self, ruta):
+        """Devuelve las líneas que la transacción todavía no agregó al archivo."""
+        return list(self._lineas.get(Path(ruta), []))
+
+    def al_confirmar(self, funcion):
+        """
+        Programa una función a ejecutar después de aplicar el commit (por
+        ejemplo, actualizar un índice en memoria). Si la transacción se
+        descarta, no se ejecuta.
+        """
+        self._al_confirmar.append(funcion)
+
+    def vacia(self) -> bool:
+        return not self._archivos and not self._lineas
+
+    def _validar(self):
+        """
+        Con el bloqueo tomado: rechaza el commit si algún registro leído cambió
+        y reaplica las modificaciones sobre los archivos que cambiaron.
+        """
+        for ruta, version in self._versiones.items():
+            if _version(_cargar_json(ruta, None)) != version:
+                raise ConflictoDeVersion(f"{ruta.name} fue modificado por otro proceso")
+        for funcion, descripcion in self._verificaciones:
+            if not funcion():
+                raise ConflictoDeVersion(descripcion)
+        for ruta, (firma, por_defecto, funciones) in self._modificaciones.items():
+            if _firma(ruta) != firma:
+                datos = _cargar_json(ruta, copy.deepcopy(por_defecto))
+                for funcion in funciones:
+                    funcion(datos)
+                self._archivos[ruta] = datos
+
+    def _operaciones(self, tamanos):
+        """
+        Convierte lo acumulado en operaciones para el WAL.
+        'tamanos' lleva el tamaño esperado de cada diario antes de agregar,
+        para que la recuperación sepa si una línea ya fue escrita.
+        """
+        operaciones = []
+        for ruta, datos in self._archivos.items():
+            if self._llamadas.get(ruta):
+                operaciones.append({
+                    "tipo": "modificar_json",
+                    "ruta": _ruta_wal(ruta),
+                    "por_defecto": self._modificaciones[ruta][1],
+                    "llamadas": self._llamadas[ruta]
+                })
+            else:
+                operaciones.append({"tipo": "escribir_json", "ruta": _ruta_wal(ruta), "datos": datos})
+        for ruta, lineas in self._lineas.items():
+            if ruta not in tamanos:
+                tamanos[ruta] = ruta.stat().st_size if ruta.exists() else 0
+            # Todas las líneas de un mismo archivo se agregan con una sola escritura
+            bloque = "".join(lineas)
+            operaciones.append({
+                "tipo": "agregar_linea",
+                "ruta": _ruta_wal(ruta),
+                "linea": bloque,
+                "offset": tamanos[ruta]
+            })
+            tamanos[ruta] += len(bloque.encode("utf-8"))
+        return operaciones
+
+    def confirmar(self):
+        """Confirma la transacción (un único fsync del WAL)."""
+        confirmar_en_grupo([self])
+
+    def descartar(self):
+        """Descarta todas las escrituras pendientes."""
+        self._archivos.clear()
+        self._lineas.clear()
+        self._al_confirmar.clear()
+        self._versiones.clear()
+        self._modificaciones.clear()
+        self._llamadas.clear()
+        self._verificaciones.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        if tipo_error is None:
+            self.confirmar()
+        else:
+            self.descartar()
+        return False
+
+
+def _escribir_json_atomico(ruta: Path, datos):
+    """Escribe un JSON en un archivo temporal y lo reemplaza de forma atómica."""
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(ruta.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=4)
+    os.replace(tmp, ruta)
+
+
+def _agregar_linea_idempotente(ruta: Path, linea: str, offset: int):
+    """
+    Agrega la línea al archivo salvo que ya esté escrita en 'offset'.
+    Si el archivo es más corto que 'offset', el diario ya fue compactado
+    después de aplicar la línea y no se hace nada.
+    """
+    contenido = linea.encode("utf-8")
+    tamano = ruta.stat().st_size if ruta.exists() else 0
+
+    if tamano > offset:
+        with open(ruta, "rb") as f:
+            f.seek(offset)
+            if f.read(len(contenido)) == contenido:
+                return
+    elif tamano < offset:
+        return
+
+    with open(ruta, "ab") as f:
+        f.write(contenido)
+
+
+def _ejecutar_llamadas(ruta: Path, por_defecto, llamadas):
+    """Aplica al contenido actual del archivo las llamadas registradas en el WAL."""
+    datos = _cargar_json(ruta, copy.deepcopy(por_defecto))
+    for nombre, argumentos in llamadas:
+        modulo, funcion = nombre.split(":")
+        getattr(importlib.import_module(modulo), funcion)(datos, *argumentos)
+    _escribir_json_atomico(ruta, datos)
+
+
+def _aplicar(operaciones):
+    """Aplica las operaciones a los archivos. Returns: set de rutas modificadas"""
+    rutas = set()
+    for operacion in operaciones:
+        ruta = _ruta_real(operacion["ruta"])
+        if operacion["tipo"] == "escribir_json":
+            _escribir_json_atomico(ruta, operacion["datos"])
+        elif operacion["tipo"] == "modificar_json":
+            _ejecutar_llamadas(ruta, operacion["por_defecto"], operacion["llamadas"])
+        elif operacion["tipo"] == "agregar_linea":
+            _agregar_linea_idempotente(ruta, operacion["linea"], operacion["offset"])
+        rutas.add(ruta)
+    return rutas
+
+
+def _sincronizar(rutas):
+    """
+    Hace fsync de cada archivo aplicado y de su carpeta (que registra el
+    reemplazo atómico). Recién después se puede vaciar el WAL: si no, un
+    corte de energía podría perder cambios que ya no están en ningún lado.
+    """
+    carpetas = set()
+    for ruta in rutas:
+        if not ruta.exists():
+            continue
+        with open(ruta, "rb") as f:
+            os.fsync(f.fileno())
+        carpetas.add(ruta.parent)
+
+    for carpeta in carpetas:
+        try:
+            descriptor = os.open(carpeta, os.O_RDONLY)
+        except OSError:
+            # Windows no permite abrir carpetas: el reemplazo ya es durable
+            continue
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+
+def confirmar_en_grupo(transacciones):
+    """
+    Confirma varias transacciones en un único commit de grupo, con el
+    bloqueo de escritura tomado:
+    1. aplica lo que haya quedado en el WAL (un commit anterior que falló
+       después de escribirlo),
+    2. verifica las versiones leídas y reaplica las modificaciones,
+    3. escribe todas sus operaciones en el WAL y hace un solo fsync,
+    4. aplica las operaciones a los archivos y hace fsync de cada uno y de
+       su carpeta,
+    5. vacía el WAL.
+
+    Args:
+        transacciones (list): Transacciones a confirmar
+
+    Raises:
+        ConflictoDeVersion: Si otro proceso modificó un registro leído (las
+                            transacciones se descartan sin escribir nada)
+    """
+    if all(transaccion.vacia() for transaccion in transacciones):
+        # Nada que escribir (por ejemplo, un préstamo rechazado)
+        for transaccion in transacciones:
+            transaccion.descartar()
+        return
+
+    with bloqueo_escritura():
+        _recuperar()
+        try:
+            for transaccion in transacciones:
+                transaccion._validar()
+        except ConflictoDeVersion:
+            for transaccion in transacciones:
+                transaccion.descartar()
+            raise
+        _confirmar(transacciones)
+
+
+def _confirmar(transacciones):
+    tamanos = {}
+    operaciones = []
+    for transaccion in transacciones:
+        operaciones.extend(transaccion._operaciones(tamanos))
+
+    WAL_FILE.parent.mkdir(parents=True, exist_ok=True)
+    registro = (json.dumps({"operaciones": operaciones}, ensure_ascii=False) + "\n").encode("utf-8")
+    with open(WAL_FILE, "ab") as f:
+        f.write(registro)
+        f.flush()
+        os.fsync(f.fileno())
+
+    _sincronizar(_aplicar(operaciones))
+
+    with open(WAL_FILE, "wb"):
+        pass
+
+    for transaccion in transacciones:
+        for funcion in transaccion._al_confirmar:
+            funcion()
+        transaccion.descartar()
+
+
+def recuperar_transacciones():
+    """
+    Vuelve a aplicar las transacciones que quedaron en el WAL
+    (por ejemplo, si el programa se cerró en medio de un commit).
+    Un registro final incompleto no llegó a confirmarse y se descarta.
+
+    Returns:
+        int: Cantidad de registros recuperados
+    """
+    with bloqueo_escritura():
+        return _recuperar()
+
+
+def _recuperar():
+    """Con el bloqueo tomado: reaplica los registros del WAL y lo vacía."""
+    if not WAL_FILE.exists() or WAL_FILE.stat().st_size == 0:
+        return 0
+    with open(WAL_FILE, "rb") as f:
+        datos = f.read()
+    recuperados = _reaplicar(datos)
+    with open(WAL_FILE, "wb"):
+        pass
+    return recuperados
+
+
+def _reaplicar(datos):
+    """Aplica los registros completos del WAL. Returns: cantidad aplicada"""
+    recuperados = 0
+    rutas = set()
+    for linea in datos.split(b"\n"):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except json.JSONDecodeError:
+            continue
+        rutas |= _aplicar(registro["operaciones"])
+        recuperados += 1
+    _sincronizar(rutas)
+    return recuperados
+
+
+def reintentar_en_conflicto(funcion):
+    """
+    Ejecuta 'funcion' (una operación completa: leer, modificar y confirmar) y
+    la repite si el commit se rechaza por un conflicto de versión, con una
+    espera aleatoria creciente. El último intento se hace con el bloqueo de
+    escritura tomado durante toda la operación, así no puede volver a fallar
+    por otro proceso.
+
+    Returns:
+        Lo que devuelva 'funcion'
+    """
+    for intento in range(REINTENTOS_POR_CONFLICTO - 1):
+        try:
+            return funcion()
+        except ConflictoDeVersion:
+            time.sleep(random.uniform(0, 0.001 * 2 ** intento))
+    with bloqueo_escritura():
+        return funcion()